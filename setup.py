@@ -1,14 +1,19 @@
 from setuptools import setup, find_packages
+import re
 
 with open('README.md', 'r', encoding='utf-8') as f:
     long_description = f.read()
 
+# the version is defined in the package only (it is part of cache keys), importing it would need all dependencies
+with open('taisti_linker/__init__.py') as f:
+    version = re.search(r'^__version__ = "([^"]+)"', f.read(), re.M).group(1)
+
 with open('taisti_linker/requirements.txt') as f:
     required = f.read().splitlines()
 
 setup(
     name='taisti_linker',
-    version='1.0.0',
+    version=version,
     author='Dawid Wisniewski, Agnieszka Lawrynowicz',
     author_email='dwisniewski/alawrynowicz[guesswhat]cs.put.poznan.pl',
     description='Entity linker for TAISTI project',
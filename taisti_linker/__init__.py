@@ -1,5 +1,18 @@
+__version__ = "1.0.0"
+
 from taisti_linker.commons import *
+from taisti_linker.label_store import *
+from taisti_linker.cache import *
 from taisti_linker.ontology_parser import *
+from taisti_linker.category_registry import *
 from taisti_linker.similarity_calculator import *
+from taisti_linker.label_index import *
+from taisti_linker.minhash_index import *
+from taisti_linker.sparse_matcher import *
+from taisti_linker.wordnet_index import *
+from taisti_linker.tfidf_matcher import *
+from taisti_linker.embedding_matcher import *
 from taisti_linker.text_processor import *
+from taisti_linker.metrics import *
 from taisti_linker.entity_linker import *
+from taisti_linker.server import *
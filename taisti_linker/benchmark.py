@@ -0,0 +1,822 @@
+from taisti_linker import __version__
+from dataclasses import dataclass
+from taisti_linker.commons import (AnnotatedDoc, Annotation, AnnotationSource, AnnotationTable, EntityType, LabelWithIRI,
+                                   get_entity_type, iter_taisti_dataset_csv, iter_taisti_entities,
+                                   read_brat_all_annotation_files)
+from taisti_linker.entity_linker import EntityLinker
+from taisti_linker.ontology_parser import OntologyParser
+from taisti_linker.similarity_calculator import SimilarityCalculator, SimilarityType
+from taisti_linker.text_processor import TextProcessor
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+import argparse
+import csv
+import json
+import multiprocessing
+import numpy as np
+import os
+import pandas as pd
+import platform
+import resource
+import sys
+import tempfile
+import time
+import tracemalloc
+
+
+# linker settings of each case of the benchmark suite (see `benchmark_suite`)
+SUITE_CASES: Dict[str, Dict[str, Any]] = {
+    "J": {"similarity_measure": SimilarityType.JACCARD},
+    "E": {"similarity_measure": SimilarityType.EVERYGRAM},
+    "W": {"similarity_measure": SimilarityType.WORDNET},
+    "S": {"similarity_measure": SimilarityType.SPARSE_JACCARD},
+    "M": {"similarity_measure": SimilarityType.MINHASH},
+    "T": {"similarity_measure": SimilarityType.TFIDF},
+    "V": {"similarity_measure": SimilarityType.EMBEDDING},
+    "V-int8": {"similarity_measure": SimilarityType.EMBEDDING, "quantize_embeddings": True},
+}
+
+# IRIs of golden standard choices are prefixed with "obo." instead of the namespace
+OBO_NAMESPACE = "http://purl.obolibrary.org/obo/"
+
+
+def timed(function: Callable, *args, **kwargs) -> Tuple[float, object]:
+    """
+        Run a function and measure its wall-clock time.
+
+        Args:
+            function (Callable): function to run
+        Returns:
+            Tuple[float, object]: elapsed time in seconds and the value returned by the function
+    """
+    start = time.perf_counter()
+    result = function(*args, **kwargs)
+    return time.perf_counter() - start, result
+
+
+def collect_texts(annotations_path: str, ontology_path: str) -> List[str]:
+    """
+        Collect texts to benchmark on: spans of BRAT annotations and (optionally) labels of ontology entities.
+
+        Args:
+            annotations_path (str): Path to BRAT annotations folder (skipped if empty)
+            ontology_path (str): Path to an ontology (skipped if empty)
+        Returns:
+            List[str]: collected texts
+    """
+    texts = []
+    if len(annotations_path) > 0:
+        for doc in read_brat_all_annotation_files(annotations_path):
+            texts += [annotation.text for annotation in doc.annotations]
+    if len(ontology_path) > 0:
+        ontology_parser = OntologyParser(ontology_path)
+        for entity_type in ontology_parser.type_to_root_entity:
+            texts += [label for label, _ in ontology_parser.get_labels(entity_type)]
+    return texts
+
+
+def benchmark_normalization(args: argparse.Namespace) -> int:
+    """
+        Compare the default (tokenizer only, blank pipeline) normalization with normalization running
+        the full reference pipeline: startup time, time per text and whether the normalized texts are identical.
+
+        Returns:
+            int: exit code, non-zero if any normalized text differs
+    """
+    texts = collect_texts(args.annotations_path, args.ontology_path)
+    print(f"Normalizing {len(texts)} texts")
+
+    load_time, fast = timed(TextProcessor)
+    fast_time, fast_texts = timed(lambda: [fast.normalize_text(text) for text in texts])
+    print(f"blank pipeline: startup {load_time:.2f}s, {1e6 * fast_time / len(texts):.1f}us per text")
+
+    load_time, reference = timed(TextProcessor, args.reference_model, tokenizer_only=False)
+    reference_time, reference_texts = timed(lambda: [reference.normalize_text(text) for text in texts])
+    print(f"{args.reference_model}: startup {load_time:.2f}s, {1e6 * reference_time / len(texts):.1f}us per text")
+    print(f"Speedup: {reference_time / fast_time:.1f}x")
+
+    mismatches = [(text, a, b) for text, a, b in zip(texts, fast_texts, reference_texts) if a != b]
+    for text, a, b in mismatches[:20]:
+        print(f"MISMATCH: {text!r}: {a!r} != {b!r}")
+    print(f"{len(mismatches)} mismatches")
+    return 1 if mismatches else 0
+
+
+def benchmark_minhash(args: argparse.Namespace) -> int:
+    """
+        Compare linking with the MinHash LSH index with the exhaustive Jaccard linking: recall of the exhaustive results,
+        number of scored candidates and time per mention.
+
+        Returns:
+            int: exit code
+    """
+    exhaustive = EntityLinker(args.ontology_path, args.annotations_path, '', '',
+                              min_acceptable_similarity=args.threshold,
+                              similarity_measure=SimilarityType.JACCARD,
+                              cache_dir=args.cache_dir)
+    mentions = list(dict.fromkeys(
+        (exhaustive.text_processor.normalize_text(annotation.text), get_entity_type(annotation.category))
+        for doc in exhaustive.annotated_docs for annotation in doc.annotations))
+    print(f"Linking {len(mentions)} unique mentions")
+
+    exhaustive_time, expected = timed(lambda: [exhaustive.link(text, entity_type) for text, entity_type in mentions])
+    print(f"exhaustive: {1e6 * exhaustive_time / len(mentions):.1f}us per mention")
+
+    approximate = EntityLinker(args.ontology_path, args.annotations_path, '', '',
+                               min_acceptable_similarity=args.threshold,
+                               similarity_measure=SimilarityType.MINHASH,
+                               cache_dir=args.cache_dir,
+                               minhash_permutations=args.minhash_permutations,
+                               minhash_recall=args.minhash_recall)
+    build_time, _ = timed(lambda: [approximate._prepare(entity_type) for entity_type in approximate.normalized_label_mapping])
+    minhash_time, found = timed(lambda: [approximate.link(text, entity_type) for text, entity_type in mentions])
+    print(f"minhash: index built in {build_time:.2f}s, {1e6 * minhash_time / len(mentions):.1f}us per mention")
+    for entity_type, index in approximate.minhash_indexes.items():
+        print(f"{entity_type.name}: {index.stats()}")
+
+    def key(item):
+        return (item.label, item.iri) if item is not None else None
+
+    linked = [position for position, item in enumerate(expected) if item is not None]
+    same = sum(key(found[position]) == key(expected[position]) for position in linked)
+    print(f"Recall: {same / len(linked) if linked else 1.0:.4f} ({same} of {len(linked)} linked mentions)")
+    print(f"Speedup: {exhaustive_time / minhash_time:.1f}x")
+    return 0
+
+
+def scan_all_labels(linker: EntityLinker, text: str, entity_type: EntityType) -> Optional[LabelWithIRI]:
+    """
+        Link a text by scoring every label (sharing a feature with it, for non-negative thresholds) in the label order,
+        the way `EntityLinker.link` did before size buckets were introduced.
+
+        Args:
+            linker (EntityLinker): linker with a set-based similarity measure
+            text (str): text to link
+            entity_type (EntityType): NER/BRAT entity type assigned to the text
+        Returns:
+            Optional[LabelWithIRI]: linked entity or None if nothing is linked
+    """
+    if entity_type not in linker.normalized_label_mapping:
+        return None
+    best_item, max_similarity = None, -1.0
+    text_preprocessed = linker.similarity_calculator.preprocess(text)
+    label_index = linker._get_label_index(entity_type)
+    if linker.min_acceptable_similarity >= 0:
+        candidates = label_index.candidates(text_preprocessed)
+    else:
+        candidates = zip(label_index.labels, label_index.representations)
+    for item, item_preprocessed in candidates:
+        current_label_similarity = linker.similarity_calculator.calculate(text_preprocessed, item_preprocessed)
+        if current_label_similarity > linker.min_acceptable_similarity and current_label_similarity >= max_similarity:
+            max_similarity = current_label_similarity
+            best_item = item
+        if current_label_similarity == 1.0:
+            break
+    return best_item
+
+
+def benchmark_pruning(args: argparse.Namespace) -> int:
+    """
+        Compare linking skipping size buckets of labels (see `LabelIndex.find_best`) with scoring all labels:
+        share of skipped labels, time per mention and whether the linked entities are identical.
+
+        Returns:
+            int: exit code, non-zero if any linked entity differs
+    """
+    linker = EntityLinker(args.ontology_path, args.annotations_path, '', '',
+                          similarity_measure=SimilarityCalculator.similarity_id_to_type(args.similarity),
+                          cache_dir=args.cache_dir)
+    mentions = list(dict.fromkeys(
+        (annotation.text, get_entity_type(annotation.category))
+        for doc in linker.annotated_docs for annotation in doc.annotations))
+    print(f"Linking {len(mentions)} unique mentions with {linker.similarity_measure.name} similarity")
+
+    mismatches = 0
+    for threshold in args.thresholds:
+        linker.min_acceptable_similarity = threshold
+        for entity_type in linker.normalized_label_mapping:
+            linker._prepare(entity_type)
+        for label_index in linker.label_indexes.values():
+            label_index.scored = label_index.skipped = 0
+        pruned_time, found = timed(lambda: [linker.link(text, entity_type) for text, entity_type in mentions])
+        scan_time, expected = timed(lambda: [scan_all_labels(linker, text, entity_type)
+                                             for text, entity_type in mentions])
+        scored = sum(label_index.scored for label_index in linker.label_indexes.values())
+        skipped = sum(label_index.skipped for label_index in linker.label_indexes.values())
+        differences = sum(a is not b and (a is None or b is None or a.iri != b.iri or a.label != b.label)
+                          for a, b in zip(found, expected))
+        mismatches += differences
+        print(f"threshold {threshold}: skipped {skipped / max(scored + skipped, 1):.1%} of {scored + skipped} "
+              f"candidate labels, {1e6 * pruned_time / len(mentions):.1f}us per mention "
+              f"(scanning all: {1e6 * scan_time / len(mentions):.1f}us), {differences} mismatches")
+    return 1 if mismatches else 0
+
+
+def benchmark_embedding(args: argparse.Namespace) -> int:
+    """
+        Compare linking with float32 label vectors with linking with 8-bit quantized ones: time of embedding labels,
+        size of label vectors, mentions linked per second and agreement of the linked entities.
+
+        Returns:
+            int: exit code
+    """
+    results = {}
+    for quantize in (False, True):
+        linker = EntityLinker(args.ontology_path, args.annotations_path, '', '',
+                              similarity_measure=SimilarityType.EMBEDDING,
+                              cache_dir=args.cache_dir,
+                              embedding_model=args.embedding_model,
+                              quantize_embeddings=quantize)
+        mentions = list(dict.fromkeys(
+            (linker.text_processor.normalize_text(annotation.text), get_entity_type(annotation.category))
+            for doc in linker.annotated_docs for annotation in doc.annotations))
+        build_time, _ = timed(lambda: [linker._prepare(entity_type) for entity_type in linker.normalized_label_mapping])
+        by_type = {entity_type: [text for text, other in mentions if other == entity_type]
+                   for entity_type in dict.fromkeys(entity_type for _, entity_type in mentions)}
+        link_time, linked = timed(lambda: {entity_type: linker.link_many(texts, entity_type)
+                                           for entity_type, texts in by_type.items()})
+        found = [item for entity_type in by_type for item in linked[entity_type]]
+        size = sum(matcher.vectors.nbytes for matcher in linker.matchers.values())
+        name = "int8" if quantize else "float32"
+        print(f"{name}: label vectors loaded (or embedded) in {build_time:.2f}s, {size / 2 ** 20:.1f}MB, "
+              f"{len(mentions) / link_time:.0f} mentions/s ({len(mentions)} unique mentions)")
+        results[name] = found
+
+    def key(item):
+        return (item.label, item.iri) if item is not None else None
+
+    same = sum(key(a) == key(b) for a, b in zip(results["float32"], results["int8"]))
+    print(f"Agreement of int8 with float32: {same / max(len(results['float32']), 1):.4f}")
+    return 0
+
+
+def iter_taisti_rows(file_path: str) -> Iterator[AnnotatedDoc]:
+    """
+        Read food annotations of a TAISTI CSV dataset row by row, parsing JSON of each row separately,
+        the way `iter_taisti_dataset_csv` did before entities were read into columns.
+
+        Args:
+            file_path (str): Path to a TAISTI CSV file
+        Returns:
+            Iterator[AnnotatedDoc]: parsed annotations
+    """
+    idx = 0
+    for df in pd.read_csv(file_path, usecols=['ingredients_entities'], chunksize=1000):
+        for _, row in df.iterrows():
+            entities = json.loads(row['ingredients_entities'])
+            ner_annotations = []
+            for j, entity in enumerate(entities):
+                if 'food' in entity['type'].lower():
+                    ner_annotations.append(Annotation(
+                        id=str(j), file_id=idx, start=entity['start'],
+                        end=entity['end'], category=entity['type'],
+                        text=entity['entity'], source=AnnotationSource.TAISTI_CSV))
+            yield AnnotatedDoc(id=idx, path=file_path, text='', annotations=ner_annotations)
+            idx += 1
+
+
+def benchmark_taisti(args: argparse.Namespace) -> int:
+    """
+        Compare reading a TAISTI CSV dataset row by row with reading its entities into columns
+        (see `iter_taisti_entities`): docs and entities read per second and whether the annotations are identical.
+
+        Returns:
+            int: exit code, non-zero if any doc differs
+    """
+    row_time, expected = timed(lambda: list(iter_taisti_rows(args.taisti_csv)))
+    entities_count = sum(len(doc.annotations) for doc in expected)
+    print(f"Reading {len(expected)} docs with {entities_count} food entities")
+    print(f"row by row: {row_time:.2f}s, {len(expected) / row_time:.0f} docs/s")
+
+    column_time, chunks = timed(lambda: list(iter_taisti_entities(args.taisti_csv, args.chunk_size)))
+    print(f"columns: {column_time:.2f}s, {len(expected) / column_time:.0f} docs/s, "
+          f"{sum(len(chunk.doc_ids) for chunk in chunks) / column_time:.0f} entities/s "
+          f"(speedup {row_time / column_time:.1f}x, JSON parsed with {'orjson' if 'orjson' in sys.modules else 'json'})")
+    del chunks
+
+    doc_time, found = timed(lambda: list(iter_taisti_dataset_csv(args.taisti_csv)))
+    print(f"columns as AnnotatedDocs: {doc_time:.2f}s, {len(expected) / doc_time:.0f} docs/s "
+          f"(speedup {row_time / doc_time:.1f}x)")
+
+    mismatches = sum(a != b for a, b in zip(expected, found)) + abs(len(expected) - len(found))
+    print(f"{mismatches} mismatches")
+    return 1 if mismatches else 0
+
+
+@dataclass
+class DictAnnotation:
+    """ `Annotation` as it was before slots, with a __dict__ per instance (the reference of `benchmark_memory`) """
+    id: str
+    file_id: int
+    start: int
+    end: int
+    category: str
+    text: str
+    source: AnnotationSource
+
+
+@dataclass
+class DictAnnotatedDoc:
+    """ `AnnotatedDoc` as it was before slots """
+    id: int
+    path: str
+    text: str
+    annotations: List[DictAnnotation]
+
+
+# representations of annotated docs compared by `benchmark_memory`
+MEMORY_CASES = ["dataclasses", "slots", "table"]
+
+
+def read_annotations(representation: str, file_path: str) -> Any:
+    """
+        Args:
+            representation (str): one of `MEMORY_CASES`
+            file_path (str): Path to a TAISTI CSV file
+        Returns:
+            Any: docs of the file as a list of `DictAnnotatedDoc`s, a list of (slotted) `AnnotatedDoc`s
+                 or an `AnnotationTable`
+    """
+    if representation == "dataclasses":
+        return [
+            DictAnnotatedDoc(doc.id, doc.path, doc.text, [
+                DictAnnotation(annotation.id, annotation.file_id, annotation.start, annotation.end,
+                               annotation.category, annotation.text, annotation.source)
+                for annotation in doc.annotations
+            ])
+            for doc in iter_taisti_dataset_csv(file_path)
+        ]
+    elif representation == "slots":
+        return list(iter_taisti_dataset_csv(file_path))
+    table = AnnotationTable()
+    for chunk in iter_taisti_entities(file_path):
+        table.append_taisti_entities(chunk, file_path)
+    return table
+
+
+def run_memory_case(representation: str, file_path: str) -> Dict[str, Any]:
+    """
+        Read docs in a single representation and measure the memory it takes (run with `run_isolated`).
+
+        Args:
+            representation (str): one of `MEMORY_CASES`
+            file_path (str): Path to a TAISTI CSV file
+        Returns:
+            Dict[str, Any]: reading time (with memory traced), memory retained by the docs, peak of traced memory
+                            while reading them and the peak RSS of the process, in megabytes
+    """
+    tracemalloc.start()
+    elapsed, docs = timed(read_annotations, representation, file_path)
+    retained, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {
+        "seconds": elapsed,
+        "retained_mb": retained / 2 ** 20,
+        "peak_mb": peak / 2 ** 20,
+        "peak_rss_mb": get_peak_rss_mb(),
+        "docs": len(docs),
+    }
+
+
+def benchmark_memory(args: argparse.Namespace) -> int:
+    """
+        Compare the memory taken by docs of a TAISTI CSV dataset kept as dataclasses with a __dict__ per instance,
+        slotted dataclasses and an `AnnotationTable`, each read in a separate process, and check that the table
+        iterates the same docs as the list.
+
+        Returns:
+            int: exit code, non-zero if any doc differs
+    """
+    results = {representation: run_isolated(run_memory_case, representation, args.taisti_csv)
+               for representation in MEMORY_CASES}
+    reference = results["dataclasses"]
+    for representation, result in results.items():
+        print(f"{representation}: {result['docs']} docs read in {result['seconds']:.2f}s, "
+              f"retained {result['retained_mb']:.1f}MB ({reference['retained_mb'] / result['retained_mb']:.1f}x less), "
+              f"peak {result['peak_mb']:.1f}MB ({reference['peak_mb'] / result['peak_mb']:.1f}x less), "
+              f"peak RSS {result['peak_rss_mb']:.1f}MB")
+
+    expected = read_annotations("slots", args.taisti_csv)
+    found = read_annotations("table", args.taisti_csv)
+    mismatches = sum(a != b for a, b in zip(expected, found)) + abs(len(expected) - len(found))
+    print(f"{mismatches} mismatches")
+    return 1 if mismatches else 0
+
+
+def get_peak_rss_mb() -> float:
+    """
+        Returns:
+            float: peak resident set size of the current process in megabytes
+    """
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # kilobytes on Linux, bytes on macOS
+    return peak / 2 ** 20 if sys.platform == "darwin" else peak / 2 ** 10
+
+
+def read_golden_standard(path: str) -> List[Tuple[str, str, Optional[str]]]:
+    """
+        Read mentions linked by annotators (Prodigy choice annotations, one JSON object per line).
+
+        Args:
+            path (str): path to a JSONL file
+        Returns:
+            List[Tuple[str, str, Optional[str]]]: text, category and the accepted IRI of each mention
+                                                  (None if annotators found no entity to link to)
+    """
+    mentions = []
+    with open(path) as f:
+        for line in f:
+            if len(line.strip()) == 0:
+                continue
+            task = json.loads(line)
+            if task.get("answer") != "accept":
+                continue
+            accepted = task.get("accept", [])
+            iri = OBO_NAMESPACE + accepted[0][len("obo."):] if accepted and accepted[0].startswith("obo.") else None
+            for span in task["spans"]:
+                mentions.append((span["text"], span["label"], iri))
+    return mentions
+
+
+def evaluate_links(linked: List[Optional[LabelWithIRI]], expected: List[Optional[str]]) -> Dict[str, Any]:
+    """
+        Args:
+            linked (List[Optional[LabelWithIRI]]): entity linked to each mention (or None)
+            expected (List[Optional[str]]): IRI each mention should be linked to (or None if it should not be linked)
+        Returns:
+            Dict[str, Any]: precision and recall of linked IRIs, their F1 score and the accuracy of all decisions
+    """
+    iris = [item.iri if item is not None else None for item in linked]
+    correct = sum(iri is not None and iri == gold for iri, gold in zip(iris, expected))
+    predicted = sum(iri is not None for iri in iris)
+    relevant = sum(gold is not None for gold in expected)
+    precision = correct / predicted if predicted > 0 else 0.0
+    recall = correct / relevant if relevant > 0 else 0.0
+    return {
+        "mentions": len(expected),
+        "linked": predicted,
+        "correct": correct,
+        "precision": precision,
+        "recall": recall,
+        "f1": 2 * precision * recall / (precision + recall) if precision + recall > 0 else 0.0,
+        "accuracy": sum(iri == gold for iri, gold in zip(iris, expected)) / len(expected) if expected else 0.0,
+    }
+
+
+def run_label_mapping_build(options: Dict[str, Any]) -> Dict[str, Any]:
+    """
+        Load (or build, if not cached yet) label mappings of all categories, timing stages of the build.
+
+        Args:
+            options (Dict[str, Any]): suite options (see `benchmark_suite`)
+        Returns:
+            Dict[str, Any]: elapsed time of stages (in seconds), numbers of labels and the peak RSS
+    """
+    linker = EntityLinker(options["ontology_path"], '', '', '',
+                          cache_dir=options["cache_dir"],
+                          category_config_path=options["category_config"])
+    elapsed, mappings = timed(lambda: {
+        entity_type: linker.normalized_label_mapping[entity_type] for entity_type in linker.normalized_label_mapping
+    })
+    return {
+        "stages": {"label_mapping": elapsed, **linker.timings},
+        "labels": {entity_type.name: len(labels) for entity_type, labels in mappings.items()},
+        "peak_rss_mb": get_peak_rss_mb(),
+    }
+
+
+def run_suite_case(name: str, options: Dict[str, Any]) -> Dict[str, Any]:
+    """
+        Link annotated docs and the golden standard with the settings of a case, timing each stage separately.
+        Normalization and link caches are disabled, so that every stage does its whole work.
+
+        Args:
+            name (str): name of the case (see `SUITE_CASES`)
+            options (Dict[str, Any]): suite options (see `benchmark_suite`)
+        Returns:
+            Dict[str, Any]: elapsed time of stages (in seconds), throughput, linking latency percentiles
+                            (in milliseconds), the peak RSS and the evaluation on the golden standard
+    """
+    linker = EntityLinker(options["ontology_path"], options["annotations_path"], '', '',
+                          min_acceptable_similarity=options["threshold"],
+                          normalization_cache_size=0,
+                          cache_dir=options["cache_dir"],
+                          link_cache_size=0,
+                          embedding_model=options["embedding_model"],
+                          category_config_path=options["category_config"],
+                          quiet=True,
+                          **SUITE_CASES[name])
+    stages = {}
+    stages["label_mapping_load"], _ = timed(
+        lambda: [linker.normalized_label_mapping[entity_type] for entity_type in linker.normalized_label_mapping])
+    stages["index_build"], _ = timed(
+        lambda: [linker._prepare(entity_type) for entity_type in linker.normalized_label_mapping])
+
+    mentions, _ = linker._collect_mentions()
+    unique_mentions = list(mentions)
+    stages["normalization"], normalized_texts = timed(linker.normalize_mentions, unique_mentions)
+    stages["scoring"], resolved = timed(linker._resolve_mentions, unique_mentions, normalized_texts)
+
+    def write_rows():
+        with tempfile.TemporaryFile("w") as f:
+            writer = csv.writer(f)
+            for docs in linker._iter_doc_chunks():
+                linker._write_rows(docs, resolved, writer)
+    stages["writing"], _ = timed(write_rows)
+
+    # latency of linking a single mention (including its normalization), as a linking service would do
+    latencies = [timed(linker.link_mentions, [mention])[0]
+                 for mention in unique_mentions[:options["latency_sample"]]]
+
+    golden_standard = read_golden_standard(options["golden_standard_path"])
+    linked = linker.link_mentions([(text, get_entity_type(category)) for text, category, _ in golden_standard])
+
+    linking_time = stages["normalization"] + stages["scoring"]
+    annotations_count = sum(mentions.values())
+    return {
+        "name": name,
+        "similarity": linker.similarity_measure.name,
+        "threshold": linker.min_acceptable_similarity,
+        "stages": stages,
+        "annotations": annotations_count,
+        "unique_mentions": len(unique_mentions),
+        "mentions_per_s": len(unique_mentions) / linking_time if linking_time > 0 else 0.0,
+        "annotations_per_s": annotations_count / (linking_time + stages["writing"])
+        if linking_time + stages["writing"] > 0 else 0.0,
+        "latency_ms": {
+            "mentions": len(latencies),
+            "p50": float(np.percentile(latencies, 50)) * 1000.0 if latencies else 0.0,
+            "p99": float(np.percentile(latencies, 99)) * 1000.0 if latencies else 0.0,
+        },
+        "peak_rss_mb": get_peak_rss_mb(),
+        "golden_standard": evaluate_links([item for item, _ in linked], [iri for _, _, iri in golden_standard]),
+    }
+
+
+def run_isolated(function: Callable, *args) -> Any:
+    """
+        Run a function in a new (spawned) process, so that its peak RSS and caches are not shared with other runs.
+
+        Args:
+            function (Callable): module-level function to run
+        Returns:
+            Any: the value returned by the function
+    """
+    with multiprocessing.get_context("spawn").Pool(1) as pool:
+        return pool.apply(function, args)
+
+
+def find_regressions(results: Dict[str, Any], baseline: Dict[str, Any], max_regression: float) -> List[str]:
+    """
+        Args:
+            results (Dict[str, Any]): results of the suite
+            baseline (Dict[str, Any]): results of a previous run of the suite (e.g., of the previous release)
+            max_regression (float): largest acceptable relative drop of throughput
+        Returns:
+            List[str]: descriptions of cases whose throughput dropped more than acceptable
+    """
+    previous = {case["name"]: case for case in baseline.get("cases", []) if "error" not in case}
+    regressions = []
+    for case in results["cases"]:
+        if "error" in case or case["name"] not in previous:
+            continue
+        before, after = previous[case["name"]]["mentions_per_s"], case["mentions_per_s"]
+        if after < before * (1.0 - max_regression):
+            regressions.append(f"{case['name']}: {after:.0f} mentions/s, {before:.0f} mentions/s in the baseline")
+    return regressions
+
+
+def benchmark_suite(args: argparse.Namespace) -> int:
+    """
+        Time stages of linking (ontology load, label mapping build, normalization, scoring and writing) for each
+        similarity measure and backend, with throughput, latency percentiles, peak RSS and precision/recall
+        on the golden standard, and store the results as JSON. Each case runs in a separate process.
+
+        Returns:
+            int: exit code, non-zero if throughput regressed compared with the baseline
+    """
+    options = {
+        "ontology_path": args.ontology_path,
+        "annotations_path": args.annotations_path,
+        "golden_standard_path": args.golden_standard,
+        "cache_dir": args.cache_dir if len(args.cache_dir) > 0 else tempfile.mkdtemp(prefix="taisti_linker_benchmark"),
+        "category_config": args.category_config,
+        "threshold": args.threshold,
+        "embedding_model": args.embedding_model,
+        "latency_sample": args.latency_sample,
+    }
+    results: Dict[str, Any] = {
+        "version": __version__,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "options": options,
+    }
+    print(f"Building label mappings in {options['cache_dir']}")
+    results["build"] = run_isolated(run_label_mapping_build, options)
+    print(f"build: {json.dumps(results['build'])}")
+
+    results["cases"] = []
+    for name in args.cases:
+        print(f"Running case {name}")
+        try:
+            case = run_isolated(run_suite_case, name, options)
+        except Exception as e:
+            print(f"WARNING: Case {name} failed: {e}")
+            case = {"name": name, "error": str(e)}
+        results["cases"].append(case)
+
+    with open(args.output, "w") as f:
+        json.dump(results, f, indent=2)
+
+    print(f"{'case':8} {'mentions/s':>10} {'p50 ms':>8} {'p99 ms':>8} {'RSS MB':>8} {'precision':>9} {'recall':>7}")
+    for case in results["cases"]:
+        if "error" in case:
+            print(f"{case['name']:8} failed: {case['error']}")
+            continue
+        print(f"{case['name']:8} {case['mentions_per_s']:10.0f} {case['latency_ms']['p50']:8.2f} "
+              f"{case['latency_ms']['p99']:8.2f} {case['peak_rss_mb']:8.0f} "
+              f"{case['golden_standard']['precision']:9.3f} {case['golden_standard']['recall']:7.3f}")
+    print(f"Results written to {args.output}")
+
+    if len(args.baseline) > 0:
+        with open(args.baseline) as f:
+            regressions = find_regressions(results, json.load(f), args.max_regression)
+        for regression in regressions:
+            print(f"REGRESSION: {regression}")
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser()
+    subparsers = parser.add_subparsers(dest='benchmark', required=True)
+
+    normalization = subparsers.add_parser(
+        'normalization', help='Compare the blank pipeline normalization with the full spaCy pipeline')
+    normalization.add_argument('-ap', '--annotations_path',
+                               help='Path to BRAT annotations folder',
+                               type=str,
+                               default='../data')
+    normalization.add_argument('-op', '--ontology_path',
+                               help='Path to ontology which labels should be normalized as well',
+                               type=str,
+                               default='')
+    normalization.add_argument('-rm', '--reference_model',
+                               help='spaCy pipeline to compare with',
+                               type=str,
+                               default='en_core_web_trf')
+    normalization.set_defaults(run=benchmark_normalization)
+
+    minhash = subparsers.add_parser(
+        'minhash', help='Compare MinHash LSH linking with the exhaustive Jaccard linking')
+    minhash.add_argument('-op', '--ontology_path',
+                         help='Path to an ontology',
+                         type=str,
+                         default='../foodon.owl')
+    minhash.add_argument('-ap', '--annotations_path',
+                         help='Path to BRAT annotations folder',
+                         type=str,
+                         default='../data')
+    minhash.add_argument('-t', '--threshold',
+                         help='Similarity a label has to exceed to be linked',
+                         type=float,
+                         default=0.5)
+    minhash.add_argument('-mp', '--minhash_permutations',
+                         help='Number of MinHash values of a signature',
+                         type=int,
+                         default=128)
+    minhash.add_argument('-mr', '--minhash_recall',
+                         help='Required probability of finding a label exceeding the threshold',
+                         type=float,
+                         default=0.95)
+    minhash.add_argument('-cd', '--cache_dir',
+                         help='Directory caching label mappings',
+                         type=str,
+                         default='')
+    minhash.set_defaults(run=benchmark_minhash)
+
+    pruning = subparsers.add_parser(
+        'pruning', help='Compare linking skipping size buckets of labels with scoring all labels')
+    pruning.add_argument('-op', '--ontology_path',
+                         help='Path to an ontology',
+                         type=str,
+                         default='../foodon.owl')
+    pruning.add_argument('-ap', '--annotations_path',
+                         help='Path to BRAT annotations folder',
+                         type=str,
+                         default='../data')
+    pruning.add_argument('-s', '--similarity',
+                         help='Set-based similarity measure: J: Jaccard, E: Everygrams',
+                         type=str,
+                         default='J')
+    pruning.add_argument('-t', '--thresholds',
+                         help='Similarity thresholds to compare at',
+                         type=float,
+                         nargs='+',
+                         default=[0.5, 0.0, -1.0])
+    pruning.add_argument('-cd', '--cache_dir',
+                         help='Directory caching label mappings',
+                         type=str,
+                         default='')
+    pruning.set_defaults(run=benchmark_pruning)
+
+    embedding = subparsers.add_parser(
+        'embedding', help='Compare linking with float32 and 8-bit quantized label vectors')
+    embedding.add_argument('-op', '--ontology_path',
+                           help='Path to an ontology',
+                           type=str,
+                           default='../foodon.owl')
+    embedding.add_argument('-ap', '--annotations_path',
+                           help='Path to BRAT annotations folder',
+                           type=str,
+                           default='../data')
+    embedding.add_argument('-em', '--embedding_model',
+                           help='Locally installed spaCy pipeline with word vectors',
+                           type=str,
+                           default='en_core_web_lg')
+    embedding.add_argument('-cd', '--cache_dir',
+                           help='Directory caching label mappings and label vectors',
+                           type=str,
+                           default='')
+    embedding.set_defaults(run=benchmark_embedding)
+
+    taisti = subparsers.add_parser(
+        'taisti', help='Compare reading a TAISTI CSV dataset row by row with reading its entities into columns')
+    taisti.add_argument('-taisti', '--taisti_csv',
+                        help='Path to a TAISTI CSV dataset',
+                        type=str,
+                        required=True)
+    taisti.add_argument('-cs', '--chunk_size',
+                        help='Number of rows read at once',
+                        type=int,
+                        default=1000)
+    taisti.set_defaults(run=benchmark_taisti)
+
+    memory = subparsers.add_parser(
+        'memory', help='Compare the memory taken by annotated docs as dataclasses, slotted dataclasses and columns')
+    memory.add_argument('-taisti', '--taisti_csv',
+                        help='Path to a TAISTI CSV dataset',
+                        type=str,
+                        required=True)
+    memory.set_defaults(run=benchmark_memory)
+
+    suite = subparsers.add_parser(
+        'suite', help='Time stages of linking with each similarity measure and evaluate it on the golden standard')
+    suite.add_argument('-op', '--ontology_path',
+                       help='Path to an ontology',
+                       type=str,
+                       default='../foodon.owl')
+    suite.add_argument('-ap', '--annotations_path',
+                       help='Path to BRAT annotations folder',
+                       type=str,
+                       default='../data')
+    suite.add_argument('-gs', '--golden_standard',
+                       help='Mentions linked by annotators (Prodigy JSONL)',
+                       type=str,
+                       default='../golden_standard/annotations152.jsonl')
+    suite.add_argument('-c', '--cases',
+                       help=f'Cases to run: {", ".join(SUITE_CASES)}',
+                       type=str,
+                       nargs='+',
+                       choices=list(SUITE_CASES),
+                       default=list(SUITE_CASES))
+    suite.add_argument('-t', '--threshold',
+                       help='Similarity a label has to exceed to be linked',
+                       type=float,
+                       default=0.5)
+    suite.add_argument('-em', '--embedding_model',
+                       help='Locally installed spaCy pipeline with word vectors (V cases)',
+                       type=str,
+                       default='en_core_web_lg')
+    suite.add_argument('-cd', '--cache_dir',
+                       help='Directory caching label mappings (a new temporary directory by default, '
+                            'so that label mappings are built from scratch)',
+                       type=str,
+                       default='')
+    suite.add_argument('-cc', '--category_config',
+                       help='JSON file relating entity types to roots of allowed taxonomies',
+                       type=str,
+                       default='')
+    suite.add_argument('-ls', '--latency_sample',
+                       help='Number of mentions linked one by one to measure latency',
+                       type=int,
+                       default=1000)
+    suite.add_argument('-o', '--output',
+                       help='Path to a JSON file the results are written to',
+                       type=str,
+                       default='benchmark_results.json')
+    suite.add_argument('-b', '--baseline',
+                       help='Results of a previous run to compare throughput with (e.g., of the previous release)',
+                       type=str,
+                       default='')
+    suite.add_argument('-mr', '--max_regression',
+                       help='Largest acceptable relative drop of throughput compared with the baseline',
+                       type=float,
+                       default=0.1)
+    suite.set_defaults(run=benchmark_suite)
+
+    args = parser.parse_args()
+    sys.exit(args.run(args))
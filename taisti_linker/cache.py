@@ -0,0 +1,642 @@
+from collections import OrderedDict
+from enum import Enum
+from taisti_linker.commons import LabelWithIRI
+from taisti_linker.label_store import LabelStore
+from typing import Any, Callable, Dict, Hashable, Iterable, List, Optional, Tuple, Union
+import ast
+import glob
+import hashlib
+import json
+import os
+import pickle
+import shutil
+import sqlite3
+import tempfile
+import threading
+
+
+def get_default_cache_dir() -> str:
+    """
+        Returns:
+            str: cache directory set by TAISTI_LINKER_CACHE_DIR environment variable, ~/.cache/taisti_linker by default
+    """
+    return os.environ.get(
+        "TAISTI_LINKER_CACHE_DIR", os.path.join(os.path.expanduser("~"), ".cache", "taisti_linker"))
+
+
+def atomic_write(path: str, data: bytes) -> None:
+    """
+        Write a file atomically: readers see either the previous content or the complete new one.
+
+        Args:
+            path (str): path to a file
+            data (bytes): content to write
+    """
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".tmp-")
+    try:
+        # mkstemp creates private files, cached files are meant to be shared
+        os.chmod(tmp_path, 0o644)
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+class LRUCache:
+    """ In-memory cache bounded by the number of entries, evicting least recently used ones. Tracks hits and misses. """
+
+    def __init__(self, max_size: Optional[int] = None):
+        """
+            Args:
+                max_size (Optional[int]): maximal number of stored entries, unbounded if None, disabled if 0
+        """
+        self.max_size = max_size
+        self.entries: OrderedDict = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """
+            Return a value stored for a key (marking it as recently used) or a default value if the key is missing.
+
+            Args:
+                key (Hashable): key to look up
+                default (Any): value returned for missing keys
+            Returns:
+                Any: stored value or default
+        """
+        if key in self.entries:
+            self.hits += 1
+            self.entries.move_to_end(key)
+            return self.entries[key]
+        self.misses += 1
+        return default
+
+    def put(self, key: Hashable, value: Any) -> None:
+        """
+            Store a value for a key, evicting the least recently used entries if the cache is full.
+
+            Args:
+                key (Hashable): key
+                value (Any): value to store
+        """
+        if self.max_size == 0:
+            return
+        self.entries[key] = value
+        self.entries.move_to_end(key)
+        if self.max_size is not None:
+            while len(self.entries) > self.max_size:
+                self.entries.popitem(last=False)
+                self.evictions += 1
+
+    def pop(self, key: Hashable, default: Any = None) -> Any:
+        return self.entries.pop(key, default)
+
+    def clear(self) -> None:
+        self.entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """
+            Returns:
+                Dict[str, Any]: size of the cache, number of hits, misses, evictions and the hit rate
+        """
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self.entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": self.hits / lookups if lookups > 0 else 0.0,
+        }
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self.entries
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+
+class PersistentStore:
+    """
+        Key-value store persisted in a SQLite database, so that its content is shared across runs.
+        Entries are separated into namespaces (e.g., normalization settings), values are pickled.
+    """
+
+    def __init__(self, path: str, namespace: str):
+        """
+            Args:
+                path (str): path to a SQLite database file (created if missing)
+                namespace (str): namespace of the stored entries
+        """
+        directory = os.path.dirname(path)
+        if len(directory) > 0:
+            os.makedirs(directory, exist_ok=True)
+        self.path = path
+        self.namespace = namespace
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+        self.connection = sqlite3.connect(path, check_same_thread=False)
+        self.connection.execute(
+            "CREATE TABLE IF NOT EXISTS entries "
+            "(namespace TEXT, key TEXT, value BLOB, PRIMARY KEY (namespace, key))")
+        self.connection.commit()
+
+    def get_many(self, keys: Iterable[str]) -> Dict[str, Any]:
+        """
+            Look up many keys at once.
+
+            Args:
+                keys (Iterable[str]): keys to look up
+            Returns:
+                Dict[str, Any]: values of the keys present in the store
+        """
+        keys = list(keys)
+        result = {}
+        with self.lock:
+            # SQLite limits the number of query parameters
+            for start in range(0, len(keys), 500):
+                chunk = keys[start:start + 500]
+                rows = self.connection.execute(
+                    f"SELECT key, value FROM entries WHERE namespace = ? AND key IN ({','.join('?' * len(chunk))})",
+                    [self.namespace] + chunk)
+                for key, value in rows:
+                    result[key] = pickle.loads(value)
+        self.hits += len(result)
+        self.misses += len(keys) - len(result)
+        return result
+
+    def put_many(self, items: Iterable[Tuple[str, Any]]) -> None:
+        """
+            Store many key-value pairs at once, overwriting existing ones.
+
+            Args:
+                items (Iterable[Tuple[str, Any]]): pairs to store
+        """
+        rows = [(self.namespace, key, pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)) for key, value in items]
+        with self.lock:
+            self.connection.executemany(
+                "INSERT OR REPLACE INTO entries (namespace, key, value) VALUES (?, ?, ?)", rows)
+            self.connection.commit()
+
+    def delete_many(self, keys: Iterable[str]) -> None:
+        """
+            Remove entries of many keys at once.
+
+            Args:
+                keys (Iterable[str]): keys to remove
+        """
+        with self.lock:
+            self.connection.executemany(
+                "DELETE FROM entries WHERE namespace = ? AND key = ?",
+                [(self.namespace, key) for key in keys])
+            self.connection.commit()
+
+    def items(self) -> List[Tuple[str, Any]]:
+        """
+            Returns:
+                List[Tuple[str, Any]]: all key-value pairs of the namespace
+        """
+        with self.lock:
+            rows = self.connection.execute(
+                "SELECT key, value FROM entries WHERE namespace = ?", [self.namespace]).fetchall()
+        return [(key, pickle.loads(value)) for key, value in rows]
+
+    def clear(self) -> None:
+        """ Remove all entries of the namespace """
+        with self.lock:
+            self.connection.execute("DELETE FROM entries WHERE namespace = ?", [self.namespace])
+            self.connection.commit()
+
+    def get(self, key: str, default: Any = None) -> Any:
+        return self.get_many([key]).get(key, default)
+
+    def put(self, key: str, value: Any) -> None:
+        self.put_many([(key, value)])
+
+    def stats(self) -> Dict[str, Any]:
+        """
+            Returns:
+                Dict[str, Any]: number of hits and misses of the store
+        """
+        return {"hits": self.hits, "misses": self.misses}
+
+    def close(self) -> None:
+        with self.lock:
+            self.connection.close()
+
+
+class LinkCache:
+    """
+        Cache of link results keyed by (normalized text, entity type, similarity type, threshold), so that a result
+        is reused only for the same category and linking settings. Results are kept in a bounded in-memory LRU cache
+        and (optionally) persisted in `PersistentStore` namespaces, so that later runs start with results of the previous ones.
+    """
+
+    # marks keys missing from the cache, as None is a valid (not linkable) result
+    MISSING = object()
+
+    def __init__(self, max_size: Optional[int] = 100000, path: Optional[str] = None,
+                 namespace: Union[str, Callable[[Tuple], str]] = ""):
+        """
+            Args:
+                max_size (Optional[int]): number of results kept in memory (unbounded if None, 0 disables)
+                path (Optional[str]): path to a SQLite file persisting results across runs (None disables)
+                namespace (Union[str, Callable[[Tuple], str]]): namespace of persisted results, or a function choosing
+                                                                it for a key; it should identify the label mapping
+                                                                a result was linked to
+        """
+        self.memory = LRUCache(max_size)
+        self.path = path
+        self.get_namespace = namespace if callable(namespace) else (lambda key: namespace)
+        self.stores: Dict[str, PersistentStore] = {}
+
+    def get(self, key: Tuple, default: Any = MISSING) -> Any:
+        return self.get_many([key]).get(key, default)
+
+    def get_many(self, keys: Iterable[Tuple]) -> Dict[Tuple, Optional[LabelWithIRI]]:
+        """
+            Look up many keys at once, in memory first and then in the persistent store.
+
+            Args:
+                keys (Iterable[Tuple]): (normalized text, entity type, similarity type, threshold) keys
+            Returns:
+                Dict[Tuple, Optional[LabelWithIRI]]: cached results of the keys present in the cache
+        """
+        result = {}
+        missing = []
+        for key in keys:
+            value = self.memory.get(key, self.MISSING)
+            if value is self.MISSING:
+                missing.append(key)
+            else:
+                result[key] = value
+
+        if self.path is not None and len(missing) > 0:
+            for namespace, namespace_keys in self._group_by_namespace(missing).items():
+                store_keys = {self._get_store_key(key): key for key in namespace_keys}
+                for store_key, value in self._get_store(namespace).get_many(store_keys).items():
+                    key = store_keys[store_key]
+                    result[key] = LabelWithIRI(*value) if value is not None else None
+                    self.memory.put(key, result[key])
+        return result
+
+    def put_many(self, items: Iterable[Tuple[Tuple, Optional[LabelWithIRI]]]) -> None:
+        """
+            Store many results at once.
+
+            Args:
+                items (Iterable[Tuple[Tuple, Optional[LabelWithIRI]]]): pairs of keys and linked entities (or None)
+        """
+        items = dict(items)
+        for key, value in items.items():
+            self.memory.put(key, value)
+        if self.path is not None and len(items) > 0:
+            for namespace, keys in self._group_by_namespace(items).items():
+                self._get_store(namespace).put_many(
+                    (self._get_store_key(key),
+                     (items[key].label, items[key].iri, items[key].normalized_label) if items[key] is not None else None)
+                    for key in keys)
+
+    def put(self, key: Tuple, value: Optional[LabelWithIRI]) -> None:
+        self.put_many([(key, value)])
+
+    def migrate(self, source_namespace: str, target_namespace: str, keep: Callable[[Tuple], bool],
+                key_types: Tuple[type, ...]) -> Tuple[int, int]:
+        """
+            Move persisted results of a namespace (e.g., of a previous label mapping) into another one,
+            keeping only those still valid. Entries of the source namespace are removed.
+
+            Args:
+                source_namespace (str): namespace to move results from
+                target_namespace (str): namespace to move results to
+                keep (Callable[[Tuple], bool]): function telling whether a result of a given key is still valid
+                key_types (Tuple[type, ...]): types of key parts (enums are restored by name, others with literal_eval)
+            Returns:
+                Tuple[int, int]: number of kept and dropped results
+        """
+        if self.path is None or source_namespace == target_namespace:
+            return 0, 0
+        source = PersistentStore(self.path, source_namespace)
+        items = source.items()
+        kept = [(store_key, value) for store_key, value in items if keep(self._parse_store_key(store_key, key_types))]
+        self._get_store(target_namespace).put_many(kept)
+        source.clear()
+        source.close()
+        return len(kept), len(items) - len(kept)
+
+    def stats(self) -> Dict[str, Any]:
+        """
+            Returns:
+                Dict[str, Any]: hit/miss statistics of the in-memory cache and the persistent store of link results
+        """
+        stats = {"memory": self.memory.stats()}
+        if self.path is not None:
+            stats["store"] = {
+                "hits": sum(store.hits for store in self.stores.values()),
+                "misses": sum(store.misses for store in self.stores.values()),
+            }
+        return stats
+
+    def close(self) -> None:
+        for store in self.stores.values():
+            store.close()
+        self.stores.clear()
+
+    def _get_store(self, namespace: str) -> PersistentStore:
+        if namespace not in self.stores:
+            self.stores[namespace] = PersistentStore(self.path, namespace)
+        return self.stores[namespace]
+
+    def _group_by_namespace(self, keys: Iterable[Tuple]) -> Dict[str, List[Tuple]]:
+        groups: Dict[str, List[Tuple]] = {}
+        for key in keys:
+            groups.setdefault(self.get_namespace(key), []).append(key)
+        return groups
+
+    def __contains__(self, key: Tuple) -> bool:
+        return key in self.memory
+
+    def __len__(self) -> int:
+        return len(self.memory)
+
+    @staticmethod
+    def _get_store_key(key: Tuple) -> str:
+        return "\t".join(part.name if isinstance(part, Enum) else repr(part) for part in key)
+
+    @staticmethod
+    def _parse_store_key(store_key: str, key_types: Tuple[type, ...]) -> Tuple:
+        return tuple(key_type[part] if issubclass(key_type, Enum) else ast.literal_eval(part)
+                     for part, key_type in zip(store_key.split("\t"), key_types))
+
+
+class LabelMappingCache:
+    """
+        Content-addressed cache of label mappings (see `LabelStore`). Each mapping is stored under a key derived from the hash
+        of the ontology file and all the settings it was built with, so a changed ontology or normalizer
+        never reuses a stale mapping. Entries superseded by a rebuild (built with the same settings from a previous
+        content of the ontology) are removed, entries of other settings are kept up to a limit.
+    """
+
+    def __init__(self, cache_dir: str, max_entries: int = 8):
+        """
+            Args:
+                cache_dir (str): directory storing cached mappings
+                max_entries (int): number of the most recently used entries built from the same ontology path
+                                   under the same name (e.g., with different settings) kept in the cache
+        """
+        self.cache_dir = cache_dir
+        self.max_entries = max_entries
+
+    def get_key(self, ontology_path: Union[str, List[str]], settings: Dict[str, Any]) -> str:
+        """
+            Args:
+                ontology_path (Union[str, List[str]]): path to an ontology file (or paths to ontology files)
+                                                       the mapping is built from
+                settings (Dict[str, Any]): JSON-serializable settings influencing the mapping
+            Returns:
+                str: cache key
+        """
+        content = json.dumps({
+            "ontology": self.get_file_hash(ontology_path) if isinstance(ontology_path, str)
+            else [self.get_file_hash(path) for path in ontology_path],
+            "settings": settings,
+        }, sort_keys=True)
+        return hashlib.sha256(content.encode("utf-8")).hexdigest()
+
+    def get_file_hash(self, path: str) -> str:
+        """
+            Calculate the SHA-256 hash of a file. Hashes are memoized by path, size and modification time,
+            so large ontologies are not read on every start.
+
+            Args:
+                path (str): path to a file
+            Returns:
+                str: hex digest of the file content
+        """
+        stat = os.stat(path)
+        file_id = f"{os.path.abspath(path)}:{stat.st_size}:{stat.st_mtime_ns}"
+        hashes_path = os.path.join(self.cache_dir, "file_hashes.json")
+        hashes = {}
+        if os.path.exists(hashes_path):
+            try:
+                with open(hashes_path) as f:
+                    hashes = json.load(f)
+            except ValueError:
+                hashes = {}
+        if file_id not in hashes:
+            digest = hashlib.sha256()
+            with open(path, "rb") as f:
+                for chunk in iter(lambda: f.read(1 << 20), b""):
+                    digest.update(chunk)
+            hashes = {k: v for k, v in hashes.items() if not k.startswith(f"{os.path.abspath(path)}:")}
+            hashes[file_id] = digest.hexdigest()
+            atomic_write(hashes_path, json.dumps(hashes).encode("utf-8"))
+        return hashes[file_id]
+
+    def load(self, key: str) -> Optional[LabelStore]:
+        """
+            Args:
+                key (str): cache key (see `get_key`)
+            Returns:
+                Optional[LabelStore]: cached mapping, or None if missing or unreadable
+        """
+        path = self._get_path(key)
+        if not os.path.exists(path):
+            return None
+        try:
+            store = LabelStore(path)
+            self._touch_entry("label_mapping", key)
+            return store
+        except Exception as e:
+            print(f"WARNING: Ignoring unreadable label mapping cache {path}: {e}")
+            shutil.rmtree(path, ignore_errors=True)
+            return None
+
+    def find_previous_key(self, ontology_path: Union[str, List[str]], settings: Dict[str, Any],
+                          name: str = '') -> Optional[str]:
+        """
+            Find a mapping built from an ontology path with the same settings, but a different ontology content
+            (e.g., a previous release of the ontology), which a new mapping may be built from incrementally.
+
+            Args:
+                ontology_path (Union[str, List[str]]): path to an ontology file (or paths to ontology files)
+                settings (Dict[str, Any]): JSON-serializable settings influencing the mapping
+                name (str): name distinguishing mappings built from the same ontology files (e.g., a category)
+            Returns:
+                Optional[str]: cache key of the previous mapping, or None if missing
+        """
+        for metadata_path in glob.glob(os.path.join(self.cache_dir, "label_mapping-*.json")):
+            with open(metadata_path) as f:
+                metadata = json.load(f)
+            key = os.path.basename(metadata_path)[len("label_mapping-"):-len(".json")]
+            if (
+                metadata.get("ontology_path") == self._get_source(ontology_path)
+                and metadata.get("name", '') == name
+                and metadata.get("settings") == self.get_settings_hash(settings)
+                and os.path.exists(self._get_path(key))
+            ):
+                return key
+        return None
+
+    @staticmethod
+    def get_settings_hash(settings: Dict[str, Any]) -> str:
+        return hashlib.sha256(json.dumps(settings, sort_keys=True).encode("utf-8")).hexdigest()
+
+    def save(self, key: str, mapping: Dict[Any, Dict[str, Any]], ontology_path: Union[str, List[str]],
+             settings: Optional[Dict[str, Any]] = None, name: str = '') -> None:
+        """
+            Store a mapping as a `LabelStore` and remove mappings it supersedes (see `_replace_entries`).
+
+            Args:
+                key (str): cache key (see `get_key`)
+                mapping (Dict[Any, Dict[str, Any]]): mapping to store
+                ontology_path (Union[str, List[str]]): path to an ontology file (or paths to ontology files)
+                                                       the mapping is built from
+                settings (Optional[Dict[str, Any]]): settings the key was derived from (see `find_previous_key`)
+                name (str): name distinguishing mappings built from the same ontology files (e.g., a category)
+        """
+        LabelStore.write(self._get_path(key), mapping)
+        for stale_key in self._replace_entries("label_mapping", key, ontology_path, name, settings):
+            print(f"INFO: Removing stale label mapping cache {stale_key}")
+            shutil.rmtree(self._get_path(stale_key), ignore_errors=True)
+            shutil.rmtree(self._get_artifacts_path(stale_key), ignore_errors=True)
+
+    def get_label_table_path(self, key: str, ontology_path: str, name: str = '',
+                             settings: Optional[Dict[str, Any]] = None) -> str:
+        """
+            Get the path of a label table extracted from an ontology (see `OntologyParser.get_label_rows`),
+            which may not exist yet. Tables it supersedes are removed (see `_replace_entries`).
+
+            Args:
+                key (str): cache key of the table (see `get_key`)
+                ontology_path (str): path to an ontology file the table is extracted from
+                name (str): name distinguishing tables extracted from the same ontology file (e.g., a category)
+                settings (Optional[Dict[str, Any]]): settings the key was derived from
+            Returns:
+                str: path of the table
+        """
+        for stale_key in self._replace_entries("label_table", key, ontology_path, name, settings):
+            print(f"INFO: Removing stale label table {stale_key}")
+            if os.path.exists(self._get_label_table_path(stale_key)):
+                os.remove(self._get_label_table_path(stale_key))
+        return self._get_label_table_path(key)
+
+    def load_artifact(self, key: str, name: str) -> Optional[bytes]:
+        """
+            Load data derived from a cached mapping (e.g., representations of its labels) stored with `save_artifact`.
+
+            Args:
+                key (str): cache key of the mapping (see `get_key`)
+                name (str): name of the artifact
+            Returns:
+                Optional[bytes]: stored data, or None if missing
+        """
+        path = self.get_artifact_path(key, name)
+        if not os.path.exists(path):
+            return None
+        with open(path, "rb") as f:
+            return f.read()
+
+    def get_artifact_path(self, key: str, name: str) -> str:
+        """
+            Args:
+                key (str): cache key of the mapping (see `get_key`)
+                name (str): name of the artifact
+            Returns:
+                str: path of the artifact (e.g., to memory-map it), which may not exist
+        """
+        return os.path.join(self._get_artifacts_path(key), name)
+
+    def save_artifact(self, key: str, name: str, data: bytes) -> None:
+        """
+            Store data derived from a cached mapping next to it. Artifacts are removed together with the mapping.
+
+            Args:
+                key (str): cache key of the mapping (see `get_key`)
+                name (str): name of the artifact
+                data (bytes): data to store
+        """
+        atomic_write(self.get_artifact_path(key, name), data)
+
+    def _replace_entries(self, prefix: str, key: str, ontology_path: Union[str, List[str]], name: str = '',
+                         settings: Optional[Dict[str, Any]] = None) -> List[str]:
+        """
+            Record the ontology path, its content and the settings an entry is built from, and find entries
+            superseded by it: entries built from the same ontology path under the same name with the same settings,
+            but from a different content of the ontology (e.g., a previous release). Entries of other settings
+            (e.g., another similarity measure sharing the cache directory) are kept, except for the least recently used
+            ones exceeding `max_entries`.
+
+            Args:
+                prefix (str): kind of entries (e.g., label_mapping)
+                key (str): cache key of the new entry
+                ontology_path (Union[str, List[str]]): path to an ontology file (or paths to ontology files)
+                                                       the entry is built from
+                name (str): name distinguishing entries built from the same ontology files
+                settings (Optional[Dict[str, Any]]): settings the key was derived from
+            Returns:
+                List[str]: keys of stale entries, their metadata is already removed
+        """
+        metadata = {
+            "ontology_path": self._get_source(ontology_path),
+            "ontology": self.get_file_hash(ontology_path) if isinstance(ontology_path, str)
+            else [self.get_file_hash(path) for path in ontology_path],
+            "name": name,
+        }
+        if settings is not None:
+            metadata["settings"] = self.get_settings_hash(settings)
+        atomic_write(os.path.join(self.cache_dir, f"{prefix}-{key}.json"), json.dumps(metadata).encode("utf-8"))
+
+        stale_keys, kept_entries = [], []
+        for metadata_path in glob.glob(os.path.join(self.cache_dir, f"{prefix}-*.json")):
+            other_key = os.path.basename(metadata_path)[len(f"{prefix}-"):-len(".json")]
+            if other_key == key:
+                continue
+            with open(metadata_path) as f:
+                other_metadata = json.load(f)
+            if (other_metadata.get("ontology_path"), other_metadata.get("name", '')) != (metadata["ontology_path"], name):
+                continue
+            if (
+                other_metadata.get("settings") == metadata.get("settings")
+                and other_metadata.get("ontology") != metadata["ontology"]
+            ):
+                stale_keys.append(other_key)
+            else:
+                kept_entries.append((os.path.getmtime(metadata_path), other_key))
+        # the new entry counts to the limit as well
+        kept_entries.sort(reverse=True)
+        stale_keys += [other_key for _, other_key in kept_entries[max(self.max_entries - 1, 0):]]
+        for stale_key in stale_keys:
+            os.remove(os.path.join(self.cache_dir, f"{prefix}-{stale_key}.json"))
+        return stale_keys
+
+    def _touch_entry(self, prefix: str, key: str) -> None:
+        """ Mark an entry as recently used, so that it is kept over the limit of entries (see `_replace_entries`) """
+        try:
+            os.utime(os.path.join(self.cache_dir, f"{prefix}-{key}.json"))
+        except OSError:
+            pass
+
+    @staticmethod
+    def _get_source(ontology_path: Union[str, List[str]]) -> Union[str, List[str]]:
+        if isinstance(ontology_path, str):
+            return os.path.abspath(ontology_path)
+        return [os.path.abspath(path) for path in ontology_path]
+
+    def _get_label_table_path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, f"label_table-{key}.csv.gz")
+
+    def _get_path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, f"label_mapping-{key}")
+
+    def _get_artifacts_path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, f"label_mapping-{key}-artifacts")
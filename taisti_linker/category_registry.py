@@ -0,0 +1,125 @@
+from collections.abc import Mapping
+from taisti_linker.commons import EntityType
+from taisti_linker.ontology_parser import ROOT_CATEGORY_IRIS
+from typing import Any, Callable, Dict, Iterator, List, NamedTuple
+import json
+import os
+
+
+class CategorySource(NamedTuple):
+    """ Roots of taxonomies of an ontology file, whose descendants may be linked to mentions of a category """
+    ontology_path: str
+    root_iris: List[str]
+
+
+class CategoryRegistry:
+    """
+        Registry relating NER/BRAT entity types to roots of allowed taxonomies, possibly spread over several ontology files
+        (e.g., FoodOn for foods and a units ontology for units). Categories missing from the registry are never linked.
+    """
+
+    def __init__(self, categories: Dict[EntityType, List[CategorySource]]):
+        """
+            Args:
+                categories (Dict[EntityType, List[CategorySource]]): sources of labels of each category
+        """
+        self.categories = categories
+
+    @classmethod
+    def default(cls, ontology_path: str) -> "CategoryRegistry":
+        """
+            Args:
+                ontology_path (str): path to an ontology
+            Returns:
+                CategoryRegistry: registry of `ROOT_CATEGORY_IRIS` roots of a single ontology
+        """
+        return cls({
+            entity_type: [CategorySource(ontology_path, iris)] for entity_type, iris in ROOT_CATEGORY_IRIS.items()
+        })
+
+    @classmethod
+    def from_json(cls, path: str, default_ontology_path: str = '') -> "CategoryRegistry":
+        """
+            Read a registry from a JSON file relating entity type names to lists of sources, e.g.:
+            {"FOOD": [{"ontology_path": "foodon.owl", "root_iris": ["http://purl.obolibrary.org/obo/FOODON_00001002"]}],
+             "UNIT": [{"ontology_path": "uo.owl", "root_iris": ["http://purl.obolibrary.org/obo/UO_0000000"]}]}
+            Relative ontology paths are relative to the JSON file.
+
+            Args:
+                path (str): path to a JSON file
+                default_ontology_path (str): ontology of sources without "ontology_path"
+            Returns:
+                CategoryRegistry: the registry
+        """
+        with open(path) as f:
+            config: Dict[str, List[Dict[str, Any]]] = json.load(f)
+
+        categories = {}
+        for name, sources in config.items():
+            if name not in EntityType.__members__:
+                raise ValueError(f"Unknown entity type {name} in {path}, "
+                                 f"expected one of: {', '.join(EntityType.__members__)}")
+            categories[EntityType[name]] = [
+                CategorySource(
+                    os.path.join(os.path.dirname(path), source["ontology_path"])
+                    if "ontology_path" in source else default_ontology_path,
+                    list(source["root_iris"]))
+                for source in sources
+            ]
+        return cls(categories)
+
+    def get_sources(self, entity_type: EntityType) -> List[CategorySource]:
+        """
+            Args:
+                entity_type (EntityType): NER/BRAT entity type
+            Returns:
+                List[CategorySource]: sources of labels of the category (empty if not registered)
+        """
+        return self.categories.get(entity_type, [])
+
+    def __contains__(self, entity_type: object) -> bool:
+        return entity_type in self.categories
+
+    def __iter__(self) -> Iterator[EntityType]:
+        # the order of entity types, regardless of the order of the configuration
+        return (entity_type for entity_type in EntityType if entity_type in self.categories)
+
+    def __len__(self) -> int:
+        return len(self.categories)
+
+
+class LazyCategoryMapping(Mapping):
+    """
+        Mapping of registered categories to their labels (e.g., `CategoryLabels`), loading labels of a category
+        only when it is first requested, so that memory and build time scale with the categories actually used.
+    """
+
+    def __init__(self, registry: CategoryRegistry, load: Callable[[EntityType], Mapping]):
+        """
+            Args:
+                registry (CategoryRegistry): registered categories
+                load (Callable[[EntityType], Mapping]): function loading (or building) labels of a category
+        """
+        self.registry = registry
+        self.load = load
+        self.loaded: Dict[EntityType, Mapping] = {}
+
+    def is_loaded(self, entity_type: EntityType) -> bool:
+        return entity_type in self.loaded
+
+    def __getitem__(self, entity_type: EntityType) -> Mapping:
+        if entity_type not in self.registry:
+            raise KeyError(entity_type)
+        if entity_type not in self.loaded:
+            self.loaded[entity_type] = self.load(entity_type)
+        return self.loaded[entity_type]
+
+    def __contains__(self, entity_type: object) -> bool:
+        # registered categories are known without loading their labels
+        return entity_type in self.registry
+
+    def __iter__(self) -> Iterator[EntityType]:
+        return iter(self.registry)
+
+    def __len__(self) -> int:
+        return len(self.registry)
@@ -1,11 +1,21 @@
 from dataclasses import dataclass
 from enum import Enum
-from typing import Any, List
+from typing import Any, Dict, Iterable, Iterator, List, NamedTuple, TextIO, Tuple
+import array
+import itertools
 import json
+import numpy as np
 import os
 import pandas as pd
 import re
 
+try:
+    # parses JSON several times faster than the standard library, used by the TAISTI CSV reader if installed
+    import orjson
+    _json_loads = orjson.loads
+except ImportError:
+    _json_loads = json.loads
+
 
 class EntityType(Enum):
     """ Common entity types supported by NER and BRAT annotations """
@@ -31,6 +41,8 @@ class AnnotationSource(Enum):
 @dataclass
 class Annotation:
     """ Common annotation format, shared between BRAT and NER (for NER file_id is artificial id). """
+    # slots instead of a __dict__ per instance, as millions of annotations may be kept (see also `AnnotationTable`)
+    __slots__ = ("id", "file_id", "start", "end", "category", "text", "source")
     id: str
     file_id: int
     start: int
@@ -43,6 +55,7 @@ class Annotation:
 @dataclass
 class AnnotatedDoc:
     """ Textual document with all the BRAT/NER annotations """
+    __slots__ = ("id", "path", "text", "annotations")
     id: int
     path: str
     text: str
@@ -93,7 +106,6 @@ def get_entity_type(category: str) -> EntityType:
 
 
 def read_brat_all_annotation_files(folder_path: str) -> list[AnnotatedDoc]:
-    annotations = []
     """
         Iterate over all BRAT annotations in a folder and parse them into a list of AnnotatedDocs
 
@@ -102,7 +114,18 @@ def read_brat_all_annotation_files(folder_path: str) -> list[AnnotatedDoc]:
         Returns:
             list[AnnotatedDoc]: List of parsed annotations
     """
+    return list(iter_brat_all_annotation_files(folder_path))
+
+
+def iter_brat_all_annotation_files(folder_path: str) -> Iterator[AnnotatedDoc]:
+    """
+        Lazily iterate over all BRAT annotations in a folder, parsing one file at a time
 
+        Args:
+            folder_path (str): Path to a folder with all annotations
+        Returns:
+            Iterator[AnnotatedDoc]: parsed annotations
+    """
     for filename in os.listdir(folder_path):
         f = os.path.join(folder_path, filename)
         if os.path.isfile(f) and f.endswith("txt"):
@@ -111,11 +134,9 @@ def read_brat_all_annotation_files(folder_path: str) -> list[AnnotatedDoc]:
             with open(f) as brat_file:
                 text = brat_file.read()
             brat_annotations = read_brat_annotations_from_file(ann_path)
-            annotated_doc = AnnotatedDoc(
+            yield AnnotatedDoc(
                 id=id, path=f, text=text, annotations=brat_annotations
             )
-            annotations.append(annotated_doc)
-    return annotations
 
 
 def read_brat_annotations_from_file(file_path: str) -> List[Annotation]:
@@ -163,10 +184,21 @@ def read_ner_annotation_file(file_path: str) -> list[AnnotatedDoc]:
         Returns:
             list[AnnotatedDoc]: List of parsed annotations
     """
-    annotations = []
+    return list(iter_ner_annotation_file(file_path))
+
+
+def iter_ner_annotation_file(file_path: str) -> Iterator[AnnotatedDoc]:
+    """
+        Lazily iterate over all NER annotations in a file. The JSON array of documents is parsed incrementally,
+        so the file is never loaded into memory as a whole.
+
+        Args:
+            file_path (str): Path to a file with NER output
+        Returns:
+            Iterator[AnnotatedDoc]: parsed annotations
+    """
     with open(file_path) as f:
-        documents = json.load(f)
-        for i, doc in enumerate(documents):
+        for i, doc in enumerate(_iter_json_array(f)):
             ner_annotations = []
             for j, entity in enumerate(doc['entities_list']):
                 ner_annotations.append(Annotation(
@@ -174,10 +206,9 @@ def read_ner_annotation_file(file_path: str) -> list[AnnotatedDoc]:
                     end=entity['end'], category=entity['label'],
                     text=entity['text'], source=AnnotationSource.NER))
 
-            annotations.append(AnnotatedDoc(
+            yield AnnotatedDoc(
                 id=i, path=file_path, text=doc['text'], annotations=ner_annotations
-            ))
-    return annotations
+            )
 
 
 def read_taisti_dataset_csv(file_path: str) -> list[AnnotatedDoc]:
@@ -189,27 +220,290 @@ def read_taisti_dataset_csv(file_path: str) -> list[AnnotatedDoc]:
         Returns:
             list[AnnotatedDoc]: List of parsed annotations
     """
-    annotations = []
-    idx = 0
-    for df in pd.read_csv(file_path,
-                 usecols=['ingredients_entities'], chunksize=1000):
-        print(f"Processing {idx}")
-        for _, row in df.iterrows():
-            entities = json.loads(row['ingredients_entities'])
+    return list(iter_taisti_dataset_csv(file_path))
 
-            ner_annotations = []
-            for j, entity in enumerate(entities):
-                if 'food' in entity['type'].lower():
-                    ner_annotations.append(Annotation(
-                        id=str(j), file_id=idx, start=entity['start'],
-                        end=entity['end'], category=entity['type'],
-                        text=entity['entity'], source=AnnotationSource.TAISTI_CSV))
-
-            annotations.append(AnnotatedDoc(
+
+def iter_taisti_dataset_csv(file_path: str) -> Iterator[AnnotatedDoc]:
+    """
+        Lazily iterate over all food annotations of a TAISTI CSV dataset, reading the file in chunks
+        (see `iter_taisti_entities`)
+
+        Args:
+            file_path (str): Path to a TAISTI CSV file
+        Returns:
+            Iterator[AnnotatedDoc]: parsed annotations
+    """
+    for chunk in iter_taisti_entities(file_path):
+        # entities are sorted by docs, so that entities of a doc are a slice of the columns
+        bounds = np.searchsorted(
+            chunk.doc_ids, np.arange(chunk.first_doc_id, chunk.first_doc_id + chunk.docs_count + 1)).tolist()
+        indices, starts, ends = chunk.indices.tolist(), chunk.starts.tolist(), chunk.ends.tolist()
+        categories = [chunk.type_names[code] for code in chunk.type_codes.tolist()]
+        texts = chunk.texts.tolist()
+        for position in range(chunk.docs_count):
+            idx = chunk.first_doc_id + position
+            ner_annotations = [
+                Annotation(
+                    id=str(indices[j]), file_id=idx, start=starts[j],
+                    end=ends[j], category=categories[j],
+                    text=texts[j], source=AnnotationSource.TAISTI_CSV)
+                for j in range(bounds[position], bounds[position + 1])
+            ]
+            yield AnnotatedDoc(
                 id=idx, path=file_path, text='', annotations=ner_annotations
-            ))
-            idx += 1
-    return annotations
+            )
+
+
+class TaistiEntities(NamedTuple):
+    """ Entities of a chunk of TAISTI CSV rows (docs) as columns, one element per entity """
+    # number of the row of each entity, in ascending order
+    doc_ids: np.ndarray
+    # position of each entity among all entities of its row (including entities of other types)
+    indices: np.ndarray
+    starts: np.ndarray
+    ends: np.ndarray
+    # entity texts (str objects)
+    texts: np.ndarray
+    # entity types as indices of `type_names`
+    type_codes: np.ndarray
+    type_names: List[str]
+    # number of the first row of the chunk and the number of its rows (including rows without entities)
+    first_doc_id: int
+    docs_count: int
+
+
+def iter_taisti_entities(file_path: str, chunk_size: int = 1000, food_only: bool = True) -> Iterator[TaistiEntities]:
+    """
+        Read entities of the `ingredients_entities` column of a TAISTI CSV dataset into columnar arrays.
+        JSON lists of a whole chunk of rows are parsed at once (with orjson if installed), and entity types
+        are interned, so filtering them takes a single array lookup instead of a comparison per entity.
+
+        Args:
+            file_path (str): Path to a TAISTI CSV file
+            chunk_size (int): number of rows read at once, bounding the memory used
+            food_only (bool): whether to keep food entities only (of types containing "food")
+        Returns:
+            Iterator[TaistiEntities]: entities of consecutive chunks of rows
+    """
+    first_doc_id = 0
+    for df in pd.read_csv(file_path, usecols=['ingredients_entities'], dtype={'ingredients_entities': str},
+                          chunksize=chunk_size):
+        cells = df['ingredients_entities'].fillna('[]').tolist()
+        rows = _json_loads("[" + ",".join(cells) + "]")
+        lengths = np.fromiter(map(len, rows), dtype=np.int64, count=len(rows))
+        entities = list(itertools.chain.from_iterable(rows))
+
+        type_ids = {}
+        type_codes = np.fromiter((type_ids.setdefault(entity['type'], len(type_ids)) for entity in entities),
+                                 dtype=np.int32, count=len(entities))
+        type_names = list(type_ids)
+        doc_ids = np.repeat(np.arange(first_doc_id, first_doc_id + len(rows), dtype=np.int64), lengths)
+        indices = np.arange(len(entities), dtype=np.int64) - np.repeat(np.cumsum(lengths) - lengths, lengths)
+        if food_only:
+            kept = np.flatnonzero(np.asarray(['food' in name.lower() for name in type_names], dtype=bool)[type_codes])
+            doc_ids, indices, type_codes = doc_ids[kept], indices[kept], type_codes[kept]
+            entities = [entities[position] for position in kept.tolist()]
+
+        texts = np.empty(len(entities), dtype=object)
+        texts[:] = [entity['entity'] for entity in entities]
+        starts = np.fromiter((entity['start'] for entity in entities), dtype=np.int64, count=len(entities))
+        ends = np.fromiter((entity['end'] for entity in entities), dtype=np.int64, count=len(entities))
+        yield TaistiEntities(doc_ids, indices, starts, ends, texts, type_codes, type_names, first_doc_id, len(rows))
+        first_doc_id += len(rows)
+
+
+# members of AnnotationSource by their values, as stored by `AnnotationTable`
+_ANNOTATION_SOURCES = {source.value: source for source in AnnotationSource}
+
+
+class AnnotationTable:
+    """
+        Memory-lean store of annotated docs as columns (a struct of arrays) instead of an object per annotation.
+        Strings (annotation ids, categories, texts and paths) are interned, so each distinct one is kept once,
+        and numbers are kept in typed arrays. Iterating the table yields `AnnotatedDoc` objects built on the fly,
+        so it can be used in place of a list of docs.
+    """
+
+    def __init__(self):
+        # distinct strings, referred to by their positions (codes) in columns
+        self.strings: List[str] = []
+        self.string_codes: Dict[str, int] = {}
+        # columns of docs, annotations of the i-th doc are at positions annotation_offsets[i]:annotation_offsets[i + 1]
+        self.doc_ids = array.array("q")
+        self.doc_paths = array.array("i")
+        self.doc_texts: List[str] = []
+        self.annotation_offsets = array.array("q", [0])
+        # columns of annotations
+        self.ids = array.array("i")
+        self.file_ids = array.array("q")
+        self.starts = array.array("q")
+        self.ends = array.array("q")
+        self.categories = array.array("i")
+        self.texts = array.array("i")
+        self.sources = array.array("b")
+
+    def append(self, doc: AnnotatedDoc) -> None:
+        """
+            Args:
+                doc (AnnotatedDoc): doc to store
+        """
+        self.doc_ids.append(doc.id)
+        self.doc_paths.append(self._intern(doc.path))
+        self.doc_texts.append(doc.text)
+        for annotation in doc.annotations:
+            self.ids.append(self._intern(annotation.id))
+            self.file_ids.append(annotation.file_id)
+            self.starts.append(annotation.start)
+            self.ends.append(annotation.end)
+            self.categories.append(self._intern(annotation.category))
+            self.texts.append(self._intern(annotation.text))
+            self.sources.append(annotation.source.value)
+        self.annotation_offsets.append(len(self.ids))
+
+    def extend(self, docs: Iterable[AnnotatedDoc]) -> None:
+        """
+            Args:
+                docs (Iterable[AnnotatedDoc]): docs to store
+        """
+        for doc in docs:
+            self.append(doc)
+
+    def append_taisti_entities(self, chunk: TaistiEntities, file_path: str) -> None:
+        """
+            Store entities of a chunk of TAISTI CSV rows as docs, the way `iter_taisti_dataset_csv` reads them,
+            without building an object per entity.
+
+            Args:
+                chunk (TaistiEntities): entities read by `iter_taisti_entities`
+                file_path (str): Path to the TAISTI CSV file
+        """
+        bounds = np.searchsorted(
+            chunk.doc_ids, np.arange(chunk.first_doc_id + 1, chunk.first_doc_id + chunk.docs_count + 1))
+        self.doc_ids.extend(range(chunk.first_doc_id, chunk.first_doc_id + chunk.docs_count))
+        self.doc_paths.extend([self._intern(file_path)] * chunk.docs_count)
+        self.doc_texts.extend([''] * chunk.docs_count)
+        self.annotation_offsets.extend((bounds + len(self.ids)).tolist())
+
+        self.ids.extend([self._intern(str(index)) for index in chunk.indices.tolist()])
+        self.file_ids.frombytes(chunk.doc_ids.astype(np.int64).tobytes())
+        self.starts.frombytes(chunk.starts.astype(np.int64).tobytes())
+        self.ends.frombytes(chunk.ends.astype(np.int64).tobytes())
+        category_codes = np.asarray([self._intern(name) for name in chunk.type_names], dtype=np.int32)
+        self.categories.frombytes(category_codes[chunk.type_codes].tobytes())
+        self.texts.extend([self._intern(text) for text in chunk.texts.tolist()])
+        self.sources.frombytes(np.full(len(chunk.doc_ids), AnnotationSource.TAISTI_CSV.value, dtype=np.int8).tobytes())
+
+    def count_mentions(self) -> Dict[Tuple[str, str], int]:
+        """
+            Returns:
+                Dict[Tuple[str, str], int]: number of annotations of each unique (text, category) pair,
+                                            in the order the pairs first occur in docs
+        """
+        if len(self.texts) == 0:
+            return {}
+        keys = np.asarray(self.texts, dtype=np.int64) * len(self.strings) + np.asarray(self.categories, dtype=np.int64)
+        _, first, counts = np.unique(keys, return_index=True, return_counts=True)
+        order = np.argsort(first)
+        return {
+            (self.strings[self.texts[position]], self.strings[self.categories[position]]): count
+            for position, count in zip(first[order].tolist(), counts[order].tolist())
+        }
+
+    def __len__(self) -> int:
+        return len(self.doc_ids)
+
+    def __getitem__(self, position: int) -> AnnotatedDoc:
+        if position < 0:
+            position += len(self)
+        if not 0 <= position < len(self):
+            raise IndexError("AnnotationTable index out of range")
+        return self._get_doc(position)
+
+    def __iter__(self) -> Iterator[AnnotatedDoc]:
+        for position in range(len(self)):
+            yield self._get_doc(position)
+
+    def _get_doc(self, position: int) -> AnnotatedDoc:
+        strings = self.strings
+        annotations = [
+            Annotation(
+                id=strings[self.ids[j]], file_id=self.file_ids[j], start=self.starts[j],
+                end=self.ends[j], category=strings[self.categories[j]],
+                text=strings[self.texts[j]], source=_ANNOTATION_SOURCES[self.sources[j]])
+            for j in range(self.annotation_offsets[position], self.annotation_offsets[position + 1])
+        ]
+        return AnnotatedDoc(
+            id=self.doc_ids[position], path=strings[self.doc_paths[position]], text=self.doc_texts[position],
+            annotations=annotations
+        )
+
+    def _intern(self, value: str) -> int:
+        code = self.string_codes.setdefault(value, len(self.strings))
+        if code == len(self.strings):
+            self.strings.append(value)
+        return code
+
+
+def _iter_json_array(f: TextIO, chunk_size: int = 1 << 20) -> Iterator[Any]:
+    """
+        Incrementally parse a file holding a JSON array, yielding its elements one by one.
+        Malformed arrays (e.g., with missing, repeated or trailing commas) are rejected just like by `json.load`.
+
+        Args:
+            f (TextIO): file to parse
+            chunk_size (int): number of characters read at once
+        Returns:
+            Iterator[Any]: elements of the array
+    """
+    decoder = json.JSONDecoder()
+    buffer, position = "", 0
+    # what comes next: the opening bracket, the first element (or the closing bracket), an element after a comma,
+    # a comma (or the closing bracket) after an element, or nothing after the closing bracket
+    expected = "array"
+    exhausted = False
+    while True:
+        while position < len(buffer) and buffer[position].isspace():
+            position += 1
+        if position < len(buffer):
+            char = buffer[position]
+            if expected == "array":
+                if char != "[":
+                    raise json.JSONDecodeError(f"Expected a JSON array in {f.name}", buffer, position)
+                expected, position = "first", position + 1
+                continue
+            if expected == "end":
+                raise json.JSONDecodeError(f"Extra data after the JSON array in {f.name}", buffer, position)
+            if char == "]" and expected in ("first", "comma"):
+                expected, position = "end", position + 1
+                continue
+            if expected == "comma":
+                if char != ",":
+                    raise json.JSONDecodeError(f"Expected ',' or ']' after an element of the JSON array in {f.name}",
+                                               buffer, position)
+                expected, position = "element", position + 1
+                continue
+            if char in ",]":
+                raise json.JSONDecodeError(f"Expected an element of the JSON array in {f.name}", buffer, position)
+            try:
+                value, end = decoder.raw_decode(buffer, position)
+            except json.JSONDecodeError:
+                # the element is not read completely yet
+                if exhausted:
+                    raise
+                end = -1
+            # an element ending with the buffer (e.g., a number) may continue in the next chunk
+            if end >= 0 and (end < len(buffer) or exhausted):
+                expected, position = "comma", end
+                yield value
+                continue
+        elif exhausted:
+            if expected == "end":
+                return
+            raise json.JSONDecodeError(f"Unexpected end of JSON array in {f.name}", buffer, position)
+        chunk = f.read(chunk_size)
+        exhausted = len(chunk) == 0
+        buffer = buffer[position:] + chunk
+        position = 0
 
 
 def get_file_id(path: str) -> int:
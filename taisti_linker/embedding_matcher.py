@@ -0,0 +1,169 @@
+from taisti_linker.commons import LabelWithIRI
+from taisti_linker.sparse_matcher import select_links
+from typing import Callable, List, Optional, Sequence, Tuple
+import numpy as np
+import spacy
+
+
+class SpacyVectorizer:
+    """
+        Embed texts as averages of static word vectors of a locally installed spaCy pipeline (e.g., en_core_web_lg).
+        Only the tokenizer is run, other components are not needed to look up vectors.
+    """
+
+    def __init__(self, model_name: str, batch_size: int = 1000):
+        """
+            Args:
+                model_name (str): name of (or path to) a spaCy pipeline with word vectors
+                batch_size (int): number of texts tokenized at once
+        """
+        self.nlp = spacy.load(model_name)
+        if self.nlp.vocab.vectors_length == 0:
+            raise ValueError(f"spaCy pipeline {model_name} has no word vectors")
+        self.batch_size = batch_size
+
+    def get_id(self) -> str:
+        """
+            Returns:
+                str: identifier of the pipeline and its vectors, vectors of different pipelines are not comparable
+        """
+        meta = self.nlp.meta
+        vectors_shape = f"{self.nlp.vocab.vectors.shape[0]}x{self.nlp.vocab.vectors_length}"
+        return f"{meta.get('lang')}_{meta.get('name')}-{meta.get('version')}-{vectors_shape}"
+
+    def __call__(self, texts: List[str]) -> np.ndarray:
+        """
+            Args:
+                texts (List[str]): texts to embed
+            Returns:
+                np.ndarray: float32 matrix with a vector of each text (zeros if none of its tokens has a vector)
+        """
+        vectors = np.zeros((len(texts), self.nlp.vocab.vectors_length), dtype=np.float32)
+        for position, doc in enumerate(self.nlp.pipe(texts, batch_size=self.batch_size, disable=self.nlp.pipe_names)):
+            vectors[position] = doc.vector
+        return vectors
+
+
+def normalize_vectors(vectors: np.ndarray) -> np.ndarray:
+    """
+        Args:
+            vectors (np.ndarray): vectors (one per row)
+        Returns:
+            np.ndarray: float32 vectors of unit length (zero vectors are left as they are)
+    """
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return (vectors / norms).astype(np.float32)
+
+
+def quantize_vectors(vectors: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+        Quantize vectors to 8-bit integers with a scale per vector, cutting their size four times.
+
+        Args:
+            vectors (np.ndarray): float vectors (one per row)
+        Returns:
+            Tuple[np.ndarray, np.ndarray]: int8 vectors and float32 scales restoring their values
+    """
+    scales = np.abs(vectors).max(axis=1) / 127.0
+    scales[scales == 0] = 1.0
+    quantized = np.round(vectors / scales[:, np.newaxis]).astype(np.int8)
+    return quantized, scales.astype(np.float32)
+
+
+class EmbeddingMatcher:
+    """
+        Batch linker scoring texts with the cosine similarity of their dense vectors (embeddings).
+        Label vectors are normalized once, so scores of a batch of texts are calculated with a matrix multiplication.
+        The label matrix may be memory-mapped and (optionally) quantized to 8-bit integers.
+    """
+
+    def __init__(self, labels: Sequence[LabelWithIRI], vectorize: Callable[[List[str]], np.ndarray],
+                 min_acceptable_similarity: float, vectors: np.ndarray, scales: Optional[np.ndarray] = None,
+                 batch_size: int = 256, labels_chunk_size: int = 1 << 16):
+        """
+            Args:
+                labels (Sequence[LabelWithIRI]): labels in the order they are scanned by the linker
+                vectorize (Callable[[List[str]], np.ndarray]): function embedding normalized texts
+                min_acceptable_similarity (float): similarity a label has to exceed to be linked
+                vectors (np.ndarray): normalized label vectors (see `normalize_vectors`), float32 or int8 if quantized
+                scales (Optional[np.ndarray]): scales of quantized vectors (see `quantize_vectors`), None if not quantized
+                batch_size (int): number of texts scored at once, bounding the size of score matrices
+                labels_chunk_size (int): number of (quantized) label vectors converted to floats at once
+        """
+        if len(vectors) != len(labels):
+            raise ValueError("Label vectors do not match the labels")
+        self.labels = labels
+        self.vectorize = vectorize
+        self.min_acceptable_similarity = min_acceptable_similarity
+        self.vectors = vectors
+        self.scales = scales
+        self.batch_size = batch_size
+        self.labels_chunk_size = labels_chunk_size
+
+    @staticmethod
+    def embed_labels(labels: Sequence[LabelWithIRI], vectorize: Callable[[List[str]], np.ndarray],
+                     batch_size: int = 10000) -> np.ndarray:
+        """
+            Args:
+                labels (Sequence[LabelWithIRI]): labels to embed
+                vectorize (Callable[[List[str]], np.ndarray]): function embedding normalized texts
+                batch_size (int): number of labels embedded at once
+            Returns:
+                np.ndarray: normalized float32 vectors of normalized labels
+        """
+        batches = [normalize_vectors(vectorize([item.normalized_label for item in labels[start:start + batch_size]]))
+                   for start in range(0, len(labels), batch_size)]
+        return np.concatenate(batches) if batches else np.zeros((0, 0), dtype=np.float32)
+
+    def match(self, texts: List[str]) -> List[Optional[LabelWithIRI]]:
+        """
+            Link a batch of normalized texts to their most similar labels (see `select_links` for tie-breaking).
+
+            Args:
+                texts (List[str]): normalized texts to link
+            Returns:
+                List[Optional[LabelWithIRI]]: linked entity (or None) for each text
+        """
+        result: List[Optional[LabelWithIRI]] = []
+        for start in range(0, len(texts), self.batch_size):
+            scores = self._score(texts[start:start + self.batch_size])
+            if self.min_acceptable_similarity >= 0:
+                rows, cols = np.nonzero(scores > self.min_acceptable_similarity)
+            else:
+                rows, cols = np.nonzero(np.ones_like(scores, dtype=bool))
+            positions = select_links(rows, cols, scores[rows, cols].astype(np.float64), len(scores), len(self.labels),
+                                     self.min_acceptable_similarity)
+            result += [self.labels[position] if position >= 0 else None for position in positions]
+        return result
+
+    def score_pairs(self, texts: List[str], other_texts: List[str]) -> np.ndarray:
+        """
+            Args:
+                texts (List[str]): normalized texts
+                other_texts (List[str]): normalized texts (e.g., labels) to compare with texts at the same positions
+            Returns:
+                np.ndarray: cosine similarity of each pair of texts (of float vectors, even if label vectors are quantized)
+        """
+        if len(texts) == 0:
+            return np.zeros(0, dtype=np.float32)
+        return (normalize_vectors(self.vectorize(texts)) * normalize_vectors(self.vectorize(other_texts))).sum(axis=1)
+
+    def _score(self, texts: List[str]) -> np.ndarray:
+        """
+            Args:
+                texts (List[str]): normalized texts
+            Returns:
+                np.ndarray: cosine similarities of texts (rows) and labels (columns)
+        """
+        if len(texts) == 0 or len(self.labels) == 0:
+            return np.zeros((len(texts), len(self.labels)), dtype=np.float32)
+        text_vectors = normalize_vectors(self.vectorize(texts))
+        if self.scales is None:
+            return text_vectors @ self.vectors.T
+
+        scores = np.empty((len(texts), len(self.labels)), dtype=np.float32)
+        for start in range(0, len(self.labels), self.labels_chunk_size):
+            end = start + self.labels_chunk_size
+            scores[:, start:end] = (text_vectors @ self.vectors[start:end].T.astype(np.float32)) * self.scales[start:end]
+        return scores
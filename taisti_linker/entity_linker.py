@@ -1,16 +1,44 @@
-from typing import Dict, Optional
-from taisti_linker.commons import (EntityType, LabelWithIRI, get_entity_type,
-                                   read_brat_all_annotation_files,
-                                   read_ner_annotation_file,
-                                   read_taisti_dataset_csv)
-from taisti_linker.ontology_parser import OntologyParser
-from taisti_linker.similarity_calculator import SimilarityCalculator, SimilarityType
+from typing import Any, Dict, Iterable, Iterator, List, Mapping, Optional, Sequence, Tuple, Union
+from taisti_linker import __version__
+from taisti_linker.cache import LabelMappingCache, LinkCache, get_default_cache_dir
+from taisti_linker.category_registry import CategoryRegistry, CategorySource, LazyCategoryMapping
+from taisti_linker.commons import (AnnotatedDoc, AnnotationTable, EntityType, LabelWithIRI, get_entity_type,
+                                   iter_brat_all_annotation_files,
+                                   iter_ner_annotation_file,
+                                   iter_taisti_dataset_csv,
+                                   iter_taisti_entities)
+from taisti_linker.embedding_matcher import EmbeddingMatcher, SpacyVectorizer, quantize_vectors
+from taisti_linker.label_index import LabelIndex
+from taisti_linker.metrics import Metrics, MetricsSink, get_metrics_sink, profile_run
+from taisti_linker.minhash_index import MinHashIndex
+from taisti_linker.progress import Progress
+from taisti_linker.ontology_parser import OntologyParser, read_label_table_roots
+from taisti_linker.similarity_calculator import CHAR_NGRAM_SIZE, SimilarityCalculator, SimilarityType
+from taisti_linker.sparse_matcher import SparseJaccardMatcher
 from taisti_linker.text_processor import TextProcessor
+from taisti_linker.tfidf_matcher import TfidfMatcher
+from taisti_linker.wordnet_index import WordNetIndex, get_max_path_distance
+from nltk.corpus import wordnet as wn
 
 import argparse
 import csv
-import pickle
+import io
+import itertools
+import json
+import multiprocessing
+import nltk
+import numpy as np
 import os
+import owlready2
+
+
+# linker used by worker processes of `EntityLinker.link_all`, inherited from the parent process when forking
+_worker_linker: Optional["EntityLinker"] = None
+
+
+def _link_in_worker(task: Tuple[EntityType, List[str]]) -> List[Optional[LabelWithIRI]]:
+    entity_type, texts = task
+    return _worker_linker.link_many(texts, entity_type)
 
 
 class EntityLinker:
@@ -22,7 +50,26 @@ class EntityLinker:
         taisti_csv_path: str,
         min_acceptable_similarity: float = 0.5,
         ignore_not_linkable: bool = False,
-        similarity_measure: SimilarityType = SimilarityType.JACCARD
+        similarity_measure: SimilarityType = SimilarityType.JACCARD,
+        batch_size: int = 4096,
+        n_process: int = 1,
+        normalization_cache_size: Optional[int] = 100000,
+        normalization_cache_path: str = '',
+        cache_dir: str = '',
+        workers: int = 1,
+        streaming: bool = False,
+        chunk_size: int = 1000,
+        link_cache_size: Optional[int] = 100000,
+        link_cache_path: str = '',
+        minhash_permutations: int = 128,
+        minhash_recall: float = 0.95,
+        embedding_model: str = 'en_core_web_lg',
+        quantize_embeddings: bool = False,
+        label_table_path: str = '',
+        incremental_rebuild: bool = False,
+        category_config_path: str = '',
+        metrics_sinks: Optional[List[MetricsSink]] = None,
+        quiet: bool = False
     ):
         self.ontology_path = ontology_path
         self.annotated_examples_base_path = annotated_examples_base_path
@@ -31,60 +78,345 @@ class EntityLinker:
         self.min_acceptable_similarity = min_acceptable_similarity
         self.ignore_not_linkable = ignore_not_linkable
         self.similarity_measure = similarity_measure
-        self.ontology_parser = OntologyParser(ontology_path)
-        self.text_processor = TextProcessor()
+        self.batch_size = batch_size
+        self.n_process = n_process
+        self.workers = workers
+        self.streaming = streaming
+        self.chunk_size = chunk_size
+        self.minhash_permutations = minhash_permutations
+        self.minhash_recall = minhash_recall
+        self.embedding_model = embedding_model
+        self.quantize_embeddings = quantize_embeddings
+        self.incremental_rebuild = incremental_rebuild
+        self.quiet = quiet
+        self.vectorizer: Optional[SpacyVectorizer] = None
+        # elapsed time of stages of building label mappings (see `OntologyParser.timings`), in seconds
+        self.timings: Dict[str, float] = {}
+        # counters and timers of linking, not updated by worker processes of `link_all`
+        self.metrics = Metrics(metrics_sinks)
+        self.label_table_path = label_table_path
+        # whether the label table is used for a category source, by category, ontology path and roots
+        self.label_table_usage: Dict[Tuple[EntityType, str, Tuple[str, ...]], bool] = {}
+        self.category_registry = CategoryRegistry.from_json(category_config_path, ontology_path) \
+            if len(category_config_path) > 0 else CategoryRegistry.default(ontology_path)
+        self.text_processor = TextProcessor(
+            cache_size=normalization_cache_size,
+            cache_path=normalization_cache_path if len(normalization_cache_path) > 0 else None)
+        self.label_mapping_cache = LabelMappingCache(
+            cache_dir if len(cache_dir) > 0 else get_default_cache_dir())
         self.similarity_calculator = SimilarityCalculator(
             similarity_measure, self.text_processor.normalize_text)
-        self.cache = {}
+        # owlready2 worlds of ontology files by their paths, each file is loaded once into a world of its own
+        self.ontology_worlds: Dict[str, Any] = {}
+        self.label_indexes: Dict[EntityType, LabelIndex] = {}
+        self.matchers: Dict[EntityType, Union[SparseJaccardMatcher, TfidfMatcher, EmbeddingMatcher]] = {}
+        self.wordnet_indexes: Dict[EntityType, WordNetIndex] = {}
+        self.minhash_indexes: Dict[EntityType, MinHashIndex] = {}
 
-        if len(ner_output_path) > 0:
-            self.annotated_docs = read_ner_annotation_file(ner_output_path)
-        elif len(annotated_examples_base_path) > 0:
-            self.annotated_docs = \
-                read_brat_all_annotation_files(annotated_examples_base_path)
-        elif len(taisti_csv_path) > 0:
-            self.annotated_docs = \
-                read_taisti_dataset_csv(taisti_csv_path)
+        # docs are kept as columns, several times smaller than AnnotatedDoc objects,
+        # in the streaming mode documents are read lazily by `link_all` instead
+        self.annotated_docs = AnnotationTable()
+        if not streaming:
+            with Progress("Reading", disable=quiet) as progress:
+                if len(ner_output_path) == 0 and len(annotated_examples_base_path) == 0 and len(taisti_csv_path) > 0:
+                    # entities of TAISTI CSV rows are stored without building an object per entity
+                    for chunk in iter_taisti_entities(taisti_csv_path, chunk_size):
+                        self.annotated_docs.append_taisti_entities(chunk, taisti_csv_path)
+                        progress.update(chunk.docs_count, len(chunk.doc_ids))
+                else:
+                    for doc in self.iter_annotated_docs():
+                        self.annotated_docs.append(doc)
+                        progress.update(1, len(doc.annotations))
 
+        self.label_mapping_keys: Dict[EntityType, str] = {}
+        # persisted results are valid for the label mapping of their category they were linked to only
+        self.cache = LinkCache(
+            link_cache_size,
+            link_cache_path if len(link_cache_path) > 0 else None,
+            namespace=lambda key: self.get_label_mapping_key(key[1]) if key[1] in self.category_registry else '')
         self.normalized_label_mapping = \
             self.generate_label_mapping(self.text_processor)
 
+    def iter_annotated_docs(self) -> Iterator[AnnotatedDoc]:
+        """
+            Lazily read annotated docs from the source given to the linker (NER output, BRAT annotations or TAISTI CSV).
+
+            Returns:
+                Iterator[AnnotatedDoc]: annotated docs
+        """
+        if len(self.ner_output_path) > 0:
+            return iter_ner_annotation_file(self.ner_output_path)
+        elif len(self.annotated_examples_base_path) > 0:
+            return iter_brat_all_annotation_files(self.annotated_examples_base_path)
+        elif len(self.taisti_csv_path) > 0:
+            return iter_taisti_dataset_csv(self.taisti_csv_path)
+        return iter([])
+
     def link_all(self, output_path: str) -> None:
         """
             Iterate over internally stored annotated docs and link all spans marked by NER/BRAT to ontology entities.
             The result is then stored in a CSV file.
 
+            Linking runs in three passes: unique (text, category) mentions are collected from all docs first,
+            then each of them is resolved once (normalized and linked in batches, possibly in parallel),
+            and finally the rows are written with a single lookup per annotation.
+            In the streaming mode, docs are read lazily in chunks of `chunk_size` docs instead of being kept in memory,
+            and each chunk is linked and written before the next one is read (see `_link_doc_chunks`).
+
             Args:
                 output_path (str): link to a CSV report file
         """
-        print(f"INFO: Writing output to: {output_path}")
-        f = open(output_path, "w")
-        writer = csv.writer(f)
-
-        for id, doc in enumerate(self.annotated_docs):
-            if id % 500 == 0:
-                print(f"Processing step: {id}")
-            for annotation_id, annotation in enumerate(doc.annotations):
-                # print(f"Processing step {id}/{annotation_id}")
-                entity_text = annotation.text
-                entity_type = get_entity_type(annotation.category)
-                normalized_entity_text = \
-                    self.text_processor.normalize_text(entity_text)
-
-                linked_item: Optional[LabelWithIRI] = None
-                if entity_type in self.normalized_label_mapping and normalized_entity_text in self.normalized_label_mapping[entity_type]:
-                    linked_item = \
-                        self.normalized_label_mapping[entity_type][normalized_entity_text]
-                #    print(f"Direct match of {entity_text} to {linked_item}")
-                else:
-                    if normalized_entity_text not in self.cache:
-                        linked_item = self.link(
-                            normalized_entity_text, entity_type
-                        )
-                        self.cache[normalized_entity_text] = linked_item
-                    else:
-                        linked_item = self.cache[normalized_entity_text]
+        if self.streaming:
+            print(f"INFO: Writing output to: {output_path}")
+            with open(output_path, "w") as f:
+                self._link_doc_chunks(csv.writer(f), f)
+        else:
+            mentions, docs_count = self._collect_mentions()
+            annotations_count = sum(mentions.values())
+            ratio = annotations_count / len(mentions) if len(mentions) > 0 else 1.0
+            print(f"INFO: {annotations_count} annotations, {len(mentions)} unique mentions (deduplication ratio {ratio:.1f}x)")
+            print(f"INFO: Normalizing {len(set(text for text, _ in mentions))} distinct texts")
+            resolved = self._resolve_mentions(list(mentions))
 
+            print(f"INFO: Writing output to: {output_path}")
+            with open(output_path, "w") as f, Progress("Writing", docs_count, disable=self.quiet) as progress:
+                with self.metrics.timer("writing"):
+                    self._write_rows(self.annotated_docs, resolved, csv.writer(f), progress)
+        print(f"INFO: Normalization cache: {self.text_processor.cache_stats()}")
+        print(f"INFO: Link cache: {self.cache.stats()}")
+        for entity_type, index in self.label_indexes.items():
+            print(f"INFO: Label index of {entity_type.name} labels: {index.stats()}")
+        for entity_type, index in self.minhash_indexes.items():
+            print(f"INFO: MinHash LSH index of {entity_type.name} labels: {index.stats()}")
+        self.metrics.emit()
+
+    def _link_doc_chunks(self, writer: Any, f: Any) -> None:
+        """
+            Read, link and write docs chunk by chunk, so that the first rows are written as soon as the first chunk
+            is linked and the memory usage does not grow with the input. Mentions repeated within a chunk are resolved
+            once, and those of earlier chunks are found in the (bounded) link cache instead of being linked again.
+
+            Args:
+                writer (Any): CSV writer
+                f (Any): file written by the writer, flushed after each chunk
+        """
+        annotations_count = 0
+        with Progress("Linking", disable=self.quiet, stats=self._get_hit_rates) as progress:
+            for docs in self._iter_doc_chunks():
+                mentions = list(dict.fromkeys(
+                    (annotation.text, get_entity_type(annotation.category))
+                    for doc in docs for annotation in doc.annotations))
+                resolved = self._resolve_mentions(mentions, report_progress=False)
+                with self.metrics.timer("writing"):
+                    self._write_rows(docs, resolved, writer, progress)
+                    f.flush()
+                annotations_count += sum(len(doc.annotations) for doc in docs)
+        print(f"INFO: {annotations_count} annotations linked in chunks of {self.chunk_size} docs")
+
+    def _iter_doc_chunks(self) -> Iterator[List[AnnotatedDoc]]:
+        """
+            Returns:
+                Iterator[List[AnnotatedDoc]]: chunks of `chunk_size` docs read lazily
+        """
+        docs = self.iter_annotated_docs()
+        while True:
+            chunk = list(itertools.islice(docs, self.chunk_size))
+            if len(chunk) == 0:
+                return
+            yield chunk
+
+    def _collect_mentions(self) -> Tuple[Dict[Tuple[str, EntityType], int], int]:
+        """
+            Returns:
+                Tuple[Dict[Tuple[str, EntityType], int], int]: number of annotations of each unique (raw text, category)
+                                                               mention of stored docs, in the order the mentions first
+                                                               occur in docs, and the number of docs
+        """
+        mentions: Dict[Tuple[str, EntityType], int] = {}
+        # stored docs are counted on columns, without building AnnotatedDoc objects
+        for (text, category), count in self.annotated_docs.count_mentions().items():
+            mention = (text, get_entity_type(category))
+            mentions[mention] = mentions.get(mention, 0) + count
+        return mentions, len(self.annotated_docs)
+
+    def _resolve_mentions(
+        self, mentions: List[Tuple[str, EntityType]], normalized_texts: Optional[Dict[str, str]] = None,
+        report_progress: bool = True
+    ) -> Dict[Tuple[str, EntityType], Optional[LabelWithIRI]]:
+        """
+            Link each unique mention once: normalize all distinct texts at once, match them directly
+            to normalized labels where possible, reuse results of the link cache and link the remaining ones
+            (see `_link_distinct_texts`).
+
+            Args:
+                mentions (List[Tuple[str, EntityType]]): unique (raw text, category) mentions, in order of occurrence
+                normalized_texts (Optional[Dict[str, str]]): normalized forms of raw texts, normalized here if None
+                report_progress (bool): whether to show the progress of linking the remaining mentions
+            Returns:
+                Dict[Tuple[str, EntityType], Optional[LabelWithIRI]]: linked entity (or None) for each mention
+        """
+        if normalized_texts is None:
+            normalized_texts = self.normalize_mentions(mentions)
+
+        resolved: Dict[Tuple[str, EntityType], Optional[LabelWithIRI]] = {}
+        keys: Dict[Tuple[str, EntityType], Tuple] = {}
+        for text, entity_type in mentions:
+            normalized_entity_text = normalized_texts[text]
+            if entity_type in self.normalized_label_mapping and normalized_entity_text in self.normalized_label_mapping[entity_type]:
+                resolved[(text, entity_type)] = self.normalized_label_mapping[entity_type][normalized_entity_text]
+            else:
+                keys[(text, entity_type)] = self.get_link_cache_key(normalized_entity_text, entity_type)
+
+        linked = self.cache.get_many(dict.fromkeys(keys.values()))
+        pending: Dict[EntityType, List[str]] = {}
+        for key in dict.fromkeys(keys.values()):
+            if key not in linked:
+                pending.setdefault(key[1], []).append(key[0])
+        self.metrics.increment("direct_matches", len(resolved))
+        self.metrics.increment("link_cache_hits", len(linked))
+        self.metrics.increment("scored_mentions", sum(len(texts) for texts in pending.values()))
+        with self.metrics.timer("scoring"):
+            for (text, entity_type), linked_item in self._link_distinct_texts(pending, report_progress).items():
+                linked[self.get_link_cache_key(text, entity_type)] = linked_item
+
+        for mention, key in keys.items():
+            resolved[mention] = linked[key]
+        return resolved
+
+    def normalize_mentions(self, mentions: List[Tuple[str, EntityType]]) -> Dict[str, str]:
+        """
+            Args:
+                mentions (List[Tuple[str, EntityType]]): (raw text, category) mentions
+            Returns:
+                Dict[str, str]: normalized form of each distinct raw text
+        """
+        texts = list(dict.fromkeys(text for text, _ in mentions))
+        with self.metrics.timer("normalization"):
+            return dict(zip(texts, self.text_processor.normalize_many(texts, n_process=self.n_process)))
+
+    def link_mentions(
+        self, mentions: List[Tuple[str, EntityType]]
+    ) -> List[Tuple[Optional[LabelWithIRI], Optional[float]]]:
+        """
+            Link a batch of (raw text, category) mentions, e.g., received by the linking service (see `server.py`).
+            Repeated mentions are linked once. Mentions with nothing left after normalization (e.g., empty texts
+            or stopwords only) are not linked.
+
+            Args:
+                mentions (List[Tuple[str, EntityType]]): (raw text, category) mentions
+            Returns:
+                List[Tuple[Optional[LabelWithIRI], Optional[float]]]: linked entity (or None) and its similarity
+                                                                      to the normalized text, for each mention
+        """
+        unique_mentions = list(dict.fromkeys(mentions))
+        normalized_texts = self.normalize_mentions(unique_mentions)
+        # an empty text would be matched directly to a label normalized to nothing
+        linkable_mentions = [mention for mention in unique_mentions if len(normalized_texts[mention[0]]) > 0]
+        resolved = self._resolve_mentions(linkable_mentions, normalized_texts)
+        results = {mention: (None, None) for mention in unique_mentions}
+        for mention in linkable_mentions:
+            results[mention] = (
+                resolved[mention], self.get_similarity(normalized_texts[mention[0]], resolved[mention], mention[1]))
+        return [results[mention] for mention in mentions]
+
+    def get_similarity(self, text: str, item: Optional[LabelWithIRI], entity_type: EntityType) -> Optional[float]:
+        """
+            Args:
+                text (str): normalized text
+                item (Optional[LabelWithIRI]): entity linked to the text (or None)
+                entity_type (EntityType): NER/BRAT entity type assigned to the text
+            Returns:
+                Optional[float]: similarity of the text and the label of the linked entity (None if nothing is linked)
+        """
+        if item is None:
+            return None
+        if text == item.normalized_label:
+            return 1.0
+        if self.similarity_measure in [SimilarityType.TFIDF, SimilarityType.EMBEDDING]:
+            return float(self._get_matcher(entity_type).score_pairs([text], [item.normalized_label])[0])
+        return float(self.similarity_calculator.calculate(
+            self.similarity_calculator.preprocess(text),
+            self.similarity_calculator.preprocess(item.normalized_label)))
+
+    def get_link_cache_key(self, text: str, entity_type: EntityType) -> Tuple[str, EntityType, SimilarityType, float]:
+        """
+            Args:
+                text (str): normalized text
+                entity_type (EntityType): NER/BRAT entity type assigned to the text
+            Returns:
+                Tuple[str, EntityType, SimilarityType, float]: key of the link result in the link cache
+        """
+        return (text, entity_type, self.similarity_measure, self.min_acceptable_similarity)
+
+    def _link_distinct_texts(
+        self, pending: Dict[EntityType, List[str]], report_progress: bool = True
+    ) -> Dict[Tuple[str, EntityType], Optional[LabelWithIRI]]:
+        """
+            Link distinct normalized texts and store the results in the link cache. Texts are linked in batches of `batch_size` texts,
+            spread over `workers` processes if more than one worker is used.
+
+            Args:
+                pending (Dict[EntityType, List[str]]): distinct normalized texts to link, per category
+                report_progress (bool): whether to show the progress of linking
+            Returns:
+                Dict[Tuple[str, EntityType], Optional[LabelWithIRI]]: linked entity (or None) for each text and category
+        """
+        parallel = self.workers > 1 and sum(len(texts) for texts in pending.values()) > 0
+        if parallel and "fork" not in multiprocessing.get_all_start_methods():
+            print("WARNING: Forking processes is not supported on this platform, linking in a single process")
+            parallel = False
+
+        linked: Dict[Tuple[str, EntityType], Optional[LabelWithIRI]] = {}
+        total = sum(len(texts) for texts in pending.values())
+        with Progress("Linking", total, "mentions", disable=self.quiet or not report_progress or total == 0,
+                      stats=self._get_hit_rates) as progress:
+            if parallel:
+                linked = self._link_in_parallel(pending, progress)
+            else:
+                # texts linked one by one are taken in smaller steps, so that the progress is reported more often
+                step = self.batch_size if self.similarity_calculator.is_batched() else min(self.batch_size, 100)
+                for entity_type, texts in pending.items():
+                    for start in range(0, len(texts), step):
+                        batch = texts[start:start + step]
+                        for text, linked_item in zip(batch, self.link_many(batch, entity_type)):
+                            linked[(text, entity_type)] = linked_item
+                        progress.update(len(batch))
+
+        self.cache.put_many(
+            (self.get_link_cache_key(text, entity_type), linked_item)
+            for (text, entity_type), linked_item in linked.items())
+        return linked
+
+    def _get_hit_rates(self) -> Dict[str, str]:
+        """
+            Returns:
+                Dict[str, str]: shares of mentions matched directly to normalized labels and found in the link cache
+        """
+        counters = self.metrics.counters
+        total = counters.get("direct_matches", 0) + counters.get("link_cache_hits", 0) + counters.get("scored_mentions", 0)
+        return {
+            "direct": f"{counters.get('direct_matches', 0) / max(total, 1):.0%}",
+            "cached": f"{counters.get('link_cache_hits', 0) / max(total, 1):.0%}",
+        }
+
+    def _write_rows(
+        self, docs: Iterable[AnnotatedDoc], resolved: Dict[Tuple[str, EntityType], Optional[LabelWithIRI]],
+        writer: Any, progress: Optional[Progress] = None
+    ) -> None:
+        """
+            Write linked annotations of docs as CSV rows.
+
+            Args:
+                docs (Iterable[AnnotatedDoc]): docs to write
+                resolved (Dict[Tuple[str, EntityType], Optional[LabelWithIRI]]): linked entity (or None) of each mention
+                writer (Any): CSV writer
+                progress (Optional[Progress]): progress of writing, updated after each doc
+        """
+        for doc in docs:
+            if progress is not None:
+                progress.update(1, len(doc.annotations))
+            for annotation in doc.annotations:
+                linked_item = resolved[(annotation.text, get_entity_type(annotation.category))]
                 annotation_data = [
                     annotation.file_id,
                     annotation.id,
@@ -101,6 +433,263 @@ class EntityLinker:
                 elif not self.ignore_not_linkable:
                     writer.writerow(annotation_data + ["NONE", "NONE"])
 
+    def _link_in_parallel(
+        self, pending: Dict[EntityType, List[str]], progress: Optional[Progress] = None
+    ) -> Dict[Tuple[str, EntityType], Optional[LabelWithIRI]]:
+        """
+            Link texts in a pool of forked worker processes. Workers inherit the linker (including label mappings,
+            which are memory-mapped, and indexes, which are built before forking) instead of copying it.
+
+            Args:
+                pending (Dict[EntityType, List[str]]): distinct normalized texts to link, per category
+                progress (Optional[Progress]): progress of linking, updated as chunks of texts are linked
+            Returns:
+                Dict[Tuple[str, EntityType], Optional[LabelWithIRI]]: linked entity (or None) for each text and category
+        """
+        global _worker_linker
+
+        tasks = []
+        for entity_type, texts in pending.items():
+            self._prepare(entity_type)
+            # a few chunks per worker balance the load without much communication overhead
+            chunk_size = max(1, min(self.batch_size, -(-len(texts) // (4 * self.workers))))
+            tasks += [(entity_type, texts[start:start + chunk_size]) for start in range(0, len(texts), chunk_size)]
+
+        linked: Dict[Tuple[str, EntityType], Optional[LabelWithIRI]] = {}
+        _worker_linker = self
+        try:
+            with multiprocessing.get_context("fork").Pool(self.workers) as pool:
+                for (entity_type, texts), linked_items in zip(tasks, pool.imap(_link_in_worker, tasks)):
+                    for text, linked_item in zip(texts, linked_items):
+                        linked[(text, entity_type)] = linked_item
+                    if progress is not None:
+                        progress.update(len(texts))
+        finally:
+            _worker_linker = None
+        return linked
+
+    def _prepare(self, entity_type: EntityType) -> None:
+        """
+            Build structures used to link texts of a given category (an index or a matcher), if not built yet.
+
+            Args:
+                entity_type (EntityType): NER/BRAT entity type
+        """
+        if entity_type not in self.normalized_label_mapping:
+            return
+        if self.similarity_calculator.is_batched():
+            self._get_matcher(entity_type)
+        elif self.similarity_calculator.is_indexable():
+            self._get_label_index(entity_type)
+        elif self.similarity_measure == SimilarityType.WORDNET:
+            self._get_wordnet_index(entity_type)
+        elif self.similarity_measure == SimilarityType.MINHASH and self.min_acceptable_similarity >= 0:
+            self._get_minhash_index(entity_type)
+
+    def _get_matcher(self, entity_type: EntityType) -> Union[SparseJaccardMatcher, TfidfMatcher, EmbeddingMatcher]:
+        if entity_type not in self.matchers:
+            labels = self._get_labels(entity_type)
+            if self.similarity_measure == SimilarityType.TFIDF:
+                self.matchers[entity_type] = self._get_tfidf_matcher(entity_type, labels)
+            elif self.similarity_measure == SimilarityType.EMBEDDING:
+                self.matchers[entity_type] = self._get_embedding_matcher(entity_type, labels)
+            else:
+                category_labels = self.normalized_label_mapping[entity_type]
+                self.matchers[entity_type] = SparseJaccardMatcher(
+                    labels, self.similarity_calculator.preprocess, self.min_acceptable_similarity,
+                    (category_labels.store.get_tokens(), category_labels.token_offsets, category_labels.token_ids))
+        return self.matchers[entity_type]
+
+    def _get_labels(self, entity_type: EntityType) -> Sequence[LabelWithIRI]:
+        """
+            Args:
+                entity_type (EntityType): NER/BRAT entity type
+            Returns:
+                Sequence[LabelWithIRI]: labels of a given category by their positions, materialized only when accessed,
+                                        so that indexes and matchers do not copy all labels into every process
+        """
+        return self.normalized_label_mapping[entity_type].as_sequence()
+
+    def _get_label_representations(self, entity_type: EntityType) -> List[Any]:
+        """
+            Args:
+                entity_type (EntityType): NER/BRAT entity type
+            Returns:
+                List[Any]: similarity representations of labels of a given category, built from their stored tokens
+                           instead of preprocessing the labels again
+        """
+        category_labels = self.normalized_label_mapping[entity_type]
+        return [self.similarity_calculator.preprocess_tokens(category_labels.get_tokens(position))
+                for position in range(len(category_labels))]
+
+    def _get_tfidf_matcher(self, entity_type: EntityType, labels: Sequence[LabelWithIRI]) -> TfidfMatcher:
+        """
+            Load the TF-IDF matrix of labels of a given category stored next to the cached label mapping,
+            or build and store it if missing.
+
+            Args:
+                entity_type (EntityType): NER/BRAT entity type
+                labels (Sequence[LabelWithIRI]): labels of the category
+            Returns:
+                TfidfMatcher: matcher of the category
+        """
+        artifact_name = f"tfidf-{CHAR_NGRAM_SIZE}-{entity_type.name}.npz"
+        data = self.label_mapping_cache.load_artifact(self.get_label_mapping_key(entity_type), artifact_name)
+        if data is not None:
+            try:
+                return TfidfMatcher.from_bytes(
+                    labels, self.similarity_calculator.preprocess, self.min_acceptable_similarity, data)
+            except Exception as e:
+                print(f"WARNING: Ignoring unreadable TF-IDF matrix {artifact_name}: {e}")
+
+        matcher = TfidfMatcher(labels, self.similarity_calculator.preprocess, self.min_acceptable_similarity)
+        self.label_mapping_cache.save_artifact(self.get_label_mapping_key(entity_type), artifact_name, matcher.to_bytes())
+        return matcher
+
+    def _get_embedding_matcher(self, entity_type: EntityType, labels: Sequence[LabelWithIRI]) -> EmbeddingMatcher:
+        """
+            Memory-map label vectors of a given category stored next to the cached label mapping,
+            or embed the labels and store their vectors if missing (or not matching the labels).
+
+            Args:
+                entity_type (EntityType): NER/BRAT entity type
+                labels (Sequence[LabelWithIRI]): labels of the category
+            Returns:
+                EmbeddingMatcher: matcher of the category
+        """
+        if self.vectorizer is None:
+            self.vectorizer = SpacyVectorizer(self.embedding_model)
+        key = self.get_label_mapping_key(entity_type)
+        prefix = f"embeddings-{self.vectorizer.get_id()}-{entity_type.name}"
+
+        vectors = self._load_label_vectors(key, f"{prefix}.npy", len(labels))
+        rebuilt = vectors is None
+        if rebuilt:
+            print(f"INFO: Embedding {len(labels)} {entity_type.name} labels with {self.embedding_model}")
+            self.label_mapping_cache.save_artifact(
+                key, f"{prefix}.npy", self._to_npy(EmbeddingMatcher.embed_labels(labels, self.vectorizer)))
+            vectors = np.load(self.label_mapping_cache.get_artifact_path(key, f"{prefix}.npy"), mmap_mode="r")
+        if not self.quantize_embeddings:
+            return EmbeddingMatcher(labels, self.vectorizer, self.min_acceptable_similarity, vectors)
+
+        # quantized vectors of replaced vectors are stale as well
+        quantized = self._load_label_vectors(key, f"{prefix}-int8.npy", len(labels)) if not rebuilt else None
+        scales = self._load_label_vectors(key, f"{prefix}-scales.npy", len(labels), None) if quantized is not None else None
+        if scales is None:
+            quantized, scales = quantize_vectors(np.asarray(vectors))
+            self.label_mapping_cache.save_artifact(key, f"{prefix}-int8.npy", self._to_npy(quantized))
+            self.label_mapping_cache.save_artifact(key, f"{prefix}-scales.npy", self._to_npy(scales))
+            quantized = np.load(self.label_mapping_cache.get_artifact_path(key, f"{prefix}-int8.npy"), mmap_mode="r")
+        return EmbeddingMatcher(labels, self.vectorizer, self.min_acceptable_similarity, quantized, scales)
+
+    def _load_label_vectors(self, key: str, name: str, labels_count: int,
+                            mmap_mode: Optional[str] = "r") -> Optional[np.ndarray]:
+        """
+            Args:
+                key (str): cache key of the label mapping
+                name (str): name of an artifact holding an array with a row per label
+                labels_count (int): number of labels of the mapping
+                mmap_mode (Optional[str]): memory-map mode of the array (None reads it into memory)
+            Returns:
+                Optional[np.ndarray]: the array, or None if it is missing, unreadable or does not match the labels
+        """
+        path = self.label_mapping_cache.get_artifact_path(key, name)
+        if not os.path.exists(path):
+            return None
+        try:
+            array = np.load(path, mmap_mode=mmap_mode)
+        except Exception as e:
+            print(f"WARNING: Ignoring unreadable label vectors {name}: {e}")
+            return None
+        if len(array) != labels_count:
+            print(f"WARNING: Ignoring label vectors {name} of {len(array)} labels, expected {labels_count}")
+            return None
+        return array
+
+    @staticmethod
+    def _to_npy(array: np.ndarray) -> bytes:
+        buffer = io.BytesIO()
+        np.save(buffer, array)
+        return buffer.getvalue()
+
+    def _get_label_index(self, entity_type: EntityType) -> LabelIndex:
+        if entity_type not in self.label_indexes:
+            self.label_indexes[entity_type] = LabelIndex(
+                self._get_labels(entity_type),
+                self.similarity_calculator.preprocess,
+                self._get_label_representations(entity_type))
+        return self.label_indexes[entity_type]
+
+    def _get_wordnet_index(self, entity_type: EntityType) -> WordNetIndex:
+        if entity_type not in self.wordnet_indexes:
+            labels = self._get_labels(entity_type)
+            self.wordnet_indexes[entity_type] = WordNetIndex(
+                labels,
+                self._get_label_synsets(entity_type, labels),
+                get_max_path_distance(self.min_acceptable_similarity))
+        return self.wordnet_indexes[entity_type]
+
+    def _get_minhash_index(self, entity_type: EntityType) -> MinHashIndex:
+        if entity_type not in self.minhash_indexes:
+            index = MinHashIndex(
+                self._get_labels(entity_type),
+                self.similarity_calculator.preprocess,
+                self.min_acceptable_similarity,
+                num_permutations=self.minhash_permutations,
+                recall=self.minhash_recall,
+                representations=self._get_label_representations(entity_type))
+            print(f"INFO: MinHash LSH index of {len(index)} {entity_type.name} labels: {index.bands} bands of {index.rows} rows, "
+                  f"expected recall {index.expected_recall:.3f} at similarity {self.min_acceptable_similarity}")
+            self.minhash_indexes[entity_type] = index
+        return self.minhash_indexes[entity_type]
+
+    def _get_label_synsets(self, entity_type: EntityType, labels: Sequence[LabelWithIRI]) -> List[List[Any]]:
+        """
+            Find synsets of labels of a given category. As POS-tagging all labels takes a while,
+            the synsets are found once and stored next to the cached label mapping.
+
+            Args:
+                entity_type (EntityType): NER/BRAT entity type
+                labels (Sequence[LabelWithIRI]): labels of the category
+            Returns:
+                List[List[Any]]: synsets of each label
+        """
+        artifact_name = f"wordnet-{entity_type.name}.json"
+        settings = {"nltk": nltk.__version__, "wordnet": wn.get_version()}
+        data = self.label_mapping_cache.load_artifact(self.get_label_mapping_key(entity_type), artifact_name)
+        if data is not None:
+            stored = json.loads(data)
+            if stored["settings"] == settings and len(stored["synsets"]) == len(labels):
+                return [[wn.synset(name) for name in names] for names in stored["synsets"]]
+
+        print(f"INFO: Finding WordNet synsets of {len(labels)} {entity_type.name} labels")
+        representations = [self.similarity_calculator.preprocess(item.normalized_label) for item in labels]
+        self.label_mapping_cache.save_artifact(self.get_label_mapping_key(entity_type), artifact_name, json.dumps({
+            "settings": settings,
+            "synsets": [[synset.name() for synset in synsets] for synsets in representations],
+        }).encode("utf-8"))
+        return representations
+
+    def link_many(
+        self, texts: List[str], entity_type: EntityType
+    ) -> List[Optional[LabelWithIRI]]:
+        """
+            Link a batch of texts sharing a category to ontology entities. Batched similarity measures
+            (e.g., Sparse Jaccard) score the whole batch at once, other measures link the texts one by one.
+
+            Args:
+                texts (List[str]): texts to link
+                entity_type (EntityType): NER/BRAT entity type assigned to the texts
+            Returns:
+                List[Optional[LabelWithIRI]]: linked entity (or None if nothing is linked) for each text
+        """
+        if entity_type not in self.normalized_label_mapping:
+            return [None] * len(texts)
+
+        if self.similarity_calculator.is_batched():
+            return self._get_matcher(entity_type).match(texts)
+        return [self.link(text, entity_type) for text in texts]
+
     def link(
         self, text: str, entity_type: EntityType
     ) -> Optional[LabelWithIRI]:
@@ -119,18 +708,26 @@ class EntityLinker:
         if entity_type not in self.normalized_label_mapping:
             return best_item
 
-        category_label_mapping = self.normalized_label_mapping[entity_type]
+        if self.similarity_calculator.is_batched():
+            return self.link_many([text], entity_type)[0]
 
         text_preprocessed = self.similarity_calculator.preprocess(text)
 
-        for _, item in category_label_mapping.items():
-            # preprocess and cache representation required by similarity calculator
-            if not item.similarity_representation:
-                item.similarity_representation = self.similarity_calculator.preprocess(item.normalized_label)
+        if self.similarity_calculator.is_indexable():
+            # set-based measures skip labels whose sizes cannot beat the best score (same result as the scan below)
+            label_index = self._get_label_index(entity_type)
+            scored = label_index.scored
+            position = label_index.find_best(
+                text_preprocessed, self.similarity_calculator.calculate, self.min_acceptable_similarity)
+            self.metrics.increment("labels_scored", label_index.scored - scored)
+            return label_index.labels[position] if position >= 0 else None
 
+        labels_scored = 0
+        for item, item_preprocessed in self._get_candidates(text_preprocessed, entity_type):
+            labels_scored += 1
             # preprocess current text
             current_label_similarity = self.similarity_calculator.calculate(
-                text_preprocessed, item.similarity_representation)
+                text_preprocessed, item_preprocessed)
 
             if (
                 current_label_similarity > self.min_acceptable_similarity
@@ -138,48 +735,271 @@ class EntityLinker:
             ):
                 max_similarity = current_label_similarity
                 best_item = item
-                #print(
-                #    f"Found new best: {item.normalized_label} with similarity {current_label_similarity}")
             if current_label_similarity == 1.0:
                 break
+        self.metrics.increment("labels_scored", labels_scored)
         return best_item
 
-    def generate_label_mapping(self, text_processor: TextProcessor) -> Dict[EntityType, Dict[str, LabelWithIRI]]:
+    def _get_candidates(
+        self, text_preprocessed: Any, entity_type: EntityType
+    ) -> Iterator[Tuple[LabelWithIRI, Any]]:
+        """
+            Yield labels of a given category that may be linked to a preprocessed text by the scan of `link`,
+            in the order of the label mapping. Set-based similarity measures do not scan labels (see `LabelIndex.find_best`).
+            For Wordnet only labels with synsets close enough to synsets of the text are yielded (see `WordNetIndex`).
+            For MinHash only labels found by the LSH index are yielded, which may miss some labels (see `MinHashIndex`).
+
+            Args:
+                text_preprocessed (Any): representation of a text calculated by the similarity calculator
+                entity_type (EntityType): NER/BRAT entity type assigned to a given text
+            Returns:
+                Iterator[Tuple[LabelWithIRI, Any]]: labels accompanied by their similarity representations
+        """
+        if self.similarity_measure == SimilarityType.WORDNET:
+            yield from self._get_wordnet_index(entity_type).candidates(text_preprocessed)
+            return
+        if self.similarity_measure == SimilarityType.MINHASH and self.min_acceptable_similarity >= 0:
+            yield from self._get_minhash_index(entity_type).candidates(text_preprocessed)
+            return
+
+        for _, item in self.normalized_label_mapping[entity_type].items():
+            # preprocess and cache representation required by similarity calculator
+            if not item.similarity_representation:
+                item.similarity_representation = self.similarity_calculator.preprocess(item.normalized_label)
+            yield item, item.similarity_representation
+
+    def generate_label_mapping(self, text_processor: TextProcessor) -> LazyCategoryMapping:
         """
-            From an ontology file, generate a map relating normalized labels of entities to their IRIs. Provide separate maps for each category.
-            Because the map generation process is time consuming, caching is introduced -- if cache is present ('./foodon_cache.pkl') the map is not
-            calculated. BEWARE: If normalization process changes, or ontology changes -- you have to remove the cache to recalculate the mapping.
+            From ontology files, generate maps relating normalized labels of entities to their IRIs, separately for each
+            category of the category registry. Labels of a category are loaded (or built) when it is first requested.
 
             Args:
                 text_processor (TextProcessor): text processor used to normalize ontology labels
             Returns:
-                Dict[EntityType, Dict[str, LabelWithIRI]]: For each allowed entity type (e.g., )
+                LazyCategoryMapping: For each allowed entity type (e.g., FOOD), a map of normalized labels to LabelWithIRI
         """
-        cache_path = './foodon_cache.pkl'
+        def load(entity_type: EntityType) -> Mapping:
+            with self.metrics.timer("label_mapping_load"):
+                return self.load_category_labels(entity_type, text_processor)
 
-        if os.path.exists(cache_path):
-            with open(cache_path, 'rb') as f:
-                return pickle.load(f)
+        return LazyCategoryMapping(self.category_registry, load)
+
+    def get_label_mapping_key(self, entity_type: EntityType) -> str:
+        """
+            Args:
+                entity_type (EntityType): NER/BRAT entity type
+            Returns:
+                str: cache key of the label mapping of a category, which identifies artifacts and link results
+                     derived from it as well
+        """
+        if entity_type not in self.label_mapping_keys:
+            self.label_mapping_keys[entity_type] = self.label_mapping_cache.get_key(
+                [source.ontology_path for source in self.category_registry.get_sources(entity_type)],
+                self._get_label_mapping_settings(entity_type, self.text_processor))
+        return self.label_mapping_keys[entity_type]
+
+    def _get_label_mapping_settings(self, entity_type: EntityType, text_processor: TextProcessor) -> Dict[str, Any]:
+        sources = self.category_registry.get_sources(entity_type)
+        settings = {
+            "category": entity_type.name,
+            "normalization": text_processor.get_settings(),
+            "root_iris": [source.root_iris for source in sources],
+            "version": __version__,
+        }
+        label_tables = [self._uses_label_table(entity_type, source) for source in sources]
+        if any(label_tables):
+            # labels read from the table change with it, not with the ontology file
+            settings["label_tables"] = [self.label_mapping_cache.get_file_hash(self.label_table_path) if used else None
+                                        for used in label_tables]
+        return settings
+
+    def load_category_labels(self, entity_type: EntityType, text_processor: TextProcessor) -> Mapping:
+        """
+            Load labels of a category, or build them from its ontology files. Because building is time consuming,
+            labels are cached in the cache directory under a key derived from the content of the ontology files,
+            roots of the category, normalization settings and the package version.
+            If any of them changes, labels are rebuilt and stale ones are removed.
+            Labels are rebuilt from label tables extracted from the ontologies once (see `OntologyParser.get_label_rows`),
+            so an ontology is parsed again only if its file or the roots change.
+            With incremental rebuilds, a new release of an ontology reuses normalized labels built from the previous
+            one, so only added or changed labels are normalized (see `migrate_link_cache` as well).
+
+            Args:
+                entity_type (EntityType): NER/BRAT entity type
+                text_processor (TextProcessor): text processor used to normalize ontology labels
+            Returns:
+                Mapping: a map of normalized labels to LabelWithIRI (`CategoryLabels`)
+        """
+        sources = self.category_registry.get_sources(entity_type)
+        ontology_paths = [source.ontology_path for source in sources]
+        settings = self._get_label_mapping_settings(entity_type, text_processor)
+        cache_key = self.label_mapping_cache.get_key(ontology_paths, settings)
+        store = self.label_mapping_cache.load(cache_key)
+        if store is not None:
+            return store[entity_type]
+
+        known_normalizations = None
+        previous_labels = None
+        previous_key = self.label_mapping_cache.find_previous_key(ontology_paths, settings, entity_type.name) \
+            if self.incremental_rebuild else None
+        previous_store = self.label_mapping_cache.load(previous_key) if previous_key is not None else None
+        if previous_store is not None and entity_type in previous_store:
+            print(f"INFO: Rebuilding {entity_type.name} labels {previous_key} incrementally")
+            previous_labels = list(previous_store[entity_type].values())
+            # normalization depends on the label only, so labels present in the previous mapping are not normalized
+            known_normalizations = {item.label: item.normalized_label for item in previous_labels}
+
+        labels: Dict[str, LabelWithIRI] = {}
+        for source in sources:
+            ontology_parser = self._get_ontology_parser(entity_type, source)
+            # same as building labels of all sources at once: later labels replace earlier ones of the same form
+            labels.update(ontology_parser.get_IRI_labels_data(
+                text_processor, entity_type, n_process=self.n_process, known_normalizations=known_normalizations))
+            ontology_parser.print_timings()
+            for stage, elapsed in ontology_parser.timings.items():
+                self.timings[stage] = self.timings.get(stage, 0.0) + elapsed
+        self.label_mapping_cache.save(
+            cache_key, {entity_type: labels}, ontology_paths, settings, entity_type.name)
+        # use the stored mapping, so that cold and warm starts behave the same
+        category_labels = self.label_mapping_cache.load(cache_key)[entity_type]
+        if previous_labels is not None:
+            self.migrate_link_cache(entity_type, previous_key, previous_labels, list(category_labels.values()))
+        return category_labels
+
+    def _get_ontology_parser(self, entity_type: EntityType, source: CategorySource) -> OntologyParser:
+        """
+            Args:
+                entity_type (EntityType): NER/BRAT entity type
+                source (CategorySource): ontology file and roots of the category
+            Returns:
+                OntologyParser: parser of labels of the category, reading them from a label table if possible
+        """
+        if self._uses_label_table(entity_type, source):
+            label_table_path = self.label_table_path
         else:
-            print("Parsing ontology, it may take some time...")
-            normalized_label_mapping = \
-                self.ontology_parser.get_IRI_labels_data_per_category(
-                    normalizer=text_processor
-                )
-            with open(cache_path, 'wb') as f:
-                pickle.dump(normalized_label_mapping, f,
-                            protocol=pickle.HIGHEST_PROTOCOL)
-            return normalized_label_mapping
+            # labels extracted once are reused when only normalization settings change
+            settings = {"root_iris": {entity_type.name: source.root_iris}, "version": __version__}
+            label_table_path = self.label_mapping_cache.get_label_table_path(
+                self.label_mapping_cache.get_key(source.ontology_path, settings),
+                source.ontology_path, entity_type.name, settings)
+        if not os.path.exists(label_table_path):
+            print(f"Parsing ontology {source.ontology_path} for {entity_type.name} labels, it may take some time...")
+        ontology_path = os.path.abspath(source.ontology_path)
+        if ontology_path not in self.ontology_worlds:
+            self.ontology_worlds[ontology_path] = owlready2.World()
+        return OntologyParser(source.ontology_path, label_table_path, {entity_type: source.root_iris},
+                              self.ontology_worlds[ontology_path])
+
+    def _uses_label_table(self, entity_type: EntityType, source: CategorySource) -> bool:
+        """
+            Check whether labels of a category source are read from the label table given to the linker, which holds
+            labels of the main ontology for roots of categories it was extracted for (see `read_label_table_roots`).
+
+            Args:
+                entity_type (EntityType): NER/BRAT entity type
+                source (CategorySource): ontology file and roots of the category
+            Returns:
+                bool: True if the table was extracted from the ontology of the source for the same roots of the category
+        """
+        key = (entity_type, os.path.abspath(source.ontology_path), tuple(source.root_iris))
+        if key not in self.label_table_usage:
+            used = False
+            if (
+                len(self.label_table_path) > 0 and os.path.exists(self.label_table_path)
+                and os.path.abspath(source.ontology_path) == os.path.abspath(self.ontology_path)
+            ):
+                try:
+                    table_root_iris = read_label_table_roots(self.label_table_path).get(entity_type)
+                except Exception as e:
+                    print(f"WARNING: Ignoring unreadable label table {self.label_table_path}: {e}")
+                    table_root_iris = None
+                used = table_root_iris == source.root_iris
+                if not used:
+                    print(f"WARNING: Label table {self.label_table_path} was not extracted for {entity_type.name} roots "
+                          f"{', '.join(source.root_iris)}, extracting {entity_type.name} labels from the ontology")
+            self.label_table_usage[key] = used
+        return self.label_table_usage[key]
+
+    def migrate_link_cache(self, entity_type: EntityType, previous_key: str,
+                           previous_labels: List[LabelWithIRI], labels: List[LabelWithIRI]) -> None:
+        """
+            Keep persisted link results of a previous label mapping of a category which the new mapping cannot change.
+            For set-based similarity measures with non-negative thresholds a result depends only on labels sharing
+            a feature with the text, so it is kept if these labels (and their order) are the same in both mappings.
+            Other results are dropped, unless labels are unchanged.
+
+            Args:
+                entity_type (EntityType): NER/BRAT entity type
+                previous_key (str): cache key of the previous mapping, the namespace of its link results
+                previous_labels (List[LabelWithIRI]): labels of the previous mapping
+                labels (List[LabelWithIRI]): labels of the new mapping
+        """
+        def get_label_keys(items: Iterable[LabelWithIRI]) -> List[Tuple[str, str, str]]:
+            return [(item.normalized_label, item.label, item.iri) for item in items]
+
+        unchanged = get_label_keys(previous_labels) == get_label_keys(labels)
+        calculators: Dict[SimilarityType, SimilarityCalculator] = {}
+        indexes: Dict[SimilarityType, Tuple[LabelIndex, LabelIndex]] = {}
+
+        def keep(key: Tuple[str, EntityType, SimilarityType, float]) -> bool:
+            text, _, similarity_type, threshold = key
+            if unchanged:
+                return True
+            if similarity_type not in calculators:
+                calculators[similarity_type] = SimilarityCalculator(similarity_type, self.text_processor.normalize_text)
+            calculator = calculators[similarity_type]
+            if not calculator.is_indexable() or threshold < 0:
+                return False
+            if similarity_type not in indexes:
+                indexes[similarity_type] = (
+                    LabelIndex(previous_labels, calculator.preprocess), LabelIndex(labels, calculator.preprocess))
+            previous_index, index = indexes[similarity_type]
+            representation = calculator.preprocess(text)
+            return get_label_keys(item for item, _ in previous_index.candidates(representation)) == \
+                get_label_keys(item for item, _ in index.candidates(representation))
+
+        kept, dropped = self.cache.migrate(
+            previous_key, self.get_label_mapping_key(entity_type), keep, (str, EntityType, SimilarityType, float))
+        if kept + dropped > 0:
+            print(f"INFO: Kept {kept} persisted {entity_type.name} link results unaffected by the ontology update, "
+                  f"dropped {dropped}")
 
 
 def main(ontology_path: str, annotations_path: str, output_file_path: str,
          ner_output: str, taisti_csv_path: str, ignore_not_linkable: bool,
-         similarity_measure: SimilarityType):
+         similarity_measure: SimilarityType, batch_size: int, n_process: int,
+         normalization_cache_size: int, normalization_cache_path: str, cache_dir: str, workers: int,
+         streaming: bool, chunk_size: int, link_cache_size: int, link_cache_path: str,
+         minhash_permutations: int, minhash_recall: float, embedding_model: str, quantize_embeddings: bool,
+         label_table_path: str, incremental_rebuild: bool, category_config_path: str,
+         metrics_sinks: List[str], profile: bool, profile_output_path: str, quiet: bool):
     """ Entry point """
     el = EntityLinker(ontology_path, annotations_path, ner_output, taisti_csv_path,
                       ignore_not_linkable=ignore_not_linkable,
-                      similarity_measure=similarity_measure)
-    el.link_all(output_file_path)
+                      similarity_measure=similarity_measure,
+                      batch_size=batch_size,
+                      n_process=n_process,
+                      normalization_cache_size=normalization_cache_size,
+                      normalization_cache_path=normalization_cache_path,
+                      cache_dir=cache_dir,
+                      workers=workers,
+                      streaming=streaming,
+                      chunk_size=chunk_size,
+                      link_cache_size=link_cache_size,
+                      link_cache_path=link_cache_path,
+                      minhash_permutations=minhash_permutations,
+                      minhash_recall=minhash_recall,
+                      embedding_model=embedding_model,
+                      quantize_embeddings=quantize_embeddings,
+                      label_table_path=label_table_path,
+                      incremental_rebuild=incremental_rebuild,
+                      category_config_path=category_config_path,
+                      metrics_sinks=[get_metrics_sink(spec) for spec in metrics_sinks],
+                      quiet=quiet)
+    if profile:
+        profile_run(lambda: el.link_all(output_file_path), profile_output_path)
+    else:
+        el.link_all(output_file_path)
 
 
 if __name__ == "__main__":
@@ -211,11 +1031,104 @@ if __name__ == "__main__":
                         type=bool,
                         default=False)
     parser.add_argument('-s', '--similarity',
-                        help='Similarity measure: J: Jaccard, E: Everygrams, W: Wordnet',
+                        help='Similarity measure: J: Jaccard, E: Everygrams, W: Wordnet, S: Sparse (batched) Jaccard, '
+                             'M: MinHash LSH (approximate) Jaccard, T: TF-IDF cosine of character n-grams, '
+                             'V: cosine of spaCy word vectors',
                         type=str,
                         default='J')
+    parser.add_argument('-bs', '--batch_size',
+                        help='Number of distinct texts linked at once by batched similarity measures',
+                        type=int,
+                        default=4096)
+    parser.add_argument('-np', '--n_process',
+                        help='Number of processes used to normalize ontology labels and annotated texts',
+                        type=int,
+                        default=1)
+    parser.add_argument('-ncs', '--normalization_cache_size',
+                        help='Number of normalized texts memoized in memory',
+                        type=int,
+                        default=100000)
+    parser.add_argument('-ncp', '--normalization_cache_path',
+                        help='Path to a SQLite file storing normalized texts across runs (disabled if empty)',
+                        type=str,
+                        default='')
+    parser.add_argument('-cd', '--cache_dir',
+                        help='Directory caching label mappings (by default $TAISTI_LINKER_CACHE_DIR or ~/.cache/taisti_linker)',
+                        type=str,
+                        default='')
+    parser.add_argument('-w', '--workers',
+                        help='Number of processes linking distinct texts in parallel',
+                        type=int,
+                        default=1)
+    parser.add_argument('-stream', '--streaming',
+                        help='Read, link and write documents chunk by chunk instead of loading all of them first, '
+                             'so that output is written right away and memory does not grow with the input',
+                        action='store_true')
+    parser.add_argument('-cs', '--chunk_size',
+                        help='Number of documents (or TAISTI CSV rows) read at once, and processed at once in the streaming mode',
+                        type=int,
+                        default=1000)
+    parser.add_argument('-lcs', '--link_cache_size',
+                        help='Number of link results cached in memory',
+                        type=int,
+                        default=100000)
+    parser.add_argument('-lcp', '--link_cache_path',
+                        help='Path to a SQLite file persisting link results across runs (disabled by default)',
+                        type=str,
+                        default='')
+    parser.add_argument('-mp', '--minhash_permutations',
+                        help='Number of MinHash values of a signature (MinHash similarity only)',
+                        type=int,
+                        default=128)
+    parser.add_argument('-mr', '--minhash_recall',
+                        help='Required probability of finding a label exceeding the similarity threshold (MinHash similarity only)',
+                        type=float,
+                        default=0.95)
+    parser.add_argument('-em', '--embedding_model',
+                        help='Locally installed spaCy pipeline with word vectors (embedding similarity only)',
+                        type=str,
+                        default='en_core_web_lg')
+    parser.add_argument('-q8', '--quantize_embeddings',
+                        help='Keep label vectors as 8-bit integers, using four times less memory (embedding similarity only)',
+                        action='store_true')
+    parser.add_argument('-lt', '--label_table_path',
+                        help='Label table extracted from the ontology with `python -m taisti_linker.ontology_parser` '
+                             '(by default extracted once and kept in the cache directory)',
+                        type=str,
+                        default='')
+    parser.add_argument('-ir', '--incremental_rebuild',
+                        help='When the ontology changes, normalize only added or changed labels and keep persisted '
+                             'link results unaffected by the change',
+                        action='store_true')
+    parser.add_argument('-cc', '--category_config',
+                        help='JSON file relating entity types (e.g., FOOD, UNIT) to roots of allowed taxonomies '
+                             'in one or more ontology files (by default FOOD and PROCESS roots in --ontology_path)',
+                        type=str,
+                        default='')
+    parser.add_argument('-ms', '--metrics_sink',
+                        help='Where counters and timers of the run are emitted: summary (printed), jsonl:<path> '
+                             '(appended as a JSON line) or prometheus:<path> (Prometheus text format); may be repeated',
+                        type=str,
+                        action='append',
+                        default=None)
+    parser.add_argument('-prof', '--profile',
+                        help='Run linking under cProfile and tracemalloc, printing the slowest functions '
+                             'and the largest allocations',
+                        action='store_true')
+    parser.add_argument('-po', '--profile_output',
+                        help='Path the cProfile profile is stored to with --profile (e.g., for snakeviz)',
+                        type=str,
+                        default='')
+    parser.add_argument('-q', '--quiet',
+                        help='Do not show progress bars (e.g., in batch jobs)',
+                        action='store_true')
 
     args = parser.parse_args()
     main(args.ontology_path, args.annotations_path, args.output_file_path,
          args.ner_output, args.taisti_csv, args.ignore_not_linkable,
-         SimilarityCalculator.similarity_id_to_type(args.similarity))
+         SimilarityCalculator.similarity_id_to_type(args.similarity), args.batch_size, args.n_process,
+         args.normalization_cache_size, args.normalization_cache_path, args.cache_dir, args.workers,
+         args.streaming, args.chunk_size, args.link_cache_size, args.link_cache_path,
+         args.minhash_permutations, args.minhash_recall, args.embedding_model, args.quantize_embeddings,
+         args.label_table_path, args.incremental_rebuild, args.category_config,
+         args.metrics_sink if args.metrics_sink is not None else ['summary'], args.profile, args.profile_output, args.quiet)
@@ -0,0 +1,140 @@
+from collections import defaultdict
+from taisti_linker.commons import LabelWithIRI
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+import numpy as np
+
+
+def get_size_bounds(size: int, label_sizes: np.ndarray) -> np.ndarray:
+    """
+        Calculate the highest Jaccard similarity a set can have with sets of given sizes: min(|a|, |b|) / max(|a|, |b|),
+        reached if the smaller set is a subset of the larger one. The division is the same as in the similarity itself,
+        so a score never exceeds its bound, even after rounding.
+
+        Args:
+            size (int): size of a set
+            label_sizes (np.ndarray): sizes of other sets
+        Returns:
+            np.ndarray: the highest similarity with each of the other sets (0 if any set is empty)
+    """
+    larger = np.maximum(label_sizes, size)
+    bounds = np.minimum(label_sizes, size) / np.maximum(larger, 1)
+    return np.where(larger > 0, bounds, 0.0)
+
+
+class LabelIndex:
+    """
+        Inverted index relating similarity features (tokens, everygrams) of ontology labels to the labels.
+        Candidates are grouped into buckets of labels of similar sizes, so that buckets which cannot beat
+        the best score found so far are skipped (see `find_best`).
+    """
+
+    def __init__(self, labels: Sequence[LabelWithIRI], preprocess: Callable[[str], Any],
+                 representations: Optional[List[Any]] = None):
+        """
+            Build the index over labels of a single category.
+
+            Args:
+                labels (Sequence[LabelWithIRI]): labels in the order they are scanned by the linker
+                preprocess (Callable[[str], Any]): function transforming a normalized label into a set of features
+                representations (Optional[List[Any]]): sets of features of the labels (e.g., built from tokens
+                                                       stored in a `LabelStore`), preprocessed from the labels if missing
+        """
+        self.labels = labels
+        self.representations = representations if representations is not None \
+            else [preprocess(item.normalized_label) for item in labels]
+        self.postings: Dict[Any, List[int]] = defaultdict(list)
+
+        for position, representation in enumerate(self.representations):
+            for feature in representation:
+                self.postings[feature].append(position)
+        self.sizes = np.asarray([len(representation) for representation in self.representations], dtype=np.int64)
+        self.queries = 0
+        self.scored = 0
+        self.skipped = 0
+
+    def candidates(self, representation: Any) -> Iterator[Tuple[LabelWithIRI, Any]]:
+        """
+            Yield labels sharing at least one feature with a given representation, in the original label order.
+            Labels sharing no features have a similarity of 0, so they are never better than the yielded ones.
+
+            Args:
+                representation (Any): set of features of a text to link
+            Returns:
+                Iterator[Tuple[LabelWithIRI, Any]]: candidate labels accompanied by their representations
+        """
+        positions = set()
+        for feature in representation:
+            positions.update(self.postings.get(feature, ()))
+
+        for position in sorted(positions):
+            yield self.labels[position], self.representations[position]
+
+    def find_best(self, representation: Any, similarity: Callable[[Any, Any], float],
+                  min_acceptable_similarity: float) -> int:
+        """
+            Find the label linked to a representation by the exhaustive scan of `EntityLinker.link`: the first label
+            with a similarity of 1.0, otherwise the last label with the highest similarity exceeding the threshold.
+            Labels are scored in buckets of equal upper bounds (see `get_size_bounds`), the most promising first,
+            and the scan stops at the first bucket which cannot exceed the threshold or beat the best score.
+            Results are identical to the exhaustive scan of set-based Jaccard similarities.
+
+            Args:
+                representation (Any): set of features of a text to link
+                similarity (Callable[[Any, Any], float]): Jaccard similarity of two sets of features
+                min_acceptable_similarity (float): similarity a label has to exceed to be linked,
+                                                   labels sharing no features are scored only if it is negative
+            Returns:
+                int: position of the linked label, or -1 if no label is linked
+        """
+        self.queries += 1
+        if min_acceptable_similarity < 0:
+            positions = np.arange(len(self.labels))
+        else:
+            candidates = set()
+            for feature in representation:
+                candidates.update(self.postings.get(feature, ()))
+            positions = np.fromiter(candidates, dtype=np.int64, count=len(candidates))
+
+        bounds = get_size_bounds(len(representation), self.sizes[positions])
+        # the most promising buckets first, labels of a bucket in the label order
+        order = np.lexsort((positions, -bounds))
+        positions, bounds = positions[order].tolist(), bounds[order]
+        bucket_starts = np.flatnonzero(np.diff(bounds, prepend=np.inf)).tolist()
+        bucket_ends = bucket_starts[1:] + [len(positions)]
+
+        best_position, max_similarity = -1, -1.0
+        for start, end in zip(bucket_starts, bucket_ends):
+            bound = float(bounds[start])
+            if bound <= min_acceptable_similarity or bound < max_similarity:
+                self.skipped += len(positions) - start
+                break
+            self.scored += end - start
+            for position in positions[start:end]:
+                current_similarity = similarity(representation, self.representations[position])
+                if current_similarity == 1.0:
+                    # only labels of the same size can be equal, the first of them ends the exhaustive scan
+                    return position
+                if (
+                    current_similarity > min_acceptable_similarity
+                    and (current_similarity > max_similarity
+                         or (current_similarity == max_similarity and position > best_position))
+                ):
+                    best_position, max_similarity = position, current_similarity
+        return best_position
+
+    def stats(self) -> Dict[str, Any]:
+        """
+            Returns:
+                Dict[str, Any]: number of queries and of labels scored and skipped by `find_best`
+        """
+        considered = self.scored + self.skipped
+        return {
+            "labels": len(self.labels),
+            "queries": self.queries,
+            "scored": self.scored,
+            "skipped": self.skipped,
+            "skip_rate": self.skipped / considered if considered > 0 else 0.0,
+        }
+
+    def __len__(self) -> int:
+        return len(self.labels)
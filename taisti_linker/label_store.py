@@ -0,0 +1,274 @@
+from collections.abc import Mapping, Sequence
+from taisti_linker.commons import EntityType, LabelWithIRI
+from typing import Dict, Iterator, List, Optional, Union
+import json
+import mmap
+import numpy as np
+import os
+import shutil
+import tempfile
+
+
+class LabelStore(Mapping):
+    """
+        Compact, read-only label mapping stored on disk: for each category it relates normalized labels
+        to labels and IRIs, just like `Dict[EntityType, Dict[str, LabelWithIRI]]`, which it can replace.
+
+        All strings (labels, normalized labels, IRIs, tokens) are interned in a single string table,
+        categories keep integer arrays of string ids only. Tokens of normalized labels are kept as ids
+        of a token vocabulary shared by all categories, so similarity features of labels are built
+        without splitting the labels again. Arrays are memory-mapped, so opening a store
+        is almost instant and its pages are shared between processes using the same store.
+    """
+
+    FORMAT_VERSION = 2
+
+    def __init__(self, path: str):
+        """
+            Open a store written with `LabelStore.write`.
+
+            Args:
+                path (str): path to a store directory
+        """
+        self.path = path
+        with open(os.path.join(path, "meta.json")) as f:
+            metadata = json.load(f)
+        if metadata["format"] != self.FORMAT_VERSION:
+            raise ValueError(f"Unsupported label store format: {metadata['format']}")
+
+        self.string_offsets = np.load(os.path.join(path, "string_offsets.npy"), mmap_mode="r")
+        # indexing memoryviews returns plain ints, much faster than numpy scalars in tight loops
+        self._string_offsets = memoryview(self.string_offsets)
+        with open(os.path.join(path, "strings.bin"), "rb") as f:
+            # empty files cannot be mapped
+            self.strings = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) \
+                if os.fstat(f.fileno()).st_size > 0 else b""
+        self.token_string_ids = np.load(os.path.join(path, "token_string_ids.npy"), mmap_mode="r")
+        self._tokens: Optional[List[str]] = None
+        self.categories: Dict[EntityType, CategoryLabels] = {
+            EntityType[name]: CategoryLabels(self, os.path.join(path, name)) for name in metadata["categories"]
+        }
+
+    def get_string(self, string_id: int) -> str:
+        """
+            Args:
+                string_id (int): id of an interned string
+            Returns:
+                str: the string
+        """
+        return self.get_bytes(string_id).decode("utf-8")
+
+    def get_bytes(self, string_id: int) -> bytes:
+        return self.strings[self._string_offsets[string_id]:self._string_offsets[string_id + 1]]
+
+    def get_tokens(self) -> List[str]:
+        """
+            Returns:
+                List[str]: the token vocabulary, decoded once, so that features of all labels share the token strings
+        """
+        if self._tokens is None:
+            self._tokens = [self.get_string(string_id) for string_id in memoryview(self.token_string_ids)]
+        return self._tokens
+
+    @staticmethod
+    def write(path: str, mapping: Dict[EntityType, Dict[str, LabelWithIRI]]) -> None:
+        """
+            Write a label mapping as a store. The store is written to a temporary directory first
+            and then renamed, so readers never see a partially written store.
+
+            Args:
+                path (str): path to a store directory (must not exist)
+                mapping (Dict[EntityType, Dict[str, LabelWithIRI]]): mapping to store
+        """
+        parent = os.path.dirname(os.path.abspath(path))
+        os.makedirs(parent, exist_ok=True)
+        tmp_path = tempfile.mkdtemp(dir=parent, prefix=".tmp-")
+        try:
+            string_ids: Dict[str, int] = {}
+            token_ids: Dict[str, int] = {}
+
+            def intern(string: str) -> int:
+                return string_ids.setdefault(string, len(string_ids))
+
+            for entity_type, category_mapping in mapping.items():
+                category_path = os.path.join(tmp_path, entity_type.name)
+                os.makedirs(category_path)
+                items = list(category_mapping.values())
+                token_offsets, label_token_ids = [0], []
+                for item in items:
+                    # all tokens in their order, as everygrams depend on it
+                    label_token_ids += [token_ids.setdefault(token, len(token_ids))
+                                        for token in item.normalized_label.split()]
+                    token_offsets.append(len(label_token_ids))
+                lookup_order = sorted(range(len(items)), key=lambda p: items[p].normalized_label.encode("utf-8"))
+
+                arrays = {
+                    "label_ids": [intern(item.label) for item in items],
+                    "normalized_ids": [intern(item.normalized_label) for item in items],
+                    "iri_ids": [intern(item.iri) for item in items],
+                    "token_ids": label_token_ids,
+                    "lookup_order": lookup_order,
+                }
+                for name, values in arrays.items():
+                    np.save(os.path.join(category_path, f"{name}.npy"), np.asarray(values, dtype=np.int32))
+                np.save(os.path.join(category_path, "token_offsets.npy"), np.asarray(token_offsets, dtype=np.int64))
+            np.save(os.path.join(tmp_path, "token_string_ids.npy"),
+                    np.asarray([intern(token) for token in token_ids], dtype=np.int32))
+
+            encoded = [string.encode("utf-8") for string in string_ids]
+            with open(os.path.join(tmp_path, "strings.bin"), "wb") as f:
+                f.write(b"".join(encoded))
+            string_offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+            string_offsets[1:] = np.cumsum([len(string) for string in encoded])
+            np.save(os.path.join(tmp_path, "string_offsets.npy"), string_offsets)
+
+            with open(os.path.join(tmp_path, "meta.json"), "w") as f:
+                json.dump({
+                    "format": LabelStore.FORMAT_VERSION,
+                    "categories": [entity_type.name for entity_type in mapping],
+                }, f)
+            os.chmod(tmp_path, 0o755)
+            os.rename(tmp_path, path)
+        except OSError:
+            shutil.rmtree(tmp_path, ignore_errors=True)
+            if not os.path.exists(os.path.join(path, "meta.json")):
+                raise
+            # another process has written the same store in the meantime
+        except BaseException:
+            shutil.rmtree(tmp_path, ignore_errors=True)
+            raise
+
+    def __getitem__(self, entity_type: EntityType) -> "CategoryLabels":
+        return self.categories[entity_type]
+
+    def __iter__(self) -> Iterator[EntityType]:
+        return iter(self.categories)
+
+    def __len__(self) -> int:
+        return len(self.categories)
+
+    def __reduce__(self):
+        # reopen the store (sharing the mapped pages) instead of copying it when sent to other processes
+        return LabelStore, (self.path,)
+
+
+class CategoryLabels(Mapping):
+    """ Labels of a single category of a `LabelStore`, behaving as a map of normalized labels to `LabelWithIRI` """
+
+    def __init__(self, store: LabelStore, path: str):
+        self.store = store
+        self.label_ids = np.load(os.path.join(path, "label_ids.npy"), mmap_mode="r")
+        self.normalized_ids = np.load(os.path.join(path, "normalized_ids.npy"), mmap_mode="r")
+        self.iri_ids = np.load(os.path.join(path, "iri_ids.npy"), mmap_mode="r")
+        self.lookup_order = np.load(os.path.join(path, "lookup_order.npy"), mmap_mode="r")
+        self.token_ids = np.load(os.path.join(path, "token_ids.npy"), mmap_mode="r")
+        self.token_offsets = np.load(os.path.join(path, "token_offsets.npy"), mmap_mode="r")
+        self._label_ids = memoryview(self.label_ids)
+        self._normalized_ids = memoryview(self.normalized_ids)
+        self._iri_ids = memoryview(self.iri_ids)
+        self._lookup_order = memoryview(self.lookup_order)
+        self._token_ids = memoryview(self.token_ids)
+        self._token_offsets = memoryview(self.token_offsets)
+        # labels are materialized on first access only, then reused (e.g., with their similarity representations)
+        self._items: List[Optional[LabelWithIRI]] = [None] * len(self.label_ids)
+
+    def find(self, normalized_label: str) -> int:
+        """
+            Find the position of a normalized label with a binary search over the sorted label order.
+
+            Args:
+                normalized_label (str): normalized label to find
+            Returns:
+                int: position of the label, or -1 if missing
+        """
+        key = normalized_label.encode("utf-8")
+        low, high = 0, len(self._lookup_order)
+        while low < high:
+            middle = (low + high) // 2
+            if self.store.get_bytes(self._normalized_ids[self._lookup_order[middle]]) < key:
+                low = middle + 1
+            else:
+                high = middle
+        if low < len(self._lookup_order):
+            position = self._lookup_order[low]
+            if self.store.get_bytes(self._normalized_ids[position]) == key:
+                return position
+        return -1
+
+    def get_item(self, position: int) -> LabelWithIRI:
+        """
+            Args:
+                position (int): position of a label
+            Returns:
+                LabelWithIRI: the label with its IRI
+        """
+        item = self._items[position]
+        if item is None:
+            item = LabelWithIRI(
+                self.store.get_string(self._label_ids[position]),
+                self.store.get_string(self._iri_ids[position]),
+                self.store.get_string(self._normalized_ids[position]),
+                None)
+            self._items[position] = item
+        return item
+
+    def get_tokens(self, position: int) -> List[str]:
+        """
+            Args:
+                position (int): position of a label
+            Returns:
+                List[str]: tokens of the normalized label, the same as splitting it
+        """
+        tokens = self.store.get_tokens()
+        return [tokens[token_id]
+                for token_id in self._token_ids[self._token_offsets[position]:self._token_offsets[position + 1]]]
+
+    def as_sequence(self) -> "LabelSequence":
+        """
+            Returns:
+                LabelSequence: labels by their positions, materialized only when accessed
+        """
+        return LabelSequence(self)
+
+    def values(self) -> Iterator[LabelWithIRI]:
+        return (self.get_item(position) for position in range(len(self)))
+
+    def items(self) -> Iterator:
+        return ((item.normalized_label, item) for item in self.values())
+
+    def __getitem__(self, normalized_label: str) -> LabelWithIRI:
+        position = self.find(normalized_label)
+        if position < 0:
+            raise KeyError(normalized_label)
+        return self.get_item(position)
+
+    def __contains__(self, normalized_label: object) -> bool:
+        return isinstance(normalized_label, str) and self.find(normalized_label) >= 0
+
+    def __iter__(self) -> Iterator[str]:
+        return (self.store.get_string(string_id) for string_id in self._normalized_ids)
+
+    def __len__(self) -> int:
+        return len(self.label_ids)
+
+
+class LabelSequence(Sequence):
+    """
+        Labels of a `CategoryLabels` by their positions, which indexes and matchers keep instead of a list of labels,
+        so that only labels they return are materialized.
+    """
+
+    def __init__(self, category_labels: CategoryLabels):
+        self.category_labels = category_labels
+
+    def __getitem__(self, position: Union[int, slice]) -> Union[LabelWithIRI, List[LabelWithIRI]]:
+        if isinstance(position, slice):
+            return [self.category_labels.get_item(p) for p in range(len(self))[position]]
+        if position < 0:
+            position += len(self)
+        if not 0 <= position < len(self):
+            raise IndexError(position)
+        return self.category_labels.get_item(position)
+
+    def __len__(self) -> int:
+        return len(self.category_labels)
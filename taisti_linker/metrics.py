@@ -0,0 +1,189 @@
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+import abc
+import cProfile
+import io
+import json
+import pstats
+import re
+import time
+import tracemalloc
+
+
+class MetricsSink(abc.ABC):
+    """ Destination of metrics snapshots (see `Metrics.emit`) """
+
+    @abc.abstractmethod
+    def emit(self, snapshot: Dict[str, Any]) -> None:
+        """
+            Args:
+                snapshot (Dict[str, Any]): counters and timers (see `Metrics.snapshot`)
+        """
+
+
+class SummarySink(MetricsSink):
+    """ Print a human-readable summary of counters and timers """
+
+    def emit(self, snapshot: Dict[str, Any]) -> None:
+        for name, value in snapshot["counters"].items():
+            print(f"INFO: {name}: {value}")
+        for name, timer in snapshot["timers"].items():
+            print(f"INFO: {name}: {timer['seconds']:.3f}s ({timer['count']} calls)")
+        for name, value in snapshot["derived"].items():
+            print(f"INFO: {name}: {value:.2f}")
+
+
+class JsonLinesSink(MetricsSink):
+    """ Append each snapshot to a file as a single JSON line, so that runs can be compared over time """
+
+    def __init__(self, path: str):
+        """
+            Args:
+                path (str): path to a JSON lines file
+        """
+        self.path = path
+
+    def emit(self, snapshot: Dict[str, Any]) -> None:
+        with open(self.path, "a") as f:
+            f.write(json.dumps({"timestamp": time.time(), **snapshot}) + "\n")
+
+
+class PrometheusSink(MetricsSink):
+    """
+        Write the last snapshot in the Prometheus text exposition format, e.g., for the textfile collector
+        of the node exporter.
+    """
+
+    def __init__(self, path: str, prefix: str = "taisti_linker"):
+        """
+            Args:
+                path (str): path to a text file, replaced by each snapshot
+                prefix (str): prefix of metric names
+        """
+        self.path = path
+        self.prefix = prefix
+
+    def emit(self, snapshot: Dict[str, Any]) -> None:
+        lines = []
+        for name, value in snapshot["counters"].items():
+            metric = f"{self.prefix}_{self._sanitize(name)}_total"
+            lines += [f"# TYPE {metric} counter", f"{metric} {value}"]
+        for name, timer in snapshot["timers"].items():
+            metric = f"{self.prefix}_{self._sanitize(name)}_seconds"
+            lines += [f"# TYPE {metric} summary", f"{metric}_sum {timer['seconds']}", f"{metric}_count {timer['count']}"]
+        for name, value in snapshot["derived"].items():
+            metric = f"{self.prefix}_{self._sanitize(name)}"
+            lines += [f"# TYPE {metric} gauge", f"{metric} {value}"]
+        with open(self.path, "w") as f:
+            f.write("\n".join(lines) + "\n")
+
+    @staticmethod
+    def _sanitize(name: str) -> str:
+        return re.sub(r"[^a-zA-Z0-9_]", "_", name)
+
+
+def get_metrics_sink(spec: str) -> MetricsSink:
+    """
+        Args:
+            spec (str): `summary`, `jsonl:<path>` or `prometheus:<path>`
+        Returns:
+            MetricsSink: the sink
+    """
+    kind, _, path = spec.partition(":")
+    if kind == "summary":
+        return SummarySink()
+    elif kind == "jsonl" and len(path) > 0:
+        return JsonLinesSink(path)
+    elif kind == "prometheus" and len(path) > 0:
+        return PrometheusSink(path)
+    raise ValueError(f"Unknown metrics sink {spec}, expected summary, jsonl:<path> or prometheus:<path>")
+
+
+class Metrics:
+    """
+        Counters and timers of the linker (e.g., direct matches, labels scored or time spent normalizing texts),
+        emitted to any number of sinks. Updates are cheap, so the linker keeps them on all the time.
+    """
+
+    def __init__(self, sinks: Optional[List[MetricsSink]] = None):
+        """
+            Args:
+                sinks (Optional[List[MetricsSink]]): sinks snapshots are emitted to
+        """
+        self.sinks = sinks if sinks is not None else []
+        self.counters: Dict[str, int] = {}
+        self.timers: Dict[str, List[float]] = {}
+
+    def increment(self, name: str, value: int = 1) -> None:
+        self.counters[name] = self.counters.get(name, 0) + value
+
+    def add_time(self, name: str, seconds: float) -> None:
+        timer = self.timers.setdefault(name, [0.0, 0])
+        timer[0] += seconds
+        timer[1] += 1
+
+    @contextmanager
+    def timer(self, name: str) -> Iterator[None]:
+        """
+            Measure the wall-clock time of a block of code, e.g., `with metrics.timer("normalization"): ...`
+
+            Args:
+                name (str): name of the timer
+        """
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add_time(name, time.perf_counter() - start)
+
+    def snapshot(self) -> Dict[str, Any]:
+        """
+            Returns:
+                Dict[str, Any]: counters, timers (total seconds and number of calls) and labels scored per mention
+        """
+        counters = dict(self.counters)
+        timers = {name: {"seconds": seconds, "count": count} for name, (seconds, count) in dict(self.timers).items()}
+        derived = {}
+        if counters.get("scored_mentions", 0) > 0 and "labels_scored" in counters:
+            derived["labels_scored_per_mention"] = counters["labels_scored"] / counters["scored_mentions"]
+        return {"counters": counters, "timers": timers, "derived": derived}
+
+    def emit(self) -> None:
+        """ Emit a snapshot to all sinks """
+        snapshot = self.snapshot()
+        for sink in self.sinks:
+            sink.emit(snapshot)
+
+
+def profile_run(function: Callable[[], Any], output_path: str = '', top: int = 20) -> Any:
+    """
+        Run a function under cProfile and tracemalloc, and print the functions taking the most time,
+        the lines allocating the most memory and the peak of traced memory.
+
+        Args:
+            function (Callable[[], Any]): function to run
+            output_path (str): path the profile is stored to (loadable with `pstats` or snakeviz), skipped if empty
+            top (int): number of functions and allocation sites printed
+        Returns:
+            Any: the value returned by the function
+    """
+    profiler = cProfile.Profile()
+    tracemalloc.start()
+    try:
+        result = profiler.runcall(function)
+    finally:
+        snapshot = tracemalloc.take_snapshot()
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+    stream = io.StringIO()
+    pstats.Stats(profiler, stream=stream).sort_stats("cumulative").print_stats(top)
+    print(stream.getvalue())
+    print(f"INFO: Peak traced memory: {peak / 2 ** 20:.1f}MB, top allocations:")
+    for statistic in snapshot.statistics("lineno")[:top]:
+        print(f"INFO: {statistic}")
+    if len(output_path) > 0:
+        profiler.dump_stats(output_path)
+        print(f"INFO: Profile stored to {output_path}")
+    return result
@@ -0,0 +1,163 @@
+from taisti_linker.commons import LabelWithIRI
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+import numpy as np
+import zlib
+
+
+# permutations are simulated with universal hashing modulo a Mersenne prime small enough to multiply in 64 bits
+MERSENNE_PRIME = (1 << 31) - 1
+
+
+def get_candidate_probability(similarity: float, bands: int, rows: int) -> float:
+    """
+        Args:
+            similarity (float): Jaccard similarity of a text and a label
+            bands (int): number of LSH bands
+            rows (int): number of MinHash values per band
+        Returns:
+            float: probability that the label is a candidate for the text
+    """
+    return 1.0 - (1.0 - similarity ** rows) ** bands
+
+
+def get_lsh_rows(num_permutations: int, min_similarity: float, recall: float) -> int:
+    """
+        Choose the number of rows per band: the more rows, the fewer (and more similar) candidates.
+
+        Args:
+            num_permutations (int): number of MinHash values of a signature
+            min_similarity (float): lowest similarity that has to be found
+            recall (float): required probability of finding labels of at least `min_similarity`
+        Returns:
+            int: the largest number of rows keeping the required recall (1 if no number keeps it)
+    """
+    best_rows = 1
+    for rows in range(1, num_permutations + 1):
+        if get_candidate_probability(min_similarity, num_permutations // rows, rows) >= recall:
+            best_rows = rows
+    return best_rows
+
+
+class MinHashIndex:
+    """
+        Locality-sensitive hashing index over MinHash signatures of label features (e.g., tokens).
+        A label becomes a candidate for a text if both signatures agree on all values of any band,
+        which happens with a probability growing with their Jaccard similarity, so only a small part of labels is scored.
+    """
+
+    def __init__(self, labels: Sequence[LabelWithIRI], preprocess: Callable[[str], Any], min_acceptable_similarity: float,
+                 num_permutations: int = 128, recall: float = 0.95, seed: int = 0,
+                 representations: Optional[List[Any]] = None):
+        """
+            Build the index over labels of a single category.
+
+            Args:
+                labels (Sequence[LabelWithIRI]): labels in the order they are scanned by the linker
+                preprocess (Callable[[str], Any]): function transforming a normalized label into a set of features
+                min_acceptable_similarity (float): similarity a label has to exceed to be linked
+                num_permutations (int): number of MinHash values of a signature
+                recall (float): required probability of finding a label exceeding `min_acceptable_similarity`
+                seed (int): seed of the hash functions
+                representations (Optional[List[Any]]): sets of features of the labels (e.g., built from tokens
+                                                       stored in a `LabelStore`), preprocessed from the labels if missing
+        """
+        self.labels = labels
+        self.representations = representations if representations is not None \
+            else [preprocess(item.normalized_label) for item in labels]
+        self.num_permutations = num_permutations
+        self.rows = get_lsh_rows(num_permutations, max(min_acceptable_similarity, 0.0), recall)
+        self.bands = num_permutations // self.rows
+        self.expected_recall = get_candidate_probability(max(min_acceptable_similarity, 0.0), self.bands, self.rows)
+        self.queries = 0
+        self.candidates_count = 0
+
+        random = np.random.RandomState(seed)
+        self.a = random.randint(1, MERSENNE_PRIME, size=num_permutations).astype(np.uint64)
+        self.b = random.randint(0, MERSENNE_PRIME, size=num_permutations).astype(np.uint64)
+        self.band_multipliers = random.randint(1, MERSENNE_PRIME, size=self.rows).astype(np.uint64)
+
+        # labels without features have a similarity of 0 to everything, so they are never candidates
+        positions = np.asarray([p for p, r in enumerate(self.representations) if len(r) > 0], dtype=np.int64)
+        signatures = self._get_signatures([self.representations[p] for p in positions])
+        # keys of all bands are kept in a single sorted array, so that a query looks up all its bands at once
+        keys = self._get_band_keys(signatures)
+        order = np.argsort(keys.ravel(), kind="stable")
+        self.keys = keys.ravel()[order]
+        self.positions = np.tile(positions, self.bands)[order]
+
+    def candidates(self, representation: Any) -> Iterator[Tuple[LabelWithIRI, Any]]:
+        """
+            Yield labels sharing a band of their signature with a given representation, in the original label order.
+
+            Args:
+                representation (Any): set of features of a text to link
+            Returns:
+                Iterator[Tuple[LabelWithIRI, Any]]: candidate labels accompanied by their representations
+        """
+        self.queries += 1
+        if len(representation) == 0:
+            return
+        keys = self._get_band_keys(self._get_signatures([representation])).ravel()
+        starts = np.searchsorted(self.keys, keys, side="left")
+        ends = np.searchsorted(self.keys, keys, side="right")
+        positions = set()
+        for start, end in zip(starts.tolist(), ends.tolist()):
+            if start < end:
+                positions.update(self.positions[start:end].tolist())
+
+        self.candidates_count += len(positions)
+        for position in sorted(positions):
+            yield self.labels[position], self.representations[position]
+
+    def stats(self) -> Dict[str, Any]:
+        """
+            Returns:
+                Dict[str, Any]: LSH parameters, expected recall and the mean number of candidates per query
+        """
+        return {
+            "labels": len(self.labels),
+            "bands": self.bands,
+            "rows": self.rows,
+            "expected_recall": self.expected_recall,
+            "queries": self.queries,
+            "mean_candidates": self.candidates_count / self.queries if self.queries > 0 else 0.0,
+        }
+
+    def _get_signatures(self, representations: List[Any], chunk_size: int = 1 << 16) -> np.ndarray:
+        """
+            Args:
+                representations (List[Any]): non-empty sets of features
+                chunk_size (int): approximate number of features hashed at once, bounding the memory used
+            Returns:
+                np.ndarray: MinHash signature of each representation (one per row)
+        """
+        signatures = np.empty((len(representations), self.num_permutations), dtype=np.uint64)
+        start = 0
+        while start < len(representations):
+            end, features = start, []
+            offsets = []
+            while end < len(representations) and (end == start or len(features) < chunk_size):
+                offsets.append(len(features))
+                features += [zlib.crc32(str(feature).encode("utf-8")) for feature in representations[end]]
+                end += 1
+            hashes = np.asarray(features, dtype=np.uint64) % np.uint64(MERSENNE_PRIME)
+            permuted = (self.a[:, None] * hashes[None, :] + self.b[:, None]) % np.uint64(MERSENNE_PRIME)
+            signatures[start:end] = np.minimum.reduceat(permuted, offsets, axis=1).T
+            start = end
+        return signatures
+
+    def _get_band_keys(self, signatures: np.ndarray) -> np.ndarray:
+        """
+            Args:
+                signatures (np.ndarray): MinHash signatures (one per row)
+            Returns:
+                np.ndarray: keys of bands (one row per band), each combining values of the band and its number
+                            into a single (wrapping) 64-bit integer
+        """
+        values = signatures[:, :self.bands * self.rows].reshape(len(signatures), self.bands, self.rows)
+        keys = (values * self.band_multipliers).sum(axis=2, dtype=np.uint64)
+        keys += np.arange(self.bands, dtype=np.uint64) * np.uint64(0x9E3779B97F4A7C15)
+        return keys.T
+
+    def __len__(self) -> int:
+        return len(self.labels)
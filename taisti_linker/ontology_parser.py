@@ -1,17 +1,142 @@
-from turtle import st
 import owlready2
+from taisti_linker.cache import atomic_write
 from taisti_linker.commons import EntityType, LabelWithIRI
 from taisti_linker.text_processor import TextProcessor
-from typing import Any, Dict, List
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple
+
+import argparse
+import csv
+import gzip
+import io
+import json
+import os
+import time
+
+
+# Each NER/BRAT annotation should be linked to a specific place in an ontology,
+# the map relates NER/BRAT entity types to IRIs of roots of allowed taxonomies.
+ROOT_CATEGORY_IRIS: Dict[EntityType, List[str]] = {
+    EntityType.FOOD: ["http://purl.obolibrary.org/obo/FOODON_00001002"],
+    EntityType.PROCESS: ["http://purl.obolibrary.org/obo/BFO_0000001"],
+}
+
+# properties holding synonyms of ontology entities, related to synonym types stored in label tables
+SYNONYM_PROPERTIES: Dict[str, str] = {
+    "http://www.geneontology.org/formats/oboInOwl#hasSynonym": "synonym",
+    "http://www.geneontology.org/formats/oboInOwl#hasExactSynonym": "exact_synonym",
+    #"http://www.geneontology.org/formats/oboInOwl#hasBroadSynonym": "broad_synonym",
+    "http://www.geneontology.org/formats/oboInOwl#hasNarrowSynonym": "narrow_synonym",
+    "http://purl.obolibrary.org/obo/IAO_0000118": "alternative_term",
+}
+
+LABEL_TABLE_COLUMNS = ["iri", "label", "synonym_type", "category"]
+# first row of a label table, followed by roots of categories the table was extracted for (as JSON)
+LABEL_TABLE_ROOTS = "#root_iris"
+
+
+class LabelRow(NamedTuple):
+    """ A label (or synonym) of an ontology entity belonging to a category, as stored in a label table """
+    iri: str
+    label: str
+    synonym_type: str
+    category: EntityType
+
+
+def write_label_table(path: str, rows: List[LabelRow], root_iris: Dict[EntityType, List[str]]) -> None:
+    """
+        Store label rows as a gzipped CSV file, so that labels can be read without parsing the ontology.
+
+        Args:
+            path (str): path to the table
+            rows (List[LabelRow]): rows to store
+            root_iris (Dict[EntityType, List[str]]): IRIs of roots of categories the rows were extracted for
+    """
+    text = io.StringIO()
+    writer = csv.writer(text)
+    writer.writerow([LABEL_TABLE_ROOTS, json.dumps({entity_type.name: iris for entity_type, iris in root_iris.items()})])
+    writer.writerow(LABEL_TABLE_COLUMNS)
+    writer.writerows((row.iri, row.label, row.synonym_type, row.category.name) for row in rows)
+    atomic_write(path, gzip.compress(text.getvalue().encode("utf-8"), compresslevel=6))
+
+
+def read_label_table(path: str) -> List[LabelRow]:
+    """
+        Args:
+            path (str): path to a table written with `write_label_table`
+        Returns:
+            List[LabelRow]: stored rows, in the order they were written
+    """
+    with gzip.open(path, "rt", encoding="utf-8", newline="") as f:
+        reader = csv.reader(f)
+        header = next(reader, None)
+        if header is not None and header[0] == LABEL_TABLE_ROOTS:
+            header = next(reader, None)
+        if header != LABEL_TABLE_COLUMNS:
+            raise ValueError(f"{path} is not a label table")
+        return [LabelRow(iri, label, synonym_type, EntityType[category])
+                for iri, label, synonym_type, category in reader]
+
+
+def read_label_table_roots(path: str) -> Dict[EntityType, List[str]]:
+    """
+        Args:
+            path (str): path to a table written with `write_label_table`
+        Returns:
+            Dict[EntityType, List[str]]: IRIs of roots of categories the table was extracted for
+                                         (empty for tables written without them)
+    """
+    with gzip.open(path, "rt", encoding="utf-8", newline="") as f:
+        first_row = next(csv.reader(f), None)
+    if first_row is None or first_row[0] != LABEL_TABLE_ROOTS:
+        return {}
+    return {EntityType[name]: iris for name, iris in json.loads(first_row[1]).items()}
 
 
 class OntologyParser:
-    """ A class for loading ontologies and managing label -> IRI maps """
+    """
+        A class for loading ontologies and managing label -> IRI maps.
+        Labels may be read from a label table extracted from the ontology once (see `get_label_rows`),
+        so that the ontology itself is not parsed at all.
+    """
 
-    def __init__(self, ontology_path: str):
-        self.ontology = owlready2.get_ontology(ontology_path).load()
-        self.type_to_root_entity = self._get_root_nodes_for_categories()
+    def __init__(self, ontology_path: str, label_table_path: str = '',
+                 root_iris: Optional[Dict[EntityType, List[str]]] = None, world: Optional[Any] = None):
+        """
+            Args:
+                ontology_path (str): path to an ontology
+                label_table_path (str): path to a label table of the ontology, extracted and stored if missing
+                                        (not used if empty)
+                root_iris (Optional[Dict[EntityType, List[str]]]): IRIs of roots of allowed taxonomies of categories
+                                                                   (`ROOT_CATEGORY_IRIS` by default)
+                world (Optional[Any]): owlready2 world holding this ontology only, e.g., shared by parsers of the same
+                                       file so that it is loaded once (a new world by default)
+        """
+        self.ontology_path = ontology_path
+        self.label_table_path = label_table_path
+        self.root_iris = root_iris if root_iris is not None else ROOT_CATEGORY_IRIS
+        # the ontology is not loaded into the default world, so that entities of other ontologies loaded
+        # in the same process (e.g., subclasses of shared roots) never leak into its labels
+        self.world = world if world is not None else owlready2.World()
         self.enabled_warnings = False
+        self.timings: Dict[str, float] = {}
+        self._ontology = None
+        self._type_to_root_entity = None
+        self._label_rows = None
+
+    @property
+    def ontology(self) -> Any:
+        """ The ontology is loaded on first use only, as it is not needed if label mappings are cached """
+        if self._ontology is None:
+            start = time.perf_counter()
+            self._ontology = self.world.get_ontology(self.ontology_path).load()
+            self.timings["load_ontology"] = time.perf_counter() - start
+        return self._ontology
+
+    @property
+    def type_to_root_entity(self) -> Dict[EntityType, List[Any]]:
+        if self._type_to_root_entity is None:
+            self._type_to_root_entity = self._get_root_nodes_for_categories()
+        return self._type_to_root_entity
 
     def get_possible_labels(self, obj: Any) -> List[str]:
         """
@@ -22,22 +147,95 @@ class OntologyParser:
             Returns:
                 List[str]: list of labels
         """
-        prop_names = [
-            "http://www.geneontology.org/formats/oboInOwl#hasSynonym",
-            "http://www.geneontology.org/formats/oboInOwl#hasExactSynonym",
-            #"http://www.geneontology.org/formats/oboInOwl#hasBroadSynonym",
-            "http://www.geneontology.org/formats/oboInOwl#hasNarrowSynonym",
-            "http://purl.obolibrary.org/obo/IAO_0000118",  # alternative term
-        ]
-        synonyms = [self._get_label(obj)]
-        for prop_name in prop_names:
-            prop = owlready2.IRIS[prop_name]
-            if prop in obj.get_properties(obj):
-                synonyms += [str(s) for s in prop[obj]]
-        return list(set(synonyms))
+        return [label for label, _ in self.get_typed_labels(obj)]
+
+    def get_typed_labels(self, obj: Any) -> List[Tuple[str, str]]:
+        """
+            For a given ontology entity (owlready2 object) collect all possible labels (including synonyms)
+            accompanied by their synonym types (see `SYNONYM_PROPERTIES`, "label" for the best label).
+
+            Args:
+                obj (Any): object for which the synonyms should be collected
+            Returns:
+                List[Tuple[str, str]]: list of distinct labels with the type they were found first with
+        """
+        synonyms = {self._get_label(obj): "label"}
+        properties = obj.get_properties(obj)
+        for prop_name, synonym_type in SYNONYM_PROPERTIES.items():
+            prop = self.world[prop_name]
+            if prop in properties:
+                for synonym in prop[obj]:
+                    synonyms.setdefault(str(synonym), synonym_type)
+        return list(synonyms.items())
+
+    def get_labels(self, category: EntityType) -> List[Tuple[str, str]]:
+        """
+            For a given category, collect labels (including synonyms) of all ontology entities matching this category.
+
+            Args:
+                category (EntityType): A category for which the labels should be collected.
+            Returns:
+                List[Tuple[str, str]]: list of (label, IRI) pairs
+        """
+        if self.label_table_path:
+            return [(row.label, row.iri) for row in self.get_label_rows() if row.category == category]
+        return [(row.label, row.iri) for row in self._extract_label_rows(category)]
+
+    def get_label_rows(self) -> List[LabelRow]:
+        """
+            Collect labels of all categories. If a label table path is set, labels are read from the table,
+            or extracted from the ontology and stored in the table if it does not exist yet.
+
+            Returns:
+                List[LabelRow]: labels of entities of all categories
+        """
+        if self._label_rows is not None:
+            return self._label_rows
+
+        if self.label_table_path and os.path.exists(self.label_table_path):
+            start = time.perf_counter()
+            try:
+                self._label_rows = read_label_table(self.label_table_path)
+                self.timings["read_label_table"] = time.perf_counter() - start
+                return self._label_rows
+            except Exception as e:
+                print(f"WARNING: Ignoring unreadable label table {self.label_table_path}: {e}")
+
+        rows = []
+        for category in self.root_iris:
+            rows += self._extract_label_rows(category)
+        if self.label_table_path:
+            start = time.perf_counter()
+            write_label_table(self.label_table_path, rows, self.root_iris)
+            self.timings["write_label_table"] = time.perf_counter() - start
+        self._label_rows = rows
+        return rows
+
+    def _extract_label_rows(self, category: EntityType) -> List[LabelRow]:
+        """
+            Walk descendants of roots of a category in the ontology and collect their labels.
+
+            Args:
+                category (EntityType): A category for which the labels should be collected.
+            Returns:
+                List[LabelRow]: labels of entities of the category
+        """
+        # resolve roots (loading the ontology) outside of the timed walk
+        roots = self.type_to_root_entity[category]
+        start = time.perf_counter()
+        rows = []
+        for root in roots:
+            # descendants are a set ordered by object hashes, which differ between runs; the label order decides
+            # which of the labels sharing a normalized form is kept, so it has to be the same in every run
+            for c in sorted(root.descendants(), key=lambda descendant: descendant.iri):
+                rows += [LabelRow(c.iri, label, synonym_type, category)
+                         for label, synonym_type in self.get_typed_labels(c)]
+        self.timings[f"extract_{category.name}_labels"] = time.perf_counter() - start
+        return rows
 
     def get_IRI_labels_data(
-        self, normalizer: TextProcessor, category: EntityType
+        self, normalizer: TextProcessor, category: EntityType, n_process: int = 1,
+        known_normalizations: Optional[Dict[str, str]] = None
     ) -> Dict[str, LabelWithIRI]:
         """
             For a given category, generate a map considering all ontology entities matching this category.
@@ -46,23 +244,35 @@ class OntologyParser:
             Args:
                 normalizer (TextProcessor): A normalizer that can transform labels into normalized forms.
                 category (EntityType): A category for which the map should be constructed.
+                n_process (int): number of processes used to normalize labels
+                known_normalizations (Optional[Dict[str, str]]): normalized forms of labels known already
+                                                                 (e.g., from a previous mapping), not normalized again
             Returns:
                 Dict[str, LabelWithIRI]: A map of normalized labels to their IRIs
         """
         result: Dict[str, LabelWithIRI] = dict()
+        known_normalizations = known_normalizations if known_normalizations is not None else {}
 
-        for root in self.type_to_root_entity[category]:
-            for c in root.descendants():
-                for label in self.get_possible_labels(c):
-                    normalized_label = normalizer.normalize_text(label)
-                    if self.enabled_warnings and normalized_label in result:
-                        print(f"WARNING: {normalized_label} already in mapping")
-                    result[normalized_label] = \
-                        LabelWithIRI(label, c.iri, normalized_label, None)
+        labels = self.get_labels(category)
+        start = time.perf_counter()
+        unknown_labels = list(dict.fromkeys(label for label, _ in labels if label not in known_normalizations))
+        normalizations = dict(zip(unknown_labels, normalizer.normalize_many(unknown_labels, n_process=n_process)))
+        self.timings[f"normalize_{category.name}_labels"] = time.perf_counter() - start
+        if len(known_normalizations) > 0:
+            print(f"INFO: Normalized {len(unknown_labels)} new {category.name} labels, "
+                  f"reused {len(labels) - len(unknown_labels)} normalized labels")
+
+        for label, iri in labels:
+            normalized_label = known_normalizations.get(label, normalizations.get(label))
+            if self.enabled_warnings and normalized_label in result:
+                print(f"WARNING: {normalized_label} already in mapping")
+            result[normalized_label] = \
+                LabelWithIRI(label, iri, normalized_label, None)
         return result
 
     def get_IRI_labels_data_per_category(
-        self, normalizer: TextProcessor
+        self, normalizer: TextProcessor, n_process: int = 1,
+        known_normalizations: Optional[Dict[str, str]] = None
     ) -> Dict[EntityType, Dict[str, LabelWithIRI]]:
         """
             Calculate a map that for each NER/BRAT category (e.g., FOOD, COLOR, PROCESS)
@@ -70,17 +280,25 @@ class OntologyParser:
 
             Args:
                 normalizer (TextProcessor): A normalizer that can transform labels into normalized forms.
+                n_process (int): number of processes used to normalize labels
+                known_normalizations (Optional[Dict[str, str]]): normalized forms of labels known already
             Returns:
                 Dict[EntityType, Dict[str, LabelWithIRI]]: For each category, a map of normalized labels to their IRIs
         """
         result = dict()
 
         for entity_type in EntityType:
-            if entity_type in self.type_to_root_entity:
+            # roots are known without loading the ontology, which is not needed if a label table is used
+            if entity_type in self.root_iris:
                 result[entity_type] = self.get_IRI_labels_data(
-                    normalizer, entity_type)
+                    normalizer, entity_type, n_process, known_normalizations)
         return result
 
+    def print_timings(self) -> None:
+        """ Print durations of stages of label extraction (loading the ontology, walking categories, etc.) """
+        for stage, duration in self.timings.items():
+            print(f"INFO: {stage}: {duration:.2f}s")
+
     def _get_label(self, obj: Any) -> str:
         """
             Return best label for given element.
@@ -110,11 +328,39 @@ class OntologyParser:
                 Dict[EntityType, IRI]: Map relating NER/BRAT entity types to IRIs of entities the subclasses 
                                        of which entities are allowed to be linked to.
         """
-        return {
-            EntityType.FOOD: [owlready2.IRIS[
-                "http://purl.obolibrary.org/obo/FOODON_00001002"
-            ]],
-            EntityType.PROCESS: [owlready2.IRIS[
-                "http://purl.obolibrary.org/obo/BFO_0000001"
-            ]]
+        # make sure the ontology is loaded before IRIs are resolved
+        self.ontology
+        start = time.perf_counter()
+        roots = {
+            entity_type: [self.world[iri] for iri in iris]
+            for entity_type, iris in self.root_iris.items()
         }
+        for entity_type, iris in self.root_iris.items():
+            missing = [iri for iri, root in zip(iris, roots[entity_type]) if root is None]
+            if missing:
+                raise ValueError(f"Roots of {entity_type.name} not found in {self.ontology_path}: {', '.join(missing)}")
+        self.timings["resolve_roots"] = time.perf_counter() - start
+        return roots
+
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser(description='Extract labels of an ontology into a label table once, '
+                                                 'so that later runs do not parse the ontology')
+    parser.add_argument('-op', '--ontology_path',
+                        help='Path to ontology which labels should be extracted',
+                        type=str,
+                        default='../foodon.owl')
+    parser.add_argument('-lt', '--label_table_path',
+                        help='Path to the label table to write (a gzipped CSV file)',
+                        type=str,
+                        default='labels.csv.gz')
+    args = parser.parse_args()
+
+    if os.path.exists(args.label_table_path):
+        os.remove(args.label_table_path)
+    ontology_parser = OntologyParser(args.ontology_path, args.label_table_path)
+    rows = ontology_parser.get_label_rows()
+    ontology_parser.print_timings()
+    print(f"INFO: Extracted {len(rows)} labels to {args.label_table_path} "
+          f"({os.path.getsize(args.label_table_path) / 2 ** 20:.1f}MB)")
@@ -0,0 +1,66 @@
+from tqdm import tqdm
+from typing import Any, Callable, Dict, Optional
+
+import time
+
+
+class Progress:
+    """
+        Progress bar of a pass over docs (or mentions) with its rate and ETA (if the total is known), annotations
+        processed per second and optional statistics (e.g., a cache hit rate). Bars are written to stderr
+        and may be disabled, e.g., in batch jobs.
+    """
+
+    def __init__(self, description: str, total: Optional[int] = None, unit: str = "docs", disable: bool = False,
+                 stats: Optional[Callable[[], Dict[str, Any]]] = None, min_interval: float = 1.0):
+        """
+            Args:
+                description (str): description of the pass
+                total (Optional[int]): number of docs (or mentions) of the pass, if known
+                unit (str): unit of the rate
+                disable (bool): whether to hide the bar
+                stats (Optional[Callable[[], Dict[str, Any]]]): function returning statistics shown next to the bar
+                min_interval (float): shortest time (in seconds) between refreshes of the bar
+        """
+        self.bar = tqdm(total=total, desc=description, unit=unit, disable=disable, mininterval=min_interval,
+                        dynamic_ncols=True)
+        self.stats = stats
+        self.min_interval = min_interval
+        self.annotations = 0
+        self.started = time.perf_counter()
+        self.refreshed = 0.0
+
+    def update(self, count: int = 1, annotations: int = 0) -> None:
+        """
+            Args:
+                count (int): number of docs (or mentions) processed since the last update
+                annotations (int): number of annotations processed since the last update
+        """
+        if self.bar.disable:
+            return
+        self.bar.update(count)
+        self.annotations += annotations
+        now = time.perf_counter()
+        if now - self.refreshed >= self.min_interval:
+            self.refreshed = now
+            self._set_postfix(now)
+
+    def close(self) -> None:
+        if not self.bar.disable:
+            self._set_postfix(time.perf_counter())
+        self.bar.close()
+
+    def _set_postfix(self, now: float) -> None:
+        postfix = {}
+        if self.annotations > 0:
+            postfix["annotations/s"] = f"{self.annotations / max(now - self.started, 1e-9):.0f}"
+        if self.stats is not None:
+            postfix.update(self.stats())
+        if postfix:
+            self.bar.set_postfix(postfix, refresh=False)
+
+    def __enter__(self) -> "Progress":
+        return self
+
+    def __exit__(self, *args: Any) -> None:
+        self.close()
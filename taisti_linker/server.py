@@ -0,0 +1,318 @@
+from collections import deque
+from concurrent.futures import Future
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from taisti_linker import __version__
+from taisti_linker.commons import EntityType, LabelWithIRI, get_entity_type
+from taisti_linker.entity_linker import EntityLinker
+from taisti_linker.similarity_calculator import SimilarityCalculator
+from typing import Any, Dict, List, Optional, Tuple
+
+import argparse
+import json
+import numpy as np
+import queue
+import threading
+import time
+
+
+def parse_category(category: str) -> EntityType:
+    """
+        Args:
+            category (str): entity type name (e.g., FOOD) or a NER/BRAT category (e.g., food_product_with_unit)
+        Returns:
+            EntityType: category as a shared EntityType object
+    """
+    if category.upper() in EntityType.__members__:
+        return EntityType[category.upper()]
+    return get_entity_type(category)
+
+
+class LinkingService:
+    """
+        Link mentions received from many concurrent clients with a single warm `EntityLinker`.
+        Requests are queued and a single linking thread takes them in micro-batches: it waits up to `max_wait_ms`
+        for more requests once the first one arrives, so concurrent requests are normalized and linked together
+        (and repeated mentions once), while the linker itself is never used by two threads at once.
+        Even metrics of the linker are read by the linking thread (see `metrics`).
+    """
+
+    def __init__(self, linker: EntityLinker, max_batch_size: int = 1024, max_wait_ms: float = 2.0,
+                 latency_window: int = 10000):
+        """
+            Args:
+                linker (EntityLinker): linker with label mappings (and caches) loaded
+                max_batch_size (int): number of mentions after which a batch is linked without waiting for more requests
+                max_wait_ms (float): longest time a batch waits for more requests
+                latency_window (int): number of recent requests latency percentiles are calculated of
+        """
+        self.linker = linker
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000.0
+        # mentions of a request, or None for a request of linker metrics
+        self.requests: "queue.Queue[Tuple[Optional[List[Tuple[str, EntityType]]], Future]]" = queue.Queue()
+        self.started = time.time()
+        self.lock = threading.Lock()
+        self.counters = {"requests": 0, "mentions": 0, "batches": 0, "batched_mentions": 0, "errors": 0}
+        self.latencies: deque = deque(maxlen=latency_window)
+        self.thread = threading.Thread(target=self._run, name="linker", daemon=True)
+        self.thread.start()
+
+    def link(self, mentions: List[Tuple[str, EntityType]]) -> List[Tuple[Optional[LabelWithIRI], Optional[float]]]:
+        """
+            Link mentions of a single request, waiting until the batch they are linked in is done.
+
+            Args:
+                mentions (List[Tuple[str, EntityType]]): (raw text, category) mentions
+            Returns:
+                List[Tuple[Optional[LabelWithIRI], Optional[float]]]: linked entity (or None) and its score for each mention
+        """
+        start = time.perf_counter()
+        future: Future = Future()
+        self.requests.put((mentions, future))
+        try:
+            return future.result()
+        finally:
+            with self.lock:
+                self.counters["requests"] += 1
+                self.counters["mentions"] += len(mentions)
+                self.latencies.append(time.perf_counter() - start)
+
+    def metrics(self) -> Dict[str, Any]:
+        """
+            Returns:
+                Dict[str, Any]: request counters, mean batch size, latency percentiles (in milliseconds), cache stats
+                                and counters and timers of the linker (see `Metrics.snapshot`)
+        """
+        queued_requests = self.requests.qsize()
+        # counters and caches of the linker are changed by the linking thread, so it takes their snapshot as well
+        future: Future = Future()
+        self.requests.put((None, future))
+        linker_metrics = future.result()
+        with self.lock:
+            counters = dict(self.counters)
+            latencies = np.asarray(self.latencies) * 1000.0
+        return {
+            **counters,
+            "uptime_s": time.time() - self.started,
+            "queued_requests": queued_requests,
+            "mean_batch_size": counters["batched_mentions"] / counters["batches"] if counters["batches"] > 0 else 0.0,
+            "latency_ms": {
+                "p50": float(np.percentile(latencies, 50)) if len(latencies) > 0 else 0.0,
+                "p99": float(np.percentile(latencies, 99)) if len(latencies) > 0 else 0.0,
+            },
+            **linker_metrics,
+        }
+
+    def _get_linker_metrics(self) -> Dict[str, Any]:
+        return {
+            "normalization_cache": self.linker.text_processor.cache_stats(),
+            "link_cache": self.linker.cache.stats(),
+            "linker": self.linker.metrics.snapshot(),
+        }
+
+    def _run(self) -> None:
+        while True:
+            batch: List[Tuple[List[Tuple[str, EntityType]], Future]] = []
+            metrics_requests: List[Future] = []
+            request = self.requests.get()
+            size = 0
+            deadline = time.perf_counter() + self.max_wait
+            while True:
+                mentions, future = request
+                if mentions is None:
+                    metrics_requests.append(future)
+                else:
+                    batch.append((mentions, future))
+                    size += len(mentions)
+                timeout = deadline - time.perf_counter()
+                if size >= self.max_batch_size or timeout <= 0:
+                    break
+                try:
+                    request = self.requests.get(timeout=timeout)
+                except queue.Empty:
+                    break
+            if len(batch) > 0:
+                self._link_batch(batch)
+            for future in metrics_requests:
+                try:
+                    future.set_result(self._get_linker_metrics())
+                except Exception as e:
+                    future.set_exception(e)
+
+    def _link_batch(self, batch: List[Tuple[List[Tuple[str, EntityType]], Future]]) -> None:
+        mentions = [mention for request_mentions, _ in batch for mention in request_mentions]
+        try:
+            results = self.linker.link_mentions(mentions)
+        except Exception as e:
+            with self.lock:
+                self.counters["errors"] += len(batch)
+            for _, future in batch:
+                future.set_exception(e)
+            return
+
+        with self.lock:
+            self.counters["batches"] += 1
+            self.counters["batched_mentions"] += len(mentions)
+        start = 0
+        for request_mentions, future in batch:
+            future.set_result(results[start:start + len(request_mentions)])
+            start += len(request_mentions)
+
+
+class LinkingRequestHandler(BaseHTTPRequestHandler):
+    """
+        JSON endpoints of the linking service:
+            POST /link    - {"mentions": [{"text": "dark chocolate", "category": "FOOD"}, ...]}
+                            returns {"results": [{"text", "category", "iri", "label", "score"}, ...]},
+                            iri, label and score are null if nothing is linked
+            GET  /health  - {"status": "ok", "version": ...}
+            GET  /metrics - see `LinkingService.metrics`
+    """
+
+    # set by `serve`
+    service: LinkingService = None
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self) -> None:
+        if self.path == "/health":
+            self._send_json(200, {"status": "ok", "version": __version__})
+        elif self.path == "/metrics":
+            self._send_json(200, self.service.metrics())
+        else:
+            self._send_json(404, {"error": f"Unknown endpoint {self.path}"})
+
+    def do_POST(self) -> None:
+        if self.path != "/link":
+            self._send_json(404, {"error": f"Unknown endpoint {self.path}"})
+            return
+        try:
+            body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))))
+            mentions = [(str(mention["text"]), parse_category(str(mention["category"]))) for mention in body["mentions"]]
+        except (ValueError, KeyError, TypeError) as e:
+            self._send_json(400, {"error": f"Expected {{\"mentions\": [{{\"text\": ..., \"category\": ...}}]}}: {e}"})
+            return
+
+        try:
+            results = self.service.link(mentions)
+        except Exception as e:
+            self._send_json(500, {"error": str(e)})
+            return
+        self._send_json(200, {"results": [
+            {
+                "text": text,
+                "category": entity_type.name,
+                "iri": item.iri if item is not None else None,
+                "label": item.label if item is not None else None,
+                "score": score,
+            }
+            for (text, entity_type), (item, score) in zip(mentions, results)
+        ]})
+
+    def log_message(self, format: str, *args: Any) -> None:
+        # access logs of every request would dominate the output (and the latency) of a busy service
+        pass
+
+    def _send_json(self, status: int, data: Any) -> None:
+        body = json.dumps(data).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+def serve(linker: EntityLinker, host: str = "127.0.0.1", port: int = 8080,
+          max_batch_size: int = 1024, max_wait_ms: float = 2.0) -> ThreadingHTTPServer:
+    """
+        Create a server of the linking service, to be run with `serve_forever`.
+
+        Args:
+            linker (EntityLinker): linker with label mappings (and caches) loaded
+            host (str): address to listen on
+            port (int): port to listen on (0 chooses a free one, see `server_address`)
+            max_batch_size (int): number of mentions after which a batch is linked without waiting for more requests
+            max_wait_ms (float): longest time a batch waits for more requests
+        Returns:
+            ThreadingHTTPServer: the server
+    """
+    handler = type("Handler", (LinkingRequestHandler,), {
+        "service": LinkingService(linker, max_batch_size, max_wait_ms)
+    })
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    return server
+
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument('-op', '--ontology_path',
+                        help='Path to ontology that we want to link to',
+                        type=str,
+                        default='../foodon.owl')
+    parser.add_argument('-s', '--similarity',
+                        help='Similarity measure (see `entity_linker.py --help`)',
+                        type=str,
+                        default='J')
+    parser.add_argument('-host', '--host',
+                        help='Address to listen on',
+                        type=str,
+                        default='127.0.0.1')
+    parser.add_argument('-p', '--port',
+                        help='Port to listen on',
+                        type=int,
+                        default=8080)
+    parser.add_argument('-mb', '--max_batch_size',
+                        help='Number of mentions after which a batch is linked without waiting for more requests',
+                        type=int,
+                        default=1024)
+    parser.add_argument('-mw', '--max_wait_ms',
+                        help='Longest time (in milliseconds) a batch waits for requests of other clients',
+                        type=float,
+                        default=2.0)
+    parser.add_argument('-cd', '--cache_dir',
+                        help='Directory caching label mappings (by default $TAISTI_LINKER_CACHE_DIR or ~/.cache/taisti_linker)',
+                        type=str,
+                        default='')
+    parser.add_argument('-lcs', '--link_cache_size',
+                        help='Number of link results cached in memory',
+                        type=int,
+                        default=100000)
+    parser.add_argument('-lcp', '--link_cache_path',
+                        help='Path to a SQLite file persisting link results across runs (disabled by default)',
+                        type=str,
+                        default='')
+    parser.add_argument('-em', '--embedding_model',
+                        help='Locally installed spaCy pipeline with word vectors (embedding similarity only)',
+                        type=str,
+                        default='en_core_web_lg')
+    parser.add_argument('-q8', '--quantize_embeddings',
+                        help='Keep label vectors as 8-bit integers, using four times less memory (embedding similarity only)',
+                        action='store_true')
+    parser.add_argument('-cc', '--category_config',
+                        help='JSON file relating entity types (e.g., FOOD, UNIT) to roots of allowed taxonomies '
+                             'in one or more ontology files (by default FOOD and PROCESS roots in --ontology_path)',
+                        type=str,
+                        default='')
+
+    args = parser.parse_args()
+    linker = EntityLinker(args.ontology_path, '', '', '',
+                          similarity_measure=SimilarityCalculator.similarity_id_to_type(args.similarity),
+                          cache_dir=args.cache_dir,
+                          link_cache_size=args.link_cache_size,
+                          link_cache_path=args.link_cache_path,
+                          embedding_model=args.embedding_model,
+                          quantize_embeddings=args.quantize_embeddings,
+                          category_config_path=args.category_config,
+                          quiet=True)
+    # load labels and build indexes up front, so that the first requests are not slower than the next ones
+    for entity_type in linker.normalized_label_mapping:
+        linker._prepare(entity_type)
+    server = serve(linker, args.host, args.port, args.max_batch_size, args.max_wait_ms)
+    print(f"INFO: Linking service listening on http://{args.host}:{server.server_address[1]}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
@@ -1,22 +1,42 @@
+from collections import Counter
 from enum import Enum
-from typing import Any, Callable, List, Optional, Set
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
 from nltk.util import everygrams
 from nltk import pos_tag, word_tokenize
 from nltk.corpus import wordnet as wn
+from taisti_linker.cache import LRUCache
+import math
+
+
+# length of character n-grams used by TF-IDF similarity
+CHAR_NGRAM_SIZE = 3
 
 
 class SimilarityType(Enum):
     JACCARD = 1
     EVERYGRAM = 2
     WORDNET = 3
+    SPARSE_JACCARD = 4
+    MINHASH = 5
+    TFIDF = 6
+    EMBEDDING = 7
 
 
 class SimilarityCalculator:
     """ Similarity metrics container """
 
-    def __init__(self, similarity_type: SimilarityType, normalizer: Callable = None):
+    def __init__(self, similarity_type: SimilarityType, normalizer: Callable = None,
+                 path_similarity_cache_size: Optional[int] = 1000000):
+        """
+            Args:
+                similarity_type (SimilarityType): similarity measure
+                normalizer (Callable): function normalizing texts (used if preprocessing is asked to normalize)
+                path_similarity_cache_size (Optional[int]): number of memoized synset pair similarities (Wordnet only)
+        """
         self.similarity_type = similarity_type
         self.normalizer = normalizer
+        self.path_similarities = LRUCache(path_similarity_cache_size)
+        self.synsets: Dict[Tuple[str, str], Any] = {}
 
     def calculate(self, repr_a: Any, repr_b: Any) -> float:
         """
@@ -30,12 +50,14 @@ class SimilarityCalculator:
                 float: similarity score
         """
 
-        if self.similarity_type == SimilarityType.JACCARD:
+        if self.similarity_type in [SimilarityType.JACCARD, SimilarityType.SPARSE_JACCARD, SimilarityType.MINHASH]:
             return self._jaccard(repr_a, repr_b)
         elif self.similarity_type == SimilarityType.EVERYGRAM:
             return self._everygrams(repr_a, repr_b)
         elif self.similarity_type == SimilarityType.WORDNET:
             return self._wordnet(repr_a, repr_b)
+        elif self.similarity_type == SimilarityType.TFIDF:
+            return self._cosine(repr_a, repr_b)
 
     def preprocess(self, text: str, normalize: bool = False) -> Any:
         """
@@ -49,12 +71,51 @@ class SimilarityCalculator:
                 Any: preprocessed representation
         """
 
-        if self.similarity_type == SimilarityType.JACCARD:
+        if self.similarity_type in [SimilarityType.JACCARD, SimilarityType.SPARSE_JACCARD, SimilarityType.MINHASH]:
             return self._jaccard_preprocess(text, normalize)
         elif self.similarity_type == SimilarityType.EVERYGRAM:
             return self._everygrams_preprocess(text, normalize)
         elif self.similarity_type == SimilarityType.WORDNET:
             return self._wordnet_preprocess(text, normalize)
+        elif self.similarity_type == SimilarityType.TFIDF:
+            return self._char_ngrams_preprocess(text, normalize)
+
+    def preprocess_tokens(self, tokens: List[str]) -> Any:
+        """
+            Prepare the representation of a normalized text already split into tokens (e.g., a label of `LabelStore`),
+            the same as `preprocess` of the text.
+
+            Args:
+                tokens (List[str]): tokens of a normalized text
+            Returns:
+                Any: preprocessed representation
+        """
+
+        if self.similarity_type in [SimilarityType.JACCARD, SimilarityType.SPARSE_JACCARD, SimilarityType.MINHASH]:
+            return set(tokens)
+        elif self.similarity_type == SimilarityType.EVERYGRAM:
+            return set(everygrams(tokens))
+        raise ValueError(f"Representations of {self.similarity_type.name} similarity cannot be prepared from tokens")
+
+    def is_indexable(self) -> bool:
+        """
+            Check whether the similarity measure is 0 for texts not sharing any element of their representations.
+            Only such measures can use an inverted index to prune the labels being compared.
+
+            Returns:
+                bool: True for set-based measures (Jaccard, Everygram)
+        """
+        return self.similarity_type in [
+            SimilarityType.JACCARD, SimilarityType.EVERYGRAM, SimilarityType.SPARSE_JACCARD]
+
+    def is_batched(self) -> bool:
+        """
+            Check whether the similarity measure links whole batches of texts at once (see `EntityLinker.link_many`).
+
+            Returns:
+                bool: True for matrix-based measures (Sparse Jaccard, TF-IDF, embeddings)
+        """
+        return self.similarity_type in [SimilarityType.SPARSE_JACCARD, SimilarityType.TFIDF, SimilarityType.EMBEDDING]
 
     @staticmethod
     def similarity_id_to_type(similarity_measure_id: str = 'j') -> SimilarityType:
@@ -62,7 +123,11 @@ class SimilarityCalculator:
             Transform textual representation of similarity id into appropriate type
 
             Args:
-                similarity_measure_id (str): either j or J (for Jaccard), e or E (for Everygrams), w or W (for Wordnet)
+                similarity_measure_id (str): either j or J (for Jaccard), e or E (for Everygrams), w or W (for Wordnet),
+                                             s or S (for Jaccard calculated in batches with sparse matrices),
+                                             m or M (for Jaccard of candidates found with MinHash LSH),
+                                             t or T (for cosine similarity of TF-IDF weighted character n-grams),
+                                             v or V (for cosine similarity of word vectors of a spaCy pipeline)
                                              if unknown letter is provided, the jaccard similarity is used
             Returns:
                 SimilarityType: Similarity type
@@ -72,6 +137,14 @@ class SimilarityCalculator:
             return SimilarityType.EVERYGRAM
         elif similarity_measure_id == 'w':
             return SimilarityType.WORDNET
+        elif similarity_measure_id == 's':
+            return SimilarityType.SPARSE_JACCARD
+        elif similarity_measure_id == 'm':
+            return SimilarityType.MINHASH
+        elif similarity_measure_id == 't':
+            return SimilarityType.TFIDF
+        elif similarity_measure_id == 'v':
+            return SimilarityType.EMBEDDING
         else:
             return SimilarityType.JACCARD
 
@@ -85,6 +158,16 @@ class SimilarityCalculator:
             text = self.normalizer(text)
         return set(everygrams(text.split()))
 
+    def _char_ngrams_preprocess(self, text: str, normalize: bool = False) -> Any:
+        if normalize:
+            text = self.normalizer(text)
+        ngrams = []
+        for word in text.split():
+            # padding marks n-grams at word boundaries
+            word = f" {word} "
+            ngrams += [word[i:i + CHAR_NGRAM_SIZE] for i in range(max(1, len(word) - CHAR_NGRAM_SIZE + 1))]
+        return ngrams
+
     def _wordnet_preprocess(self, text: str, normalize: bool = False) -> Any:
         text = pos_tag(word_tokenize(text))
         synsets = [self._tagged_to_synset(
@@ -123,6 +206,23 @@ class SimilarityCalculator:
         else:
             return 1.0 * len(a.intersection(b)) / len(a.union(b))
 
+    def _cosine(self, a: List[str], b: List[str]) -> float:
+        """
+            Cosine similarity between two texts represented as character n-grams, weighted by their counts.
+            `TfidfMatcher` weights them with inverse document frequencies of ontology labels as well.
+
+            Args:
+                a (List[str]): first argument
+                b (List[str]): second argument
+            Returns:
+                float: cosine similarity of n-gram count vectors
+        """
+        counts_a, counts_b = Counter(a), Counter(b)
+        norm = math.sqrt(sum(c * c for c in counts_a.values())) * math.sqrt(sum(c * c for c in counts_b.values()))
+        if norm == 0:
+            return 0.0
+        return sum(count * counts_b[ngram] for ngram, count in counts_a.items() if ngram in counts_b) / norm
+
     def _wordnet(self, synsets1: List[Any], synsets2: List[Any]) -> float:
         """
             Wordnet based similarity between two texts.
@@ -137,17 +237,25 @@ class SimilarityCalculator:
 
         # For each word in the first sentence
         for synset in synsets1:
-            # Get the similarity value of the most similar word in the other sentence
-            best_score = max([synset.path_similarity(ss) for ss in synsets2])
-
-            # Check that the similarity could have been computed
-            if best_score is not None:
-                score += best_score
+            # Get the similarity value of the most similar word in the other sentence,
+            # skipping pairs the similarity could not have been computed for
+            scores = [similarity for similarity in (self._path_similarity(synset, ss) for ss in synsets2)
+                      if similarity is not None]
+            if len(scores) > 0:
+                score += max(scores)
                 count += 1
 
         # Average the values
-        score /= count
-        return score
+        return score / count if count > 0 else 0.0
+
+    def _path_similarity(self, synset1: Any, synset2: Any) -> Optional[float]:
+        """ Memoized `path_similarity` of a synset pair, which is the same in both directions """
+        key = (synset1, synset2) if synset1.name() <= synset2.name() else (synset2, synset1)
+        similarity = self.path_similarities.get(key, -1.0)
+        if similarity == -1.0:
+            similarity = synset1.path_similarity(synset2)
+            self.path_similarities.put(key, similarity)
+        return similarity
 
     def _penn_to_wn(self, tag: str) -> Optional[str]:
         """ Convert between a Penn Treebank tag to a simplified Wordnet tag """
@@ -171,7 +279,9 @@ class SimilarityCalculator:
         if wn_tag is None:
             return None
 
-        try:
-            return wn.synsets(word, wn_tag)[0]
-        except Exception:
-            return None
+        if (word, wn_tag) not in self.synsets:
+            try:
+                self.synsets[(word, wn_tag)] = wn.synsets(word, wn_tag)[0]
+            except Exception:
+                self.synsets[(word, wn_tag)] = None
+        return self.synsets[(word, wn_tag)]
@@ -0,0 +1,139 @@
+from taisti_linker.commons import LabelWithIRI
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+import numpy as np
+import scipy.sparse as sp
+
+
+def select_links(rows: np.ndarray, cols: np.ndarray, scores: np.ndarray, n_texts: int, n_labels: int,
+                 min_acceptable_similarity: float) -> List[int]:
+    """
+        Choose a label for each text the same way `EntityLinker.link` scanning all labels does:
+        the best label above the threshold wins, ties are resolved in favour of the last label,
+        unless a perfect match is found, in which case the first perfect match wins.
+
+        Args:
+            rows (np.ndarray): text of each non-zero score
+            cols (np.ndarray): label position of each non-zero score
+            scores (np.ndarray): non-zero scores (missing pairs score 0)
+            n_texts (int): number of texts
+            n_labels (int): number of labels
+            min_acceptable_similarity (float): similarity a label has to exceed to be linked
+        Returns:
+            List[int]: position of the linked label for each text, -1 if none is linked
+    """
+    result = [-1] * n_texts
+    if n_texts == 0 or n_labels == 0:
+        return result
+
+    # the linear scan stops at the first perfect match
+    perfect = scores == 1.0
+    first_perfect = np.full(n_texts, n_labels, dtype=np.int64)
+    np.minimum.at(first_perfect, rows[perfect], cols[perfect])
+    has_perfect = first_perfect < n_labels
+
+    eligible = (scores > min_acceptable_similarity) & ~has_perfect[rows]
+    rows, cols, scores = rows[eligible], cols[eligible], scores[eligible]
+    # sort by row, then score, then label position; the last entry of each row is the best one
+    order = np.lexsort((cols, scores, rows))
+    rows, cols = rows[order], cols[order]
+    last_in_row = np.ones(len(rows), dtype=bool)
+    last_in_row[:-1] = rows[1:] != rows[:-1]
+
+    for row, col in zip(rows[last_in_row].tolist(), cols[last_in_row].tolist()):
+        result[row] = col
+    if 1.0 > min_acceptable_similarity:
+        for row in np.flatnonzero(has_perfect).tolist():
+            result[row] = int(first_perfect[row])
+    if min_acceptable_similarity < 0:
+        # texts sharing nothing with any label score 0 against all of them, so the last label wins
+        for row in range(n_texts):
+            if result[row] < 0:
+                result[row] = n_labels - 1
+    return result
+
+
+class SparseJaccardMatcher:
+    """
+        Batch Jaccard linker. Labels and mentions are encoded as sparse binary feature matrices,
+        so intersection sizes for a whole batch of mentions are calculated with a single sparse matmul.
+    """
+
+    def __init__(self, labels: Sequence[LabelWithIRI], preprocess: Callable[[str], Any],
+                 min_acceptable_similarity: float, tokens: Optional[Tuple[List[str], np.ndarray, np.ndarray]] = None):
+        """
+            Encode labels of a single category as a sparse binary matrix.
+
+            Args:
+                labels (Sequence[LabelWithIRI]): labels in the order they are scanned by the linker
+                preprocess (Callable[[str], Any]): function transforming a normalized text into a set of features
+                min_acceptable_similarity (float): similarity a label has to exceed to be linked
+                tokens (Optional[Tuple[List[str], np.ndarray, np.ndarray]]): token vocabulary, token offsets and
+                    vocabulary ids of tokens of the labels (see `CategoryLabels`); as features of a label are its tokens,
+                    the matrix is built from them directly, otherwise labels are preprocessed
+        """
+        self.labels = labels
+        self.preprocess = preprocess
+        self.min_acceptable_similarity = min_acceptable_similarity
+        self.vocabulary: Dict[Any, int] = {}
+
+        if tokens is not None:
+            vocabulary, token_offsets, token_ids = tokens
+            self.vocabulary = {token: token_id for token_id, token in enumerate(vocabulary)}
+            label_matrix = sp.csr_matrix(
+                (np.ones(len(token_ids), dtype=np.int32), np.array(token_ids), np.array(token_offsets)),
+                shape=(len(labels), len(vocabulary)))
+            # repeated tokens of a label are a single feature
+            label_matrix.sum_duplicates()
+            label_matrix.data[:] = 1
+        else:
+            indptr, indices = [0], []
+            for item in labels:
+                for feature in preprocess(item.normalized_label):
+                    indices.append(self.vocabulary.setdefault(feature, len(self.vocabulary)))
+                indptr.append(len(indices))
+            label_matrix = self._to_csr(indptr, indices, len(self.vocabulary))
+
+        self.label_sizes = np.diff(label_matrix.indptr)
+        # features x labels, so that mentions @ labels_transposed gives intersection sizes
+        self.labels_transposed = label_matrix.T.tocsr()
+
+    def match(self, texts: List[str]) -> List[Optional[LabelWithIRI]]:
+        """
+            Link a batch of normalized texts. The result is the same as scanning all labels with `EntityLinker.link`:
+            the best label above the threshold wins, ties are resolved in favour of the last label,
+            unless a perfect match is found, in which case the first perfect match wins.
+
+            Args:
+                texts (List[str]): normalized texts to link
+            Returns:
+                List[Optional[LabelWithIRI]]: linked entity (or None) for each text
+        """
+        result: List[Optional[LabelWithIRI]] = [None] * len(texts)
+        if len(texts) == 0 or len(self.labels) == 0:
+            return result
+
+        indptr, indices, text_sizes = [0], [], []
+        for text in texts:
+            features = self.preprocess(text)
+            # features unknown to labels do not intersect but still count to the union size
+            text_sizes.append(len(features))
+            indices.extend(self.vocabulary[f] for f in features if f in self.vocabulary)
+            indptr.append(len(indices))
+
+        text_matrix = self._to_csr(indptr, indices, len(self.vocabulary))
+        intersections = (text_matrix @ self.labels_transposed).tocoo()
+
+        rows, cols = intersections.row, intersections.col
+        intersection_sizes = intersections.data.astype(np.float64)
+        union_sizes = np.asarray(text_sizes, dtype=np.float64)[rows] + self.label_sizes[cols] - intersection_sizes
+        scores = intersection_sizes / union_sizes
+
+        positions = select_links(rows, cols, scores, len(texts), len(self.labels), self.min_acceptable_similarity)
+        return [self.labels[position] if position >= 0 else None for position in positions]
+
+    @staticmethod
+    def _to_csr(indptr: List[int], indices: List[int], n_columns: int) -> sp.csr_matrix:
+        data = np.ones(len(indices), dtype=np.int32)
+        return sp.csr_matrix(
+            (data, np.asarray(indices, dtype=np.int32), np.asarray(indptr, dtype=np.int64)),
+            shape=(len(indptr) - 1, n_columns))
@@ -1,32 +1,164 @@
 from nltk.stem import PorterStemmer
-from typing import Any, Set
+from taisti_linker.cache import LRUCache, PersistentStore
+from typing import Any, Dict, Iterable, List, Optional
+import hashlib
+import json
+import nltk
 import re
 import spacy
 
 
+STOPWORDS = ['the', 'a', 'an', 'at',
+             'by', 'for', 'in', 'into', 'on', 'to']
+
+
 class TextProcessor:
     """ A class providing text-realted utilities """
 
-    def __init__(self):
-        self.nlp = spacy.load("en_core_web_trf")
+    def __init__(self, model_name: Optional[str] = None, tokenizer_only: bool = True,
+                 cache_size: Optional[int] = 100000, cache_path: Optional[str] = None):
+        """
+            Args:
+                model_name (Optional[str]): spaCy pipeline used for tokenization (e.g., en_core_web_trf).
+                                            By default a blank English pipeline is used -- normalized texts contain
+                                            lowercase ASCII letters only, which every English pipeline tokenizes
+                                            with the same rules, so there is no need to load a (torch) model.
+                tokenizer_only (bool): whether to run the tokenizer only instead of the full pipeline (True by default)
+                cache_size (Optional[int]): number of normalized texts memoized in memory (unbounded if None, 0 disables)
+                cache_path (Optional[str]): path to a SQLite file persisting normalized texts across runs (None disables)
+        """
+        self.model_name = model_name
+        self.tokenizer_only = tokenizer_only
+        if model_name is None:
+            self.nlp = spacy.blank("en")
+        else:
+            self.nlp = spacy.load(model_name)
         self.ps = PorterStemmer()
+        self.cache = LRUCache(cache_size)
+        self.store = PersistentStore(cache_path, self.get_settings_hash()) if cache_path else None
+
+    def get_settings(self) -> Dict[str, Any]:
+        """
+            Describe everything that influences the result of normalization, so that normalized texts
+            (and mappings built from them) can be reused only by equally configured normalizers.
+
+            Returns:
+                Dict[str, Any]: normalization settings
+        """
+        return {
+            "model_name": self.model_name,
+            "tokenizer_only": self.tokenizer_only,
+            "stopwords": STOPWORDS,
+            "spacy": spacy.__version__,
+            "nltk": nltk.__version__,
+        }
+
+    def get_settings_hash(self) -> str:
+        """
+            Returns:
+                str: hash of normalization settings (see `get_settings`)
+        """
+        settings = json.dumps(self.get_settings(), sort_keys=True)
+        return hashlib.sha256(settings.encode("utf-8")).hexdigest()
 
     def normalize_text(self, text: str) -> str:
         """
             Normalize ontology labels and NER outputs to increase the chance of a match.
+            Results are memoized by the raw text, in memory and (optionally) in a persistent store.
 
             Args:
                 text (str): text to normalize
             Returns:
                 str: ormalized text
         """
-        stopwords = ['the', 'a', 'an', 'at',
-                     'by', 'for', 'in', 'into', 'on', 'to']
+        normalized = self.cache.get(text)
+        if normalized is not None:
+            return normalized
+        if self.store is not None:
+            normalized = self.store.get(text)
+        if normalized is None:
+            normalized = self._normalize_text(text)
+            if self.store is not None:
+                self.store.put(text, normalized)
+        self.cache.put(text, normalized)
+        return normalized
+
+    def normalize_many(self, texts: Iterable[str], batch_size: int = 1000, n_process: int = 1) -> List[str]:
+        """
+            Normalize many texts at once (see `normalize_text`). Duplicated and memoized texts are normalized once,
+            the remaining ones are tokenized in batches with `nlp.pipe` (possibly using many processes)
+            and each distinct token is stemmed only once.
+
+            Args:
+                texts (Iterable[str]): texts to normalize
+                batch_size (int): number of texts tokenized at once
+                n_process (int): number of processes used for tokenization
+            Returns:
+                List[str]: normalized texts, in the order of the input texts
+        """
+        texts = list(texts)
+        normalized: Dict[str, str] = {}
+        missing = []
+        for text in dict.fromkeys(texts):
+            memoized = self.cache.get(text)
+            if memoized is None:
+                missing.append(text)
+            else:
+                normalized[text] = memoized
+
+        if self.store is not None and len(missing) > 0:
+            stored = self.store.get_many(missing)
+            normalized.update(stored)
+            missing = [text for text in missing if text not in stored]
+
+        disable = self.nlp.pipe_names if self.tokenizer_only else []
+        docs = self.nlp.pipe((self._clean_text(text) for text in missing),
+                             batch_size=batch_size, n_process=n_process, disable=disable)
+
+        stems: Dict[str, str] = {}
+        for text, doc in zip(missing, docs):
+            tokens = []
+            for token in doc:
+                if token.text not in stems:
+                    stems[token.text] = self.ps.stem(token.text)
+                tokens.append(stems[token.text])
+            normalized[text] = " ".join(tokens)
+
+        if self.store is not None and len(missing) > 0:
+            self.store.put_many((text, normalized[text]) for text in missing)
+        for text, normalized_text in normalized.items():
+            self.cache.put(text, normalized_text)
+        return [normalized[text] for text in texts]
+
+    def cache_stats(self) -> Dict[str, Any]:
+        """
+            Returns:
+                Dict[str, Any]: hit/miss statistics of the in-memory cache and the persistent store of normalized texts
+        """
+        stats = {"memory": self.cache.stats()}
+        if self.store is not None:
+            stats["store"] = self.store.stats()
+        return stats
+
+    def _normalize_text(self, text: str) -> str:
+        text = self._clean_text(text)
+        doc = self.nlp.make_doc(text) if self.tokenizer_only else self.nlp(text)
+        text = " ".join([self.ps.stem(token.text) for token in doc])
+        return text
+
+    def _clean_text(self, text: str) -> str:
+        """
+            Clean a text before tokenization: leave lowercased letters only and remove stopwords.
+
+            Args:
+                text (str): text to clean
+            Returns:
+                str: cleaned text
+        """
         # Hackish, in foodon default entities are annotated with (whole)
         text = re.sub(r"\(whole\)", "", text)
         text = re.sub(r"[^a-zA-Z]", " ", text)
         text = re.sub(r"\s+", " ", text)
         text = text.lower()
-        text = " ".join([t for t in text.split(" ") if t not in stopwords])
-        text = " ".join([self.ps.stem(token.text) for token in self.nlp(text)])
+        text = " ".join([t for t in text.split(" ") if t not in STOPWORDS])
         return text
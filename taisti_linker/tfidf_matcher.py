@@ -0,0 +1,141 @@
+from taisti_linker.commons import LabelWithIRI
+from taisti_linker.sparse_matcher import select_links
+from typing import Any, Callable, Dict, List, Optional, Sequence
+import io
+import numpy as np
+import scipy.sparse as sp
+
+
+class TfidfMatcher:
+    """
+        Batch linker scoring texts with the cosine similarity of TF-IDF weighted features (e.g., character n-grams).
+        Labels are encoded as a sparse matrix of L2-normalized rows, so scores of a whole batch of texts
+        are calculated with a single sparse matmul.
+    """
+
+    def __init__(self, labels: Sequence[LabelWithIRI], preprocess: Callable[[str], Any],
+                 min_acceptable_similarity: float, state: Optional[Dict[str, np.ndarray]] = None):
+        """
+            Encode labels of a single category as a TF-IDF matrix, or restore a matrix stored with `to_bytes`.
+
+            Args:
+                labels (Sequence[LabelWithIRI]): labels in the order they are scanned by the linker
+                preprocess (Callable[[str], Any]): function transforming a normalized text into a list of features
+                min_acceptable_similarity (float): similarity a label has to exceed to be linked
+                state (Optional[Dict[str, np.ndarray]]): stored matrix of the labels (see `from_bytes`)
+        """
+        self.labels = labels
+        self.preprocess = preprocess
+        self.min_acceptable_similarity = min_acceptable_similarity
+
+        if state is None:
+            vocabulary: Dict[Any, int] = {}
+            indptr, indices = [0], []
+            for item in labels:
+                for feature in preprocess(item.normalized_label):
+                    indices.append(vocabulary.setdefault(feature, len(vocabulary)))
+                indptr.append(len(indices))
+            counts = self._to_csr(indptr, indices, np.ones(len(indices)), len(vocabulary))
+            counts.sum_duplicates()
+            # smoothed inverse document frequency, as if a document containing every feature was added
+            document_frequencies = np.bincount(counts.indices, minlength=len(vocabulary))
+            self.idf = np.log((1.0 + len(labels)) / (1.0 + document_frequencies)) + 1.0
+            self.vocabulary = vocabulary
+            label_matrix = self._normalize(counts.multiply(self.idf[np.newaxis, :]).tocsr())
+        else:
+            self.idf = state["idf"]
+            self.vocabulary = {feature: position for position, feature in enumerate(state["vocabulary"].tolist())}
+            label_matrix = sp.csr_matrix(
+                (state["data"], state["indices"], state["indptr"]), shape=(len(labels), len(self.vocabulary)))
+
+        self.label_matrix = label_matrix
+        # features x labels, so that texts @ labels_transposed gives cosine similarities
+        self.labels_transposed = label_matrix.T.tocsr()
+
+    @classmethod
+    def from_bytes(cls, labels: Sequence[LabelWithIRI], preprocess: Callable[[str], Any],
+                   min_acceptable_similarity: float, data: bytes) -> "TfidfMatcher":
+        """
+            Restore a matcher stored with `to_bytes`.
+
+            Args:
+                labels (Sequence[LabelWithIRI]): labels the matcher was built for
+                preprocess (Callable[[str], Any]): function transforming a normalized text into a list of features
+                min_acceptable_similarity (float): similarity a label has to exceed to be linked
+                data (bytes): stored matcher
+            Returns:
+                TfidfMatcher: the matcher
+        """
+        with np.load(io.BytesIO(data), allow_pickle=False) as stored:
+            state = {name: stored[name] for name in stored.files}
+        if len(state["indptr"]) != len(labels) + 1:
+            raise ValueError("Stored TF-IDF matrix does not match the labels")
+        return cls(labels, preprocess, min_acceptable_similarity, state)
+
+    def to_bytes(self) -> bytes:
+        """
+            Returns:
+                bytes: vocabulary, IDF weights and the label matrix in the NumPy .npz format
+        """
+        vocabulary = sorted(self.vocabulary, key=self.vocabulary.get)
+        buffer = io.BytesIO()
+        np.savez(buffer, vocabulary=np.asarray(vocabulary, dtype=str), idf=self.idf,
+                 data=self.label_matrix.data, indices=self.label_matrix.indices, indptr=self.label_matrix.indptr)
+        return buffer.getvalue()
+
+    def match(self, texts: List[str]) -> List[Optional[LabelWithIRI]]:
+        """
+            Link a batch of normalized texts to their most similar labels (see `select_links` for tie-breaking).
+
+            Args:
+                texts (List[str]): normalized texts to link
+            Returns:
+                List[Optional[LabelWithIRI]]: linked entity (or None) for each text
+        """
+        scores = (self._encode(texts) @ self.labels_transposed).tocoo()
+        rows, cols, similarities = scores.row, scores.col, scores.data
+        if self.min_acceptable_similarity >= 0:
+            # labels not exceeding the threshold are never linked, dropping them early saves sorting them
+            exceeding = similarities > self.min_acceptable_similarity
+            rows, cols, similarities = rows[exceeding], cols[exceeding], similarities[exceeding]
+
+        positions = select_links(rows, cols, similarities, len(texts), len(self.labels), self.min_acceptable_similarity)
+        return [self.labels[position] if position >= 0 else None for position in positions]
+
+    def score_pairs(self, texts: List[str], other_texts: List[str]) -> np.ndarray:
+        """
+            Args:
+                texts (List[str]): normalized texts
+                other_texts (List[str]): normalized texts (e.g., labels) to compare with texts at the same positions
+            Returns:
+                np.ndarray: cosine similarity of each pair of texts, as scored by `match`
+        """
+        return np.asarray(self._encode(texts).multiply(self._encode(other_texts)).sum(axis=1)).ravel()
+
+    def _encode(self, texts: List[str]) -> sp.csr_matrix:
+        """
+            Args:
+                texts (List[str]): normalized texts
+            Returns:
+                sp.csr_matrix: normalized TF-IDF vectors of texts
+        """
+        indptr, indices = [0], []
+        for text in texts:
+            # features unknown to labels cannot match and are dropped before normalization
+            indices.extend(self.vocabulary[f] for f in self.preprocess(text) if f in self.vocabulary)
+            indptr.append(len(indices))
+        counts = self._to_csr(indptr, indices, np.ones(len(indices)), len(self.vocabulary))
+        counts.sum_duplicates()
+        return self._normalize(counts.multiply(self.idf[np.newaxis, :]).tocsr())
+
+    @staticmethod
+    def _normalize(matrix: sp.csr_matrix) -> sp.csr_matrix:
+        norms = np.sqrt(np.asarray(matrix.multiply(matrix).sum(axis=1)).ravel())
+        norms[norms == 0] = 1.0
+        return (sp.diags(1.0 / norms) @ matrix).tocsr()
+
+    @staticmethod
+    def _to_csr(indptr: List[int], indices: List[int], data: np.ndarray, n_columns: int) -> sp.csr_matrix:
+        return sp.csr_matrix(
+            (np.asarray(data, dtype=np.float64), np.asarray(indices, dtype=np.int32), np.asarray(indptr, dtype=np.int64)),
+            shape=(len(indptr) - 1, n_columns))
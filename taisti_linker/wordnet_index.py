@@ -0,0 +1,116 @@
+from collections import defaultdict
+from taisti_linker.commons import LabelWithIRI
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+
+# name of the fake synset connecting all taxonomies (see `Synset.path_similarity` of NLTK)
+ROOT_SYNSET_NAME = "*ROOT*"
+
+
+def get_max_path_distance(min_acceptable_similarity: float) -> Optional[int]:
+    """
+        Calculate the longest path between two synsets whose path similarity, 1 / (distance + 1),
+        still exceeds a threshold. A text averages the best similarities of its synsets, so it can exceed the threshold
+        only if at least one pair of synsets is connected by such a path.
+
+        Args:
+            min_acceptable_similarity (float): similarity a label has to exceed to be linked
+        Returns:
+            Optional[int]: the longest distance, or None if synsets at any distance (or none at all) may be linked
+    """
+    if min_acceptable_similarity <= 0:
+        return None
+    distance = 0
+    # compare with a slightly lower threshold, so that rounding of averaged scores never makes the bound too tight
+    while 1.0 / (distance + 2) >= min_acceptable_similarity - 1e-9:
+        distance += 1
+    return distance
+
+
+class WordNetIndex:
+    """
+        Index relating hypernyms of synsets of ontology labels to the labels. Labels sharing no hypernym close enough
+        to the synsets of a text cannot exceed the similarity threshold, so they are pruned before scoring.
+    """
+
+    def __init__(self, labels: Sequence[LabelWithIRI], representations: List[List[Any]], max_distance: Optional[int]):
+        """
+            Build the index over labels of a single category.
+
+            Args:
+                labels (Sequence[LabelWithIRI]): labels in the order they are scanned by the linker
+                representations (List[List[Any]]): synsets of each label
+                max_distance (Optional[int]): longest path between linkable synsets (see `get_max_path_distance`),
+                                              the index yields all labels if None
+        """
+        self.labels = labels
+        self.representations = representations
+        self.max_distance = max_distance
+        self.ancestors: Dict[str, Dict[str, int]] = {}
+        self.postings: Dict[str, List[Tuple[int, int]]] = defaultdict(list)
+
+        if max_distance is None:
+            return
+        for position, synsets in enumerate(representations):
+            distances: Dict[str, int] = {}
+            for synset in synsets:
+                for name, distance in self.get_ancestors(synset).items():
+                    distances[name] = min(distance, distances.get(name, distance))
+            for name, distance in distances.items():
+                self.postings[name].append((position, distance))
+
+    def get_ancestors(self, synset: Any) -> Dict[str, int]:
+        """
+            Find hypernyms of a synset (including itself and the fake root) within `max_distance`, the same way
+            NLTK does to calculate path similarities.
+
+            Args:
+                synset (Any): synset
+            Returns:
+                Dict[str, int]: distances of the synset to its hypernyms, by hypernym name
+        """
+        if synset.name() not in self.ancestors:
+            distances: Dict[str, int] = {}
+            queue = [(synset, 0)]
+            while len(queue) > 0:
+                next_queue = []
+                for current, distance in queue:
+                    if current.name() in distances:
+                        continue
+                    distances[current.name()] = distance
+                    next_queue += [(hypernym, distance + 1)
+                                   for hypernym in current.hypernyms() + current.instance_hypernyms()]
+                queue = next_queue
+            # the fake root is only used for some parts of speech, including it for all keeps the pruning safe
+            distances[ROOT_SYNSET_NAME] = max(distances.values()) + 1
+            self.ancestors[synset.name()] = {
+                name: distance for name, distance in distances.items() if distance <= self.max_distance
+            }
+        return self.ancestors[synset.name()]
+
+    def candidates(self, representation: List[Any]) -> Iterator[Tuple[LabelWithIRI, List[Any]]]:
+        """
+            Yield labels with a synset connected to a synset of a given representation by a path
+            not longer than `max_distance`, in the original label order. The remaining labels cannot exceed the threshold.
+
+            Args:
+                representation (List[Any]): synsets of a text to link
+            Returns:
+                Iterator[Tuple[LabelWithIRI, List[Any]]]: candidate labels accompanied by their synsets
+        """
+        if self.max_distance is None:
+            yield from zip(self.labels, self.representations)
+            return
+
+        positions = set()
+        for synset in representation:
+            for name, distance in self.get_ancestors(synset).items():
+                for position, label_distance in self.postings.get(name, ()):
+                    if distance + label_distance <= self.max_distance:
+                        positions.add(position)
+
+        for position in sorted(positions):
+            yield self.labels[position], self.representations[position]
+
+    def __len__(self) -> int:
+        return len(self.labels)
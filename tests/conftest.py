@@ -0,0 +1,151 @@
+from taisti_linker.entity_linker import EntityLinker
+from typing import Any, Callable, List, Optional, Tuple
+from xml.sax.saxutils import escape
+
+import os
+import pytest
+
+
+OBO = "http://purl.obolibrary.org/obo/"
+FOOD_ROOT = OBO + "FOODON_00001002"
+PROCESS_ROOT = OBO + "BFO_0000001"
+UNIT_ROOT = OBO + "UO_0000000"
+
+# (IRI, parent IRI, label, exact synonyms) of classes of the toy food ontology
+FOOD_CLASSES: List[Tuple[str, Optional[str], str, List[str]]] = [
+    (PROCESS_ROOT, None, "entity", []),
+    (FOOD_ROOT, PROCESS_ROOT, "foodon product type", []),
+    (OBO + "FOODON_1", FOOD_ROOT, "chocolate", ["cocoa"]),
+    (OBO + "FOODON_2", OBO + "FOODON_1", "dark chocolate", ["bitter chocolate"]),
+    (OBO + "FOODON_3", OBO + "FOODON_1", "milk chocolate", []),
+    (OBO + "FOODON_4", FOOD_ROOT, "milk", ["cow milk"]),
+    (OBO + "FOODON_5", OBO + "FOODON_4", "whole milk", []),
+    (OBO + "FOODON_6", FOOD_ROOT, "sugar", []),
+    (OBO + "FOODON_7", OBO + "FOODON_6", "brown sugar", ["cane sugar"]),
+    (OBO + "FOODON_8", FOOD_ROOT, "wheat flour", ["flour"]),
+    (OBO + "FOODON_9", FOOD_ROOT, "olive oil", []),
+    (OBO + "FOODON_10", FOOD_ROOT, "butter", []),
+    (OBO + "FOODON_11", OBO + "FOODON_10", "salted butter", []),
+    (OBO + "FOODON_12", FOOD_ROOT, "egg", []),
+    (OBO + "FOODON_13", OBO + "FOODON_12", "egg yolk", []),
+    (OBO + "FOODON_14", FOOD_ROOT, "orange juice", []),
+    # normalized to an empty text, which must never be linked to anything
+    (OBO + "FOODON_15", FOOD_ROOT, "a (whole)", []),
+    (OBO + "BFO_0000015", PROCESS_ROOT, "process", []),
+    (OBO + "FOODON_20", OBO + "BFO_0000015", "baking", []),
+    (OBO + "FOODON_21", OBO + "BFO_0000015", "deep frying", ["frying"]),
+    (OBO + "FOODON_22", OBO + "BFO_0000015", "boiling", []),
+]
+
+# the next release of the toy food ontology: a label changed, a class removed and classes added
+FOOD_CLASSES_V2: List[Tuple[str, Optional[str], str, List[str]]] = [
+    (iri, parent, "bittersweet chocolate" if iri == OBO + "FOODON_2" else label, synonyms)
+    for iri, parent, label, synonyms in FOOD_CLASSES if iri != OBO + "FOODON_14"
+] + [
+    (OBO + "FOODON_16", OBO + "FOODON_1", "chocolate chip", []),
+    (OBO + "FOODON_23", OBO + "BFO_0000015", "steaming", []),
+]
+
+# (text, BRAT category) annotations of the toy BRAT documents, exact, misspelled and partial mentions of labels
+MENTIONS: List[Tuple[str, str]] = [
+    ("dark chocolate", "food"), ("dark chocolate chips", "food"), ("Milk Chocolates", "food"),
+    ("whole milk", "food"), ("skimmed milk", "food"), ("brown cane sugar", "food"), ("sugar", "food"),
+    ("flour", "food"), ("wholemeal wheat flour", "food"), ("extra virgin olive oil", "food"), ("olive oil", "food"),
+    ("unsalted butter", "food"), ("egg yolks", "food"), ("orange juice", "food"), ("fresh orange", "food"),
+    ("a", "food"), ("chocolate chip cookie", "food_product"), ("bake", "process"), ("deep fried", "process"),
+    ("boiled", "process"), ("steamed", "process"), ("whisking", "process"),
+]
+
+# classes of the toy units ontology, its root is a subclass of the PROCESS root of the food ontology
+UNIT_CLASSES: List[Tuple[str, Optional[str], str, List[str]]] = [
+    (UNIT_ROOT, PROCESS_ROOT, "unit", []),
+    (OBO + "UO_1", UNIT_ROOT, "ounce", ["oz"]),
+    (OBO + "UO_2", UNIT_ROOT, "gram", []),
+    (OBO + "UO_3", UNIT_ROOT, "stir", []),
+]
+
+
+def write_ontology(path: str, base: str, classes: List[Tuple[str, Optional[str], str, List[str]]]) -> str:
+    """
+        Args:
+            path (str): path of the RDF/XML file to write
+            base (str): IRI of the ontology
+            classes (List[Tuple[str, Optional[str], str, List[str]]]): IRI, parent IRI, label and exact synonyms of classes
+        Returns:
+            str: the path
+    """
+    lines = [
+        '<?xml version="1.0"?>',
+        '<rdf:RDF xmlns:rdf="http://www.w3.org/1999/02/22-rdf-syntax-ns#"',
+        '         xmlns:rdfs="http://www.w3.org/2000/01/rdf-schema#"',
+        '         xmlns:owl="http://www.w3.org/2002/07/owl#"',
+        '         xmlns:oboI="http://www.geneontology.org/formats/oboInOwl#"',
+        f'         xml:base="{base}">',
+        f'<owl:Ontology rdf:about="{base}"/>',
+        '<owl:AnnotationProperty rdf:about="http://www.geneontology.org/formats/oboInOwl#hasExactSynonym"/>',
+    ]
+    for iri, parent, label, synonyms in classes:
+        lines.append(f'<owl:Class rdf:about="{iri}">')
+        parent = parent if parent is not None else "http://www.w3.org/2002/07/owl#Thing"
+        lines.append(f'  <rdfs:subClassOf rdf:resource="{parent}"/>')
+        lines.append(f'  <rdfs:label>{escape(label)}</rdfs:label>')
+        lines += [f'  <oboI:hasExactSynonym>{escape(synonym)}</oboI:hasExactSynonym>' for synonym in synonyms]
+        lines.append('</owl:Class>')
+    lines.append('</rdf:RDF>')
+    with open(path, "w") as f:
+        f.write("\n".join(lines) + "\n")
+    return path
+
+
+@pytest.fixture
+def food_ontology(tmp_path) -> str:
+    return write_ontology(os.path.join(tmp_path, "food.owl"), OBO + "food.owl", FOOD_CLASSES)
+
+
+@pytest.fixture
+def unit_ontology(tmp_path) -> str:
+    return write_ontology(os.path.join(tmp_path, "units.owl"), OBO + "units.owl", UNIT_CLASSES)
+
+
+@pytest.fixture
+def make_linker(tmp_path, food_ontology) -> Callable[..., EntityLinker]:
+    """ Factory of linkers of the toy food ontology, caching label mappings in a temporary directory """
+    def make(**options: Any) -> EntityLinker:
+        options.setdefault("cache_dir", os.path.join(tmp_path, "cache"))
+        return EntityLinker(
+            options.pop("ontology_path", food_ontology), options.pop("annotations_path", ''),
+            options.pop("ner_output_path", ''), options.pop("taisti_csv_path", ''),
+            metrics_sinks=[], quiet=True, **options)
+    return make
+
+
+def write_brat_docs(path: str, docs_count: int = 12, mentions_per_doc: int = 5) -> str:
+    """
+        Write toy BRAT documents, each with annotations of mentions taken from `MENTIONS` in turn.
+
+        Args:
+            path (str): folder to write documents to
+            docs_count (int): number of documents
+            mentions_per_doc (int): number of annotations of each document
+        Returns:
+            str: the folder
+    """
+    os.makedirs(path)
+    position = 0
+    for doc_id in range(docs_count):
+        text, annotations = "", []
+        for annotation_id in range(1, mentions_per_doc + 1):
+            mention, category = MENTIONS[position % len(MENTIONS)]
+            position += 1
+            annotations.append(f"T{annotation_id}\t{category} {len(text)} {len(text) + len(mention)}\t{mention}")
+            text += mention + ". "
+        with open(os.path.join(path, f"{doc_id}.txt"), "w") as f:
+            f.write(text)
+        with open(os.path.join(path, f"{doc_id}.ann"), "w") as f:
+            f.write("\n".join(annotations) + "\n")
+    return path
+
+
+@pytest.fixture
+def brat_docs(tmp_path) -> str:
+    return write_brat_docs(os.path.join(tmp_path, "brat"))
@@ -0,0 +1,35 @@
+from taisti_linker.cache import LabelMappingCache
+from taisti_linker.commons import EntityType, LabelWithIRI
+
+import os
+
+
+def save(cache, ontology_path, settings):
+    key = cache.get_key(ontology_path, settings)
+    cache.save(key, {EntityType.FOOD: {"milk": LabelWithIRI("milk", "iri-1", "milk")}}, ontology_path, settings, "FOOD")
+    return key
+
+
+def test_label_mappings_of_other_settings_are_kept_and_of_previous_releases_removed(tmp_path):
+    cache = LabelMappingCache(os.path.join(tmp_path, "cache"), max_entries=2)
+    ontology_path = os.path.join(tmp_path, "food.owl")
+    with open(ontology_path, "w") as f:
+        f.write("release 1")
+
+    # e.g., two services with different normalization settings sharing the cache directory
+    stemmed = save(cache, ontology_path, {"stemming": True})
+    plain = save(cache, ontology_path, {"stemming": False})
+    assert save(cache, ontology_path, {"stemming": True}) == stemmed
+    assert cache.load(stemmed) is not None and cache.load(plain) is not None
+
+    with open(ontology_path, "w") as f:
+        f.write("release 2")
+    new_stemmed = save(cache, ontology_path, {"stemming": True})
+    assert cache.load(stemmed) is None
+    assert cache.load(new_stemmed) is not None and cache.load(plain) is not None
+
+    # beyond the limit, the least recently used entries are removed
+    os.utime(os.path.join(cache.cache_dir, f"label_mapping-{plain}.json"), (0, 0))
+    other = save(cache, ontology_path, {"stemming": None})
+    assert cache.load(plain) is None
+    assert cache.load(new_stemmed) is not None and cache.load(other) is not None
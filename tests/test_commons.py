@@ -0,0 +1,33 @@
+from taisti_linker.commons import read_ner_annotation_file
+
+import json
+import os
+import pytest
+
+
+DOC = '{"text": "dark chocolate", "entities_list": [{"start": 0, "end": 14, "label": "food", "text": "dark chocolate"}]}'
+
+
+@pytest.mark.parametrize("content", [
+    f"[{DOC}, {DOC}]", f" [\n{DOC} ,\n{DOC}\n]\n", "[]",
+])
+def test_ner_output_is_read_as_by_json_load(tmp_path, content):
+    path = os.path.join(tmp_path, "ner.json")
+    with open(path, "w") as f:
+        f.write(content)
+    docs = read_ner_annotation_file(path)
+    assert [doc.text for doc in docs] == [doc["text"] for doc in json.loads(content)]
+    assert all(doc.annotations[0].text == "dark chocolate" for doc in docs)
+
+
+@pytest.mark.parametrize("content", [
+    f"[,,{DOC},]", f"[{DOC},]", f"[,{DOC}]", f"[{DOC},,{DOC}]", f"[{DOC} {DOC}]", f"[{DOC}", f"[{DOC}] {DOC}", "",
+])
+def test_malformed_ner_output_is_rejected(tmp_path, content):
+    path = os.path.join(tmp_path, "ner.json")
+    with open(path, "w") as f:
+        f.write(content)
+    with pytest.raises(json.JSONDecodeError):
+        json.loads(content)
+    with pytest.raises(json.JSONDecodeError):
+        read_ner_annotation_file(path)
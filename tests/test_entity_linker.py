@@ -0,0 +1,110 @@
+from conftest import FOOD_CLASSES_V2, FOOD_ROOT, OBO, PROCESS_ROOT, write_ontology
+from taisti_linker.commons import EntityType
+from taisti_linker.ontology_parser import OntologyParser, read_label_table, write_label_table
+from taisti_linker.similarity_calculator import SimilarityType
+
+import json
+import os
+import pytest
+import re
+
+
+def link_all(linker, path):
+    linker.link_all(path)
+    with open(path) as f:
+        return f.read()
+
+
+def get_labels(linker):
+    return {
+        entity_type: [(normalized_label, item.label, item.iri)
+                      for normalized_label, item in linker.normalized_label_mapping[entity_type].items()]
+        for entity_type in linker.normalized_label_mapping
+    }
+
+
+@pytest.mark.parametrize("similarity_measure", [SimilarityType.JACCARD, SimilarityType.SPARSE_JACCARD,
+                                                SimilarityType.TFIDF])
+def test_streaming_and_workers_write_the_same_output(make_linker, brat_docs, tmp_path, similarity_measure):
+    expected = link_all(make_linker(annotations_path=brat_docs, similarity_measure=similarity_measure),
+                        os.path.join(tmp_path, "expected.csv"))
+    assert len(expected.splitlines()) == 60
+
+    for options in [
+        {"streaming": True, "chunk_size": 5},
+        {"workers": 2},
+        # without the link cache, mentions of earlier chunks are linked again
+        {"streaming": True, "chunk_size": 5, "workers": 2, "link_cache_size": 0},
+    ]:
+        linker = make_linker(annotations_path=brat_docs, similarity_measure=similarity_measure, **options)
+        assert link_all(linker, os.path.join(tmp_path, "found.csv")) == expected, options
+
+
+def test_incremental_rebuild_builds_the_same_labels_as_a_full_rebuild(make_linker, food_ontology, tmp_path, capsys):
+    cache_dir = os.path.join(tmp_path, "incremental")
+    get_labels(make_linker(cache_dir=cache_dir, incremental_rebuild=True))
+    # a new release of the ontology replaces the previous one at the same path
+    write_ontology(food_ontology, OBO + "food.owl", FOOD_CLASSES_V2)
+    capsys.readouterr()
+
+    incremental = get_labels(make_linker(cache_dir=cache_dir, incremental_rebuild=True))
+    assert re.search(r"Rebuilding FOOD labels \w+ incrementally", capsys.readouterr().out)
+    full = get_labels(make_linker(cache_dir=os.path.join(tmp_path, "full")))
+
+    assert incremental == full
+    food_labels = [label for _, label, _ in full[EntityType.FOOD]]
+    assert "bittersweet chocolate" in food_labels and "orange juice" not in food_labels
+
+
+@pytest.mark.parametrize("similarity_measure", [SimilarityType.JACCARD, SimilarityType.EVERYGRAM])
+def test_migrated_link_cache_links_as_a_new_linker(make_linker, food_ontology, brat_docs, tmp_path, capsys,
+                                                   similarity_measure):
+    options = {
+        "annotations_path": brat_docs,
+        "similarity_measure": similarity_measure,
+        "cache_dir": os.path.join(tmp_path, "cache"),
+        "incremental_rebuild": True,
+        "link_cache_path": os.path.join(tmp_path, "links.sqlite"),
+    }
+    link_all(make_linker(**options), os.path.join(tmp_path, "previous.csv"))
+    write_ontology(food_ontology, OBO + "food.owl", FOOD_CLASSES_V2)
+    capsys.readouterr()
+
+    migrated = link_all(make_linker(**options), os.path.join(tmp_path, "migrated.csv"))
+    migrations = re.findall(r"Kept (\d+) persisted FOOD link results .*, dropped (\d+)", capsys.readouterr().out)
+    # results of mentions sharing no features with changed labels are reused, the others are linked again
+    assert len(migrations) == 1 and all(int(count) > 0 for count in migrations[0])
+    expected = link_all(make_linker(annotations_path=brat_docs, similarity_measure=similarity_measure,
+                                    cache_dir=os.path.join(tmp_path, "fresh"), link_cache_size=0),
+                        os.path.join(tmp_path, "expected.csv"))
+    assert migrated == expected
+
+
+def test_label_table_is_used_for_the_roots_it_was_extracted_for_only(make_linker, food_ontology, tmp_path, capsys):
+    label_table_path = os.path.join(tmp_path, "labels.csv.gz")
+    OntologyParser(food_ontology, label_table_path, {EntityType.FOOD: [FOOD_ROOT], EntityType.PROCESS: [PROCESS_ROOT]}) \
+        .get_label_rows()
+    config_path = os.path.join(tmp_path, "categories.json")
+    with open(config_path, "w") as f:
+        # PROCESS roots differ from the table, COLOR is missing from it
+        json.dump({"FOOD": [{"root_iris": [FOOD_ROOT]}], "PROCESS": [{"root_iris": [OBO + "BFO_0000015"]}],
+                   "COLOR": [{"root_iris": [OBO + "FOODON_1"]}]}, f)
+    capsys.readouterr()
+
+    from_table = get_labels(make_linker(cache_dir=os.path.join(tmp_path, "table"), label_table_path=label_table_path,
+                                        category_config_path=config_path))
+    output = capsys.readouterr().out
+    assert "not extracted for PROCESS roots" in output and "not extracted for COLOR roots" in output
+    assert "not extracted for FOOD roots" not in output
+    assert from_table == get_labels(make_linker(cache_dir=os.path.join(tmp_path, "ontology"),
+                                                category_config_path=config_path))
+    assert {label for _, label, _ in from_table[EntityType.COLOR]} == \
+        {"chocolate", "cocoa", "dark chocolate", "bitter chocolate", "milk chocolate"}
+
+    # labels cached from a table are rebuilt when the table changes
+    write_label_table(label_table_path, [row for row in read_label_table(label_table_path) if row.label != "sugar"],
+                      {EntityType.FOOD: [FOOD_ROOT]})
+    changed = get_labels(make_linker(cache_dir=os.path.join(tmp_path, "table"), label_table_path=label_table_path,
+                                     category_config_path=config_path))
+    assert "sugar" not in {label for _, label, _ in changed[EntityType.FOOD]}
+    assert "sugar" in {label for _, label, _ in from_table[EntityType.FOOD]}
@@ -0,0 +1,42 @@
+from taisti_linker.commons import LabelWithIRI
+from taisti_linker.label_index import LabelIndex
+from taisti_linker.similarity_calculator import SimilarityCalculator, SimilarityType
+
+import pytest
+import random
+
+
+WORDS = ["dark", "milk", "chocolate", "sugar", "brown", "cane", "whole", "wheat", "flour", "oil", "olive", "salted"]
+
+
+def scan(labels, representations, representation, calculator, min_acceptable_similarity):
+    """ The exhaustive scan `LabelIndex.find_best` replaces: the first perfect match, otherwise the last best label """
+    best_position, max_similarity = -1, -1.0
+    for position, label_representation in enumerate(representations):
+        similarity = calculator.calculate(representation, label_representation)
+        if similarity > min_acceptable_similarity and similarity >= max_similarity:
+            best_position, max_similarity = position, similarity
+        if similarity == 1.0:
+            break
+    return best_position
+
+
+def random_texts(generator, count):
+    return [" ".join(generator.choice(WORDS) for _ in range(generator.randint(1, 4))) for _ in range(count)]
+
+
+@pytest.mark.parametrize("similarity_type", [SimilarityType.JACCARD, SimilarityType.EVERYGRAM])
+@pytest.mark.parametrize("min_acceptable_similarity", [-1.0, 0.0, 0.3, 0.5, 0.99])
+def test_find_best_links_the_same_labels_as_a_scan(similarity_type, min_acceptable_similarity):
+    generator = random.Random(13)
+    # repeated labels make ties, which the scan resolves by the label order
+    labels = [LabelWithIRI(text, f"iri-{position}", text) for position, text in enumerate(random_texts(generator, 300))]
+    calculator = SimilarityCalculator(similarity_type)
+    index = LabelIndex(labels, calculator.preprocess)
+    representations = [calculator.preprocess(item.normalized_label) for item in labels]
+
+    for text in random_texts(generator, 300) + ["unknown words", ""]:
+        representation = calculator.preprocess(text)
+        expected = scan(labels, representations, representation, calculator, min_acceptable_similarity)
+        assert index.find_best(representation, calculator.calculate, min_acceptable_similarity) == expected, text
+    assert index.stats()["scored"] > 0
@@ -0,0 +1,23 @@
+from taisti_linker.commons import EntityType
+from taisti_linker.similarity_calculator import SimilarityCalculator, SimilarityType
+
+import pytest
+
+
+@pytest.mark.parametrize("similarity_measure", [SimilarityType.JACCARD, SimilarityType.EVERYGRAM,
+                                                SimilarityType.SPARSE_JACCARD, SimilarityType.MINHASH])
+def test_labels_are_indexed_from_stored_tokens_without_materializing_them(make_linker, similarity_measure):
+    linker = make_linker(similarity_measure=similarity_measure)
+    category_labels = linker.normalized_label_mapping[EntityType.FOOD]
+    calculator = SimilarityCalculator(similarity_measure)
+    for position, normalized_label in enumerate(category_labels):
+        assert category_labels.get_tokens(position) == normalized_label.split()
+        assert calculator.preprocess_tokens(category_labels.get_tokens(position)) == \
+            calculator.preprocess(normalized_label)
+
+    linker = make_linker(similarity_measure=similarity_measure)
+    linked = linker.link(linker.text_processor.normalize_text("dark chocolate"), EntityType.FOOD)
+    assert linked is not None and linked.label == "dark chocolate"
+    # labels are materialized only when linked (or scored, as MinHash candidates are)
+    materialized = sum(item is not None for item in linker.normalized_label_mapping[EntityType.FOOD]._items)
+    assert 0 < materialized < len(category_labels) // 2
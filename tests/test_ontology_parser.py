@@ -0,0 +1,37 @@
+from conftest import FOOD_ROOT, PROCESS_ROOT, UNIT_ROOT
+from taisti_linker.commons import EntityType
+from taisti_linker.ontology_parser import OntologyParser
+
+import pytest
+
+
+def get_label_sets(ontology_paths, order):
+    roots = {
+        EntityType.FOOD: (ontology_paths["food"], [FOOD_ROOT]),
+        EntityType.PROCESS: (ontology_paths["food"], [PROCESS_ROOT]),
+        EntityType.UNIT: (ontology_paths["unit"], [UNIT_ROOT]),
+    }
+    labels = {}
+    for entity_type in order:
+        path, iris = roots[entity_type]
+        labels[entity_type] = set(OntologyParser(path, root_iris={entity_type: iris}).get_labels(entity_type))
+    return labels
+
+
+def test_labels_do_not_depend_on_the_order_ontologies_are_loaded_in(food_ontology, unit_ontology):
+    paths = {"food": food_ontology, "unit": unit_ontology}
+    process_first = get_label_sets(paths, [EntityType.PROCESS, EntityType.FOOD, EntityType.UNIT])
+    unit_first = get_label_sets(paths, [EntityType.UNIT, EntityType.PROCESS, EntityType.FOOD])
+
+    assert process_first == unit_first
+    process_labels = {label for label, _ in unit_first[EntityType.PROCESS]}
+    assert "baking" in process_labels
+    assert not {"unit", "ounce", "stir"} & process_labels
+    assert {label for label, _ in unit_first[EntityType.UNIT]} == {"unit", "ounce", "oz", "gram", "stir"}
+
+
+def test_roots_are_resolved_in_their_own_ontology_only(food_ontology, unit_ontology):
+    OntologyParser(unit_ontology, root_iris={EntityType.UNIT: [UNIT_ROOT]}).get_labels(EntityType.UNIT)
+
+    with pytest.raises(ValueError, match="UO_0000000"):
+        OntologyParser(food_ontology, root_iris={EntityType.UNIT: [UNIT_ROOT]}).get_labels(EntityType.UNIT)
@@ -0,0 +1,126 @@
+from taisti_linker import __version__
+from taisti_linker.server import serve
+
+import http.client
+import json
+import pytest
+import threading
+
+
+@pytest.fixture
+def server(make_linker):
+    server = serve(make_linker(), port=0, max_wait_ms=1.0)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def request(server, method, path, body=None):
+    connection = http.client.HTTPConnection("127.0.0.1", server.server_address[1], timeout=30)
+    try:
+        connection.request(method, path, body=body, headers={"Content-Type": "application/json"})
+        response = connection.getresponse()
+        return response.status, json.loads(response.read())
+    finally:
+        connection.close()
+
+
+def link(server, mentions):
+    status, body = request(server, "POST", "/link", json.dumps({"mentions": mentions}))
+    assert status == 200
+    return body["results"]
+
+
+def test_mentions_normalized_to_nothing_are_not_linked(server):
+    results = link(server, [
+        {"text": "", "category": "FOOD"},
+        {"text": "a", "category": "FOOD"},
+        {"text": "the", "category": "food_product"},
+        {"text": "whole milk", "category": "FOOD"},
+    ])
+
+    for result in results[:3]:
+        assert (result["iri"], result["label"], result["score"]) == (None, None, None)
+    assert results[3]["label"] == "whole milk"
+
+
+def test_link_returns_a_result_per_mention_in_order(server):
+    mentions = [
+        {"text": "Dark Chocolate", "category": "FOOD"},
+        {"text": "cane sugar", "category": "food_product_with_unit"},
+        {"text": "frying", "category": "process"},
+        {"text": "Dark Chocolate", "category": "FOOD"},
+        {"text": "zzz", "category": "FOOD"},
+    ]
+    results = link(server, mentions)
+
+    assert [(result["text"], result["category"]) for result in results] == [
+        ("Dark Chocolate", "FOOD"), ("cane sugar", "FOOD"), ("frying", "PROCESS"), ("Dark Chocolate", "FOOD"),
+        ("zzz", "FOOD")]
+    assert (results[0]["iri"], results[0]["label"], results[0]["score"]) == (
+        "http://purl.obolibrary.org/obo/FOODON_2", "dark chocolate", 1.0)
+    # synonyms are linked to their entities
+    assert (results[1]["label"], results[1]["iri"]) == ("cane sugar", "http://purl.obolibrary.org/obo/FOODON_7")
+    assert results[2]["iri"] == "http://purl.obolibrary.org/obo/FOODON_21"
+    assert results[3] == results[0]
+    assert (results[4]["iri"], results[4]["score"]) == (None, None)
+
+
+def test_link_scores_partial_matches(server):
+    result, = link(server, [{"text": "virgin olive oil", "category": "FOOD"}])
+
+    assert result["label"] == "olive oil"
+    assert 0.5 < result["score"] < 1.0
+
+
+@pytest.mark.parametrize("body", ["not json", "{}", '{"mentions": [{"text": "milk"}]}', '{"mentions": 1}'])
+def test_malformed_requests_are_rejected(server, body):
+    status, response = request(server, "POST", "/link", body)
+
+    assert status == 400
+    assert "error" in response
+
+
+def test_health_and_metrics(server):
+    link(server, [{"text": "milk", "category": "FOOD"}, {"text": "skimmed milk", "category": "FOOD"}])
+
+    assert request(server, "GET", "/health") == (200, {"status": "ok", "version": __version__})
+    assert request(server, "GET", "/unknown")[0] == 404
+    assert request(server, "POST", "/unknown", "{}")[0] == 404
+    status, metrics = request(server, "GET", "/metrics")
+    assert status == 200
+    assert (metrics["requests"], metrics["mentions"], metrics["errors"]) == (1, 2, 0)
+    assert metrics["linker"]["counters"]["direct_matches"] == 1
+
+
+def test_metrics_are_read_by_the_linking_thread_under_load(server):
+    linker = server.RequestHandlerClass.service.linker
+    snapshot = linker.metrics.snapshot
+    snapshot_threads = set()
+
+    def record_thread():
+        snapshot_threads.add(threading.current_thread().name)
+        return snapshot()
+
+    linker.metrics.snapshot = record_thread
+    errors = []
+
+    def link_many(client):
+        try:
+            for position in range(20):
+                link(server, [{"text": f"milk {client} {position}", "category": "FOOD"}])
+                assert request(server, "GET", "/metrics")[0] == 200
+        except Exception as e:
+            errors.append(e)
+
+    clients = [threading.Thread(target=link_many, args=(client,)) for client in range(4)]
+    for client in clients:
+        client.start()
+    for client in clients:
+        client.join()
+
+    assert errors == []
+    assert snapshot_threads == {"linker"}
+    assert request(server, "GET", "/metrics")[1]["requests"] == 80